@@ -1,51 +1,284 @@
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi import Body
 from pydantic import BaseModel
-import sqlite3
+from typing import List, Optional
+import json
+import logging
 import os
+import threading
+
+from modules.db import get_change_state, get_stats, search_jobs, update_status_where, update_statuses
+from modules.db_pool import ConnectionPool
+from modules.log import setup_logging
+from modules.monitoring import prometheus_text, run_status
+from modules.workqueue import QUEUE_DATABASE_NAME, QUEUE_JOURNAL_MODE
+
+logger = logging.getLogger(__name__)
 
 class StatusUpdate(BaseModel):
+    # Canonical job id, or a board's own job id when the board's site_key ("type:id") is given.
     job_id: str
-    site_id: str
+    site_key: Optional[str] = None
+    status: str
+
+class BatchStatusUpdate(BaseModel):
+    updates: List[StatusUpdate]
+
+class BulkStatusUpdate(BaseModel):
+    # Every open job matching all of the given filters gets `status`.
     status: str
+    company_name: Optional[str] = None
+    site_key: Optional[str] = None
+    title_contains: Optional[str] = None
+    current_status: Optional[str] = None
 
-app = FastAPI()
 DATABASE_NAME = os.environ.get("DATABASE_NAME", "jobs.db")
+pool = ConnectionPool(DATABASE_NAME)
+# Distributed runs keep their work queue in a separate file when QUEUE_DATABASE_NAME is set.
+queue_pool = (pool if QUEUE_DATABASE_NAME == DATABASE_NAME
+              else ConnectionPool(QUEUE_DATABASE_NAME, journal_mode=QUEUE_JOURNAL_MODE))
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    pool.close()
+    if queue_pool is not pool:
+        queue_pool.close()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
 templates = Jinja2Templates(directory="templates")
 
-def get_jobs():
-    conn = sqlite3.connect(DATABASE_NAME)
+class ResponseCache:
+    """
+    Rendered response bodies, valid for a single value of the DB change counter.
+    Any write (a scrape or a status update) bumps the counter, which empties the cache.
+    """
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self.counter = None
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _check(self, counter):
+        if counter != self.counter:
+            self.entries.clear()
+            self.counter = counter
+
+    def get(self, counter, key):
+        with self.lock:
+            self._check(counter)
+            body = self.entries.get(key)
+            if body is not None:
+                self.entries.move_to_end(key)
+            return body
+
+    def put(self, counter, key, body):
+        with self.lock:
+            self._check(counter)
+            self.entries[key] = body
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+response_cache = ResponseCache()
+
+def cache_headers(counter, changed_at):
+    headers = {"ETag": f'W/"{counter}"', "Cache-Control": "no-cache"}
+    if changed_at:
+        headers["Last-Modified"] = formatdate(changed_at, usegmt=True)
+    return headers
+
+def not_modified(request, headers):
+    """True if the client's cached copy (If-None-Match / If-Modified-Since) is still current."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or headers["ETag"] in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in headers:
+        try:
+            return parsedate_to_datetime(headers["Last-Modified"]) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+# Streamed bodies up to this size are also kept in response_cache; larger ones are only streamed.
+STREAM_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+# Rendered template output is sent in chunks of roughly this many characters.
+STREAM_CHUNK_SIZE = 16 * 1024
+
+async def cached_response(request, key, render, media_type, stream=False):
+    """
+    Serves a 304 when the client is current, otherwise cached bytes, otherwise
+    the output of `render()` (run in the threadpool) which is then cached.
+    With stream, `render()` returns an iterator of byte chunks that is streamed
+    to the client as it is produced.
+    """
+    counter, changed_at = await run_in_threadpool(change_state)
+    headers = cache_headers(counter, changed_at)
+    if not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    body = response_cache.get(counter, key)
+    if body is not None:
+        return Response(content=body, media_type=media_type, headers=headers)
+    if stream:
+        return StreamingResponse(cache_while_streaming(render(), counter, key), media_type=media_type, headers=headers)
+    body = await run_in_threadpool(render)
+    response_cache.put(counter, key, body)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+def cache_while_streaming(chunks, counter, key):
+    """Passes chunks through, caching the whole body unless it grows past STREAM_CACHE_MAX_BYTES."""
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        if buffer is not None:
+            size += len(chunk)
+            if size <= STREAM_CACHE_MAX_BYTES:
+                buffer.append(chunk)
+            else:
+                buffer = None
+        yield chunk
+    if buffer is not None:
+        response_cache.put(counter, key, b"".join(buffer))
+
+def chunked(pieces, size=STREAM_CHUNK_SIZE):
+    """Groups the many small strings Jinja's generate() yields into encoded chunks."""
+    parts = []
+    length = 0
+    for piece in pieces:
+        parts.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield "".join(parts).encode("utf-8")
+            parts = []
+            length = 0
+    if parts:
+        yield "".join(parts).encode("utf-8")
+
+def iter_jobs(conn, batch_size=500):
+    """Yields job rows straight from the cursor so the full list is never held in memory."""
     cursor = conn.cursor()
     cursor.execute("""
-        SELECT job_id, title, company_name, apply_url, location_city, location_state,
-               location_country, remote, hybrid, last_seen, site_id, id, status
-        FROM jobs
-        GROUP BY job_id
-        ORDER BY last_seen DESC, company_name, title
+        SELECT c.id, c.title, c.company_name, c.apply_url, c.location_city, c.location_state,
+               c.location_country, c.remote, c.hybrid, c.last_seen, c.closed_at, c.status,
+               (SELECT COUNT(*) FROM job_sightings s WHERE s.canonical_id = c.id) AS boards
+        FROM canonical_jobs c
+        ORDER BY c.last_seen DESC, c.company_name, c.title
     """)
-    jobs = cursor.fetchall()
-    conn.close()
-    return jobs
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield from rows
+
+def render_index(request):
+    # The generator is advanced from different threadpool threads, so it
+    # borrows a connection instead of using a per-thread reader.
+    with pool.borrow() as conn:
+        template = templates.get_template("index.html")
+        yield from chunked(template.generate({"request": request, "jobs": iter_jobs(conn)}))
+
+def change_state():
+    return get_change_state(pool.reader())
+
+def search(text, **kwargs):
+    return search_jobs(pool.reader(), text, **kwargs)
+
+def stats(**kwargs):
+    return get_stats(pool.reader(), **kwargs)
+
+def live_status():
+    return run_status(pool.reader(), queue_pool.reader())
+
+def render_metrics():
+    writes = [
+        ("headhunter_app_db_writes_total", "counter", "Status update writes made by the web app.",
+         [({}, pool.writes)]),
+        ("headhunter_app_db_write_seconds_total", "counter",
+         "Seconds spent in web app writes, waiting for the write lock included.", [({}, pool.write_seconds)]),
+    ]
+    return prometheus_text(live_status(), extra=writes)
+
+# SQLite calls block, so handlers run these in the threadpool rather than on the event loop.
+def set_statuses(updates):
+    with pool.write() as conn:
+        return update_statuses(conn, [update.model_dump() for update in updates])
+
+def set_status_where(update):
+    with pool.write() as conn:
+        return update_status_where(conn, **update.model_dump())
 
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
-    jobs = get_jobs()
-    return templates.TemplateResponse("index.html", {"request": request, "jobs": jobs})
+    return await cached_response(request, "index", lambda: render_index(request), "text/html; charset=utf-8",
+                                 stream=True)
+
+@app.get("/api/search")
+async def api_search(request: Request, q: str = "", page: int = Query(1, ge=1),
+                     page_size: int = Query(25, ge=1, le=100), include_closed: bool = False,
+                     min_salary: Optional[float] = Query(None, ge=0), max_salary: Optional[float] = Query(None, ge=0)):
+    """Full-text search; min_salary/max_salary (annual) narrow it, or list jobs by salary when q is empty."""
+    def render():
+        total, results = search(q, limit=page_size, offset=(page - 1) * page_size, include_closed=include_closed,
+                                min_salary=min_salary, max_salary=max_salary)
+        body = {"query": q, "page": page, "page_size": page_size, "total": total, "results": results}
+        return json.dumps(body).encode("utf-8")
+    return await cached_response(request, f"search?{request.url.query}", render, "application/json")
+
+@app.get("/api/stats")
+async def api_stats(request: Request, since: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
+                    top: int = Query(20, ge=1, le=200)):
+    """Job counts by status, company and board from the summary tables; `since` adds jobs first seen since then."""
+    def render():
+        return json.dumps(stats(since=since, top=top)).encode("utf-8")
+    return await cached_response(request, f"stats?{request.url.query}", render, "application/json")
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Scrape progress in the Prometheus text format. Not cached: scrapes change it between status writes."""
+    body = await run_in_threadpool(render_metrics)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/status", response_class=HTMLResponse)
+async def status_page(request: Request):
+    """Live view of the current run: in-flight and stalled sites, queue depth, throughput and errors."""
+    status = await run_in_threadpool(live_status)
+    return templates.TemplateResponse(request, "status.html", {"status": status})
 
 @app.put("/update_status")
 async def update_status(update: StatusUpdate):
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    print(f"Updating job {update.job_id} to status {update.status}")
-    cursor.execute("UPDATE jobs SET status = ? WHERE job_id = ? and site_id = ?", (update.status, update.job_id, update.site_id))
-    conn.commit()
-    conn.close()
+    logger.info("Updating job %s to status %s", update.job_id, update.status)
+    updated = await run_in_threadpool(set_statuses, [update])
+    if not updated:
+        raise HTTPException(status_code=404, detail=f"No job {update.job_id}")
     return {"success": True}
 
+@app.put("/update_status/batch")
+async def update_status_batch(batch: BatchStatusUpdate):
+    logger.info("Updating %d job statuses", len(batch.updates))
+    updated = await run_in_threadpool(set_statuses, batch.updates)
+    return {"success": True, "updated": updated}
+
+@app.put("/update_status/bulk")
+async def update_status_bulk(update: BulkStatusUpdate):
+    logger.info("Bulk updating jobs to status %s: %s", update.status, update.model_dump(exclude_none=True))
+    try:
+        updated = await run_in_threadpool(set_status_where, update)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"success": True, "updated": updated}
+
 
 if __name__ == "__main__":
     import uvicorn
+    setup_logging()
     uvicorn.run(app, host="0.0.0.0", port=8000)
-
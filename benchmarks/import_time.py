@@ -0,0 +1,78 @@
+"""
+Import-time benchmark for the command line entry points.
+
+Each case is imported in a fresh interpreter several times and the median
+wall time (minus the time to start a bare interpreter) is reported. The
+"eager" case loads every scraper class up front, which is what search.py did
+before scrapers were registered lazily, so the difference is the startup
+saved by runs that only scrape some board types.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 20 --top 15   # also list the slowest imports of each case
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CASES = {
+    "search.py": "import search",
+    "search.py, every scraper loaded (eager)":
+        "import search; from modules.scrapers import SCRAPER_CLASSES, get_scraper_class; "
+        "[get_scraper_class(t) for t in SCRAPER_CLASSES]",
+    "worker.py": "import worker",
+    "app.py": "import app",
+}
+
+
+def run(code, extra_args=()):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, *extra_args, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    return time.perf_counter() - started, result
+
+def time_case(code, runs):
+    """Returns the median seconds to run `code` in a new interpreter, or the error it failed with."""
+    timings = []
+    for _ in range(runs):
+        elapsed, result = run(code)
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1]
+        timings.append(elapsed)
+    return statistics.median(timings), None
+
+def slowest_imports(code, top):
+    """Parses `python -X importtime` output into the `top` modules with the largest cumulative time."""
+    _, result = run(code, ("-X", "importtime"))
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        rows.append((int(cumulative), name))
+    return sorted(rows, reverse=True)[:top]
+
+def main(runs, top):
+    baseline, _ = time_case("pass", runs)
+    print(f"Interpreter startup: {baseline * 1000:.1f} ms (subtracted below)")
+    for name, code in CASES.items():
+        median, error = time_case(code, runs)
+        if error:
+            print(f"{name:45} failed: {error}")
+            continue
+        print(f"{name:45} {(median - baseline) * 1000:8.1f} ms")
+        for cumulative, module in slowest_imports(code, top) if top else []:
+            print(f"    {cumulative / 1000:8.1f} ms  {module.strip()}")
+
+if __name__ == "__main__":
+    parser = ArgumentParser(formatter_class=ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="Imports per case; the median is reported")
+    parser.add_argument("--top", type=int, default=0, help="Also list this many slowest imports per case")
+    args = parser.parse_args()
+
+    main(args.runs, args.top)
@@ -0,0 +1,501 @@
+"""
+Offline replay benchmark for the scraping pipeline.
+
+Board responses are recorded once into fixtures (benchmarks/fixtures/*.json)
+and then replayed through a local HTTP server standing in for the boards, so
+runs are repeatable and never touch the network. Every fixture goes through the
+same stages as `search.py` -- fetch, parse, transform, filter and save (into a
+throwaway database) -- and the benchmark reports per-stage latency, end-to-end
+throughput (jobs/sec) and peak memory (tracemalloc) per board.
+
+Getro boards are rendered with Selenium, which can't be replayed without a
+browser and whose time is mostly fixed sleeps, so their fixtures hold the raw
+make_job() arguments scraped from the rendered page and replay starts at transform.
+
+Usage:
+    python benchmarks/replay.py record                        # one board of each type from the *_sites.json files
+    python benchmarks/replay.py record --site greenhouse:abcellera
+    python benchmarks/replay.py synthesize --jobs 500         # generated stand-in fixtures, no network needed
+    python benchmarks/replay.py run --repeat 5 --save         # replay all fixtures, store results in benchmarks/results
+    python benchmarks/replay.py compare                       # latest two stored results; exits 1 on a regression
+"""
+
+import contextlib
+import datetime
+import glob
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import tracemalloc
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from modules import db, http_client
+from modules.log import add_log_arguments, setup_logging
+from modules.metrics import ScrapeMetrics
+from modules.ratelimit import limiter
+from modules.scrapers import get_scraper_class
+
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+SITE_FILES = ["consider_sites.json", "greenhouse_sites.json", "ventureloop_sites.json", "getro_sites.json"]
+
+STAGES = ["fetch", "parse", "transform", "filter", "save"]
+
+# Site types whose fixtures hold raw scraped records instead of HTTP responses.
+RECORD_TYPES = {"getro"}
+
+# A stage or total counts as regressed when it gets this much slower between results...
+REGRESSION_THRESHOLD = 0.2
+# ...and takes at least this long; shorter timings are mostly noise.
+NOISE_FLOOR_SECONDS = 0.005
+
+
+# ====================
+# Fixtures
+# ====================
+def fixture_path(site_config):
+    return os.path.join(FIXTURES_DIR, f"{site_config['type']}-{site_config['id']}.json")
+
+def load_fixtures(pattern="*"):
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, f"{pattern}.json"))):
+        with open(path) as f:
+            fixture = json.load(f)
+        fixture["name"] = os.path.splitext(os.path.basename(path))[0]
+        fixtures.append(fixture)
+    return fixtures
+
+def write_fixture(site_config, responses=None, records=None):
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    fixture = {
+        "site_config": site_config,
+        "recorded_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "responses": responses or [],
+    }
+    if records is not None:
+        fixture["records"] = records
+    path = fixture_path(site_config)
+    with open(path, "w") as f:
+        json.dump(fixture, f)
+    print(f"Wrote {path}")
+
+def request_key(method, url, params=None):
+    """Identifies a request independently of host and query parameter order."""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += list(params.items())
+    return method.upper(), parts.path.rstrip("/"), tuple(sorted(query))
+
+@contextlib.contextmanager
+def replaced(owner, name, value):
+    original = getattr(owner, name)
+    setattr(owner, name, value)
+    try:
+        yield original
+    finally:
+        setattr(owner, name, original)
+
+
+# ====================
+# Recording
+# ====================
+def record_site(site_config, app_config):
+    config = dict(site_config)
+    site_type = config.pop("type")
+    scraper_class = get_scraper_class(site_type)
+    responses = []
+    records = []
+
+    class Recorder(scraper_class):
+        def make_job(self, **record):
+            records.append(record)
+            return super().make_job(**record)
+
+    original_request = http_client.request
+
+    def recording_request(method, url, **kwargs):
+        response = original_request(method, url, **kwargs)
+        responses.append({
+            "method": method,
+            "url": url,
+            "params": kwargs.get("params") or {},
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type", ""),
+            "body": response.text,
+        })
+        return response
+
+    with replaced(http_client, "request", recording_request):
+        jobs = Recorder(app_config=app_config, **config).scrape()
+    if jobs is None:
+        print(f"Scrape of {site_config['name']} failed; nothing recorded")
+        return
+    print(f"Recorded {len(jobs)} jobs from {site_config['name']} ({len(responses)} responses)")
+    if site_type in RECORD_TYPES:
+        write_fixture(site_config, records=records)
+    else:
+        write_fixture(site_config, responses=responses)
+
+def record(sites, app_config):
+    configs = []
+    for site_file in SITE_FILES:
+        path = os.path.join(ROOT, site_file)
+        if os.path.exists(path):
+            with open(path) as f:
+                configs.extend(json.load(f))
+    if sites:
+        wanted = set(sites)
+        configs = [c for c in configs if f"{c['type']}:{c['id']}" in wanted]
+    else:
+        # Default to the first board of each type.
+        first = {}
+        for config in configs:
+            first.setdefault(config["type"], config)
+        configs = list(first.values())
+    for config in configs:
+        try:
+            record_site(config, app_config)
+        except Exception as e:
+            print(f"Error recording {config['name']}: {e}")
+
+
+# ====================
+# Synthetic fixtures
+# ====================
+TITLES = ["VP of Product", "Head of Product", "Chief Product Officer", "Senior Product Manager",
+          "Software Engineer", "Product Marketing Manager", "VP Product, Platform", "Account Executive"]
+LOCATIONS = ["New York, NY, USA", "Remote", "San Francisco, CA, USA", "London, UK", "Hybrid", "Austin, TX, USA"]
+SALARIES = ["$150k - $200k", "$180,000 - $220,000 USD", "£90k", "", "$70 - $90 /hr", "Up to $250k"]
+
+def synthesize(count, seed=0):
+    """Writes generated fixtures shaped like each board's real responses, `count` jobs per board."""
+    rng = random.Random(seed)
+    jobs = [{
+        "id": str(100000 + i),
+        "title": rng.choice(TITLES),
+        "company": f"Company {rng.randrange(count // 4 + 1)}",
+        "location": rng.choice(LOCATIONS),
+        "salary": rng.choice(SALARIES),
+    } for i in range(count)]
+
+    consider = {"jobs": [{
+        "jobId": job["id"],
+        "title": job["title"],
+        "companyName": job["company"],
+        "applyUrl": f"https://jobs.example.com/{job['id']}",
+        "locations": [job["location"]],
+        "salary": {"minValue": 150000, "maxValue": 200000, "currency": {"value": "USD"}, "period": {"value": "YEAR"}}
+        if job["salary"] else None,
+        "remote": job["location"] == "Remote",
+    } for job in jobs]}
+    write_fixture(
+        {"id": "synthetic", "name": "Synthetic Consider", "type": "consider",
+         "url": "https://jobs.example.com/api-boards/search-jobs"},
+        responses=[{"method": "POST", "url": "https://jobs.example.com/api-boards/search-jobs", "params": {},
+                    "status": 200, "content_type": "application/json", "body": json.dumps(consider)}],
+    )
+
+    greenhouse = {"jobs": [{
+        "internal_job_id": int(job["id"]),
+        "title": job["title"],
+        "company_name": job["company"],
+        "absolute_url": f"https://boards.greenhouse.io/example/jobs/{job['id']}",
+        "location": {"name": job["location"]},
+    } for job in jobs]}
+    url = "https://boards-api.greenhouse.io/v1/boards/synthetic/jobs"
+    write_fixture(
+        {"id": "synthetic", "name": "Synthetic Greenhouse", "type": "greenhouse", "url": url},
+        responses=[{"method": "GET", "url": url, "params": {}, "status": 200,
+                    "content_type": "application/json", "body": json.dumps(greenhouse)}],
+    )
+
+    base = "https://www.ventureloop.com/ventureloop/synthetic/"
+    responses = []
+    for page, start in enumerate(range(0, count + 20, 20)):
+        rows = "".join(f'''
+            <div class="jobs_row">
+              <div class="jobs_topRow"><div class="jobs_descriptionBx"><div class="job_text">
+                <h3>{job["title"]}</h3>
+                <h4><span>{job["company"]} - </span>{job["location"]}
+                </h4>
+              </div></div></div>
+              <div class="jobs_btnnRow"><div class="apply_btnbx"><div><div>
+                <a href="/ventureloop/job_apply.php?jobid={job["id"]}">Apply</a>
+              </div></div></div></div>
+            </div>''' for job in jobs[start:start + 20])
+        responses.append({"method": "GET", "url": f"{base}pagination.php?&p={page}", "params": {}, "status": 200,
+                          "content_type": "text/html", "body": f"<html><body>{rows}</body></html>"})
+    write_fixture({"id": "synthetic", "name": "Synthetic VentureLoop", "type": "ventureloop", "url": base},
+                  responses=responses)
+
+    records = [{
+        "job_id": i,
+        "title": job["title"],
+        "company_name": job["company"],
+        "apply_url": f"https://careers.example.com/companies/c/jobs/{job['id']}-{job['title'].lower().replace(' ', '-')}",
+        "location": job["location"],
+        "salary": job["salary"],
+    } for i, job in enumerate(jobs)]
+    write_fixture({"id": "synthetic", "name": "Synthetic Getro", "type": "getro",
+                   "url": "https://careers.example.com/jobs"}, records=records)
+
+
+# ====================
+# Replay
+# ====================
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Serves recorded responses under /<fixture name>/<original path>."""
+    routes = {}
+
+    def _reply(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        name, _, rest = self.path.lstrip("/").partition("/")
+        response = self.routes.get(name, {}).get(request_key(self.command, "/" + rest))
+        if response is None:
+            self.send_error(404)
+            return
+        body = response["body"].encode("utf-8")
+        self.send_response(response["status"])
+        self.send_header("Content-Type", response["content_type"] or "application/octet-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, format, *args):
+        pass
+
+@contextlib.contextmanager
+def replay_server(fixtures):
+    routes = {}
+    for fixture in fixtures:
+        routes[fixture["name"]] = {
+            request_key(r["method"], r["url"], r.get("params")): r for r in fixture["responses"]
+        }
+    handler = type("Handler", (ReplayHandler,), {"routes": routes})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    # The stand-in server is local, so don't pace requests like a real board.
+    limiter.host_limits["127.0.0.1"] = (1e9, 1e9)
+    try:
+        yield server.server_address[1]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def replay_config(fixture, port):
+    """The fixture's site config pointed at the local server."""
+    config = dict(fixture["site_config"])
+    parts = urlsplit(config["url"])
+    config["url"] = f"http://127.0.0.1:{port}/{fixture['name']}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+    return config
+
+def replay_site(fixture, port, conn, app_config):
+    """Runs one fixture through every stage, measured the way search.py measures a scrape. Returns ScrapeMetrics."""
+    config = replay_config(fixture, port)
+    site_type = config.pop("type")
+    scraper = get_scraper_class(site_type)(app_config=app_config, **config)
+    metrics = ScrapeMetrics(fixture["name"])
+    scraper.transform = metrics.timed("transform", scraper.transform)
+
+    if site_type in RECORD_TYPES:
+        jobs = scraper.transform(fixture["records"])
+    else:
+        jobs = metrics.scrape(scraper.scrape)
+    jobs = jobs or []
+
+    with metrics.stage("filter"):
+        matching = [job for job in jobs if scraper.should_save_job(job)]
+    with metrics.stage("save"):
+        db.save_jobs(conn, matching, db.site_key(config))
+        if jobs:
+            db.reconcile_board(conn, db.site_key(config), [job.get("job_id") for job in jobs])
+    metrics.jobs = len(jobs)
+    metrics.matching = len(matching)
+    return metrics
+
+def replay_pass(fixtures, port, app_config, trace_memory=False):
+    """Replays every fixture into a fresh database. Returns {fixture name: measurements}."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, replaced(db, "DATABASE_NAME", os.path.join(tmp, "jobs.db")):
+        conn = db.create_db()
+        try:
+            for fixture in fixtures:
+                if trace_memory:
+                    tracemalloc.reset_peak()
+                metrics = replay_site(fixture, port, conn, app_config)
+                results[fixture["name"]] = {"jobs": metrics.jobs, "matching": metrics.matching,
+                                            "stages": metrics.stages, "requests": metrics.requests,
+                                            "bytes": metrics.bytes}
+                if trace_memory:
+                    results[fixture["name"]]["peak_memory_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+        finally:
+            conn.close()
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def run(repeat, pattern, app_config):
+    fixtures = load_fixtures(pattern)
+    if not fixtures:
+        print(f"No fixtures in {FIXTURES_DIR}; run 'record' or 'synthesize' first.")
+        return None
+    with replay_server(fixtures) as port:
+        passes = [replay_pass(fixtures, port, app_config) for _ in range(repeat)]
+        tracemalloc.start()
+        try:
+            memory = replay_pass(fixtures, port, app_config, trace_memory=True)
+        finally:
+            tracemalloc.stop()
+
+    sites = {}
+    for fixture in fixtures:
+        name = fixture["name"]
+        stages = {stage: statistics.median(p[name]["stages"][stage] for p in passes) for stage in STAGES}
+        total = sum(stages.values())
+        jobs = passes[0][name]["jobs"]
+        sites[name] = {
+            "jobs": jobs,
+            "matching": passes[0][name]["matching"],
+            "requests": passes[0][name]["requests"],
+            "bytes": passes[0][name]["bytes"],
+            "stages": stages,
+            "total": total,
+            "jobs_per_sec": jobs / total if total else 0.0,
+            "peak_memory_kb": memory[name]["peak_memory_kb"],
+        }
+    total_jobs = sum(site["jobs"] for site in sites.values())
+    total_time = sum(site["total"] for site in sites.values())
+    return {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "repeat": repeat,
+        "sites": sites,
+        "totals": {
+            "jobs": total_jobs,
+            "total": total_time,
+            "jobs_per_sec": total_jobs / total_time if total_time else 0.0,
+            "stages": {stage: sum(site["stages"][stage] for site in sites.values()) for stage in STAGES},
+            "peak_memory_kb": max(site["peak_memory_kb"] for site in sites.values()),
+        },
+    }
+
+def print_results(results):
+    header = f"{'board':32} {'jobs':>6} {'jobs/s':>9} " + " ".join(f"{stage:>9}" for stage in STAGES) + f" {'peak KB':>9}"
+    print(header)
+    rows = list(results["sites"].items()) + [("TOTAL", results["totals"])]
+    for name, site in rows:
+        stages = " ".join(f"{site['stages'][stage] * 1000:8.1f}m" for stage in STAGES)
+        print(f"{name:32} {site['jobs']:6} {site['jobs_per_sec']:9.0f} {stages} {site['peak_memory_kb']:9}")
+
+def save_results(results):
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(RESULTS_DIR, f"{stamp}-{results['commit']}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved results to {path}")
+
+
+# ====================
+# Comparing results
+# ====================
+def compare(old_path, new_path, threshold=REGRESSION_THRESHOLD):
+    """Prints per-board changes between two stored results. Returns True if anything regressed."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['commit']} ({old['created_at']}) -> {new['commit']} ({new['created_at']})")
+    regressed = False
+    for name, site in list(new["sites"].items()) + [("TOTAL", new["totals"])]:
+        before = old["totals"] if name == "TOTAL" else old["sites"].get(name)
+        if before is None:
+            continue
+        changes = []
+        for label, old_value, new_value in [("total", before["total"], site["total"])] + [
+                (stage, before["stages"][stage], site["stages"][stage]) for stage in STAGES] + [
+                ("memory", before["peak_memory_kb"], site["peak_memory_kb"])]:
+            if not old_value:
+                continue
+            change = (new_value - old_value) / old_value
+            flag = ""
+            if change > threshold and (label == "memory" or new_value >= NOISE_FLOOR_SECONDS):
+                flag = " REGRESSION"
+                regressed = True
+            changes.append(f"{label} {change:+.0%}{flag}")
+        print(f"{name:32} " + ", ".join(changes))
+    return regressed
+
+def stored_results():
+    return sorted(glob.glob(os.path.join(RESULTS_DIR, "*.json")))
+
+def main():
+    parser = ArgumentParser(formatter_class=ArgumentDefaultsHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="Record live board responses into fixtures")
+    record_parser.add_argument("--site", action="append", default=[], help="type:id of a board to record (repeatable)")
+    add_log_arguments(record_parser)
+    synth_parser = commands.add_parser("synthesize", help="Write generated fixtures for every board type")
+    synth_parser.add_argument("--jobs", type=int, default=500, help="Jobs per board")
+    run_parser = commands.add_parser("run", help="Replay fixtures and report timings")
+    run_parser.add_argument("--repeat", type=int, default=3, help="Timed passes; medians are reported")
+    run_parser.add_argument("--fixtures", default="*", help="Glob of fixture names to replay")
+    run_parser.add_argument("--save", action="store_true", help="Store the results in benchmarks/results")
+    add_log_arguments(run_parser)
+    compare_parser = commands.add_parser("compare", help="Compare two stored results")
+    compare_parser.add_argument("old", nargs="?", help="Older result file (default: second newest)")
+    compare_parser.add_argument("new", nargs="?", help="Newer result file (default: newest)")
+    compare_parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                                help="Slowdown (fraction) reported as a regression")
+    args = parser.parse_args()
+
+    if args.command == "synthesize":
+        synthesize(args.jobs)
+        return
+    if args.command == "compare":
+        results = stored_results()
+        old = args.old or (results[-2] if len(results) > 1 else None)
+        new = args.new or (results[-1] if results else None)
+        if not old or not new:
+            print("Need two stored results to compare.")
+            sys.exit(2)
+        sys.exit(1 if compare(old, new, args.threshold) else 0)
+
+    from search import APP_CONFIG
+    if args.command == "record":
+        setup_logging(args.log_level, args.log_format)
+        record(args.site, APP_CONFIG)
+    elif args.command == "run":
+        # Only warnings by default, so writing log lines stays out of the timings.
+        setup_logging(args.log_level or "WARNING", args.log_format)
+        results = run(args.repeat, args.fixtures, APP_CONFIG)
+        if results:
+            print_results(results)
+            if args.save:
+                save_results(results)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
+import csv
+import logging
 import os
 import json
 import time
-import pandas as pd
 from urllib.parse import urlparse
 
 from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
@@ -10,8 +11,14 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, WebDriverException
 
+from modules.log import add_log_arguments, setup_logging
+from modules.profiling import add_profile_arguments, profiled, profiler_from_args
+from modules.ratelimit import limiter
+
 RESULTS_FILE = "career_links.json"
 
+logger = logging.getLogger(__name__)
+
 def extract_domain(url):
     """Extract domain from a URL."""
     try:
@@ -115,7 +122,7 @@ def get_powered_by_info(driver):
     page_source = driver.page_source
     current_url = str(driver.current_url)
 
-    print(f"  Checking powered-by for: {current_url}")
+    logger.debug("Checking powered-by for: %s", current_url)
 
     if "Powered by Consider" in page_source:
         powered_by = "consider"
@@ -193,20 +200,21 @@ def process_career_page(driver, career_url, timeout=10):
         try:
             # Set page load timeout
             driver.set_page_load_timeout(timeout)
+            limiter.wait(career_url)
             driver.get(career_url)
             time.sleep(2)  # Allow the career page to load
             powered_by, api_id = get_powered_by_info(driver)
             result["powered_by"] = powered_by
             result["api_id"] = api_id
         except TimeoutException:
-            print(f"    Timeout loading career page (>{timeout}s): {career_url}")
+            logger.warning("Timeout loading career page (>%ss): %s", timeout, career_url)
         except WebDriverException as e:
             if "timeout" in str(e).lower():
-                print(f"    Page load timeout: {career_url}")
+                logger.warning("Page load timeout: %s", career_url)
             else:
-                print(f"    WebDriver error: {career_url}: {str(e)[:100]}")
+                logger.warning("WebDriver error: %s: %s", career_url, str(e)[:100])
         except Exception as e:
-            print(f"    Error processing career link {career_url}: {str(e)[:100]}")
+            logger.warning("Error processing career link %s: %s", career_url, str(e)[:100])
     
     return result
 
@@ -225,30 +233,31 @@ def process_url(driver, url, crawl=False, portfolio=False, timeout=15):
         "career_pages": {}
     }
     
-    print(f"\nProcessing: {url}")
+    logger.debug("Processing: %s", url)
     
     try:
         if crawl:
             # Try to find career/job links on the page
             try:
                 driver.set_page_load_timeout(timeout)
+                limiter.wait(url)
                 driver.get(url)
                 time.sleep(2)
             except TimeoutException:
-                print(f"  Timeout loading main page (>{timeout}s), skipping...")
+                logger.warning("Timeout loading main page %s (>%ss), skipping...", url, timeout)
                 return result
             except WebDriverException as e:
                 if "timeout" in str(e).lower():
-                    print(f"  Page load timeout, skipping...")
+                    logger.warning("Page load timeout for %s, skipping...", url)
                 else:
-                    print(f"  WebDriver error loading page: {str(e)[:100]}")
+                    logger.warning("WebDriver error loading page %s: %s", url, str(e)[:100])
                 return result
             
-            print("  Searching for career/job links...")
+            logger.debug("Searching for career/job links...")
             career_links = find_career_links(driver)
             
             if career_links:
-                print(f"  Found {len(career_links)} career link(s)")
+                logger.debug("Found %d career link(s)", len(career_links))
                 for career_link in career_links:
                     if career_link and career_link != url:  # Avoid processing the same URL
                         career_info = process_career_page(driver, career_link)
@@ -260,20 +269,21 @@ def process_url(driver, url, crawl=False, portfolio=False, timeout=15):
             
             # If no career links found and portfolio flag is set, check portfolio links
             if not career_links and portfolio:
-                print("  No career links found, checking portfolio/investment links...")
+                logger.debug("No career links found, checking portfolio/investment links...")
                 portfolio_links = get_portfolio_investment_links(driver)
                 
                 for p_link in portfolio_links:
-                    print(f"  Following portfolio link: {p_link}")
+                    logger.debug("Following portfolio link: %s", p_link)
                     try:
                         driver.set_page_load_timeout(timeout)
+                        limiter.wait(p_link)
                         driver.get(p_link)
                         time.sleep(2)
                         
                         # Search for career links on the portfolio page
                         career_links = find_career_links(driver)
                         if career_links:
-                            print(f"    Found {len(career_links)} career link(s) on portfolio page")
+                            logger.debug("Found %d career link(s) on portfolio page", len(career_links))
                             for career_link in career_links:
                                 if career_link and career_link not in result["career_pages"]:
                                     career_info = process_career_page(driver, career_link, timeout=10)
@@ -282,17 +292,17 @@ def process_url(driver, url, crawl=False, portfolio=False, timeout=15):
                                         "api_id": career_info["api_id"]
                                     }
                     except TimeoutException:
-                        print(f"    Timeout loading portfolio page, skipping...")
+                        logger.warning("Timeout loading portfolio page %s, skipping...", p_link)
                     except WebDriverException as e:
                         if "timeout" in str(e).lower():
-                            print(f"    Portfolio page timeout, skipping...")
+                            logger.warning("Portfolio page timeout for %s, skipping...", p_link)
                         else:
-                            print(f"    Error loading portfolio page: {str(e)[:100]}")
+                            logger.warning("Error loading portfolio page %s: %s", p_link, str(e)[:100])
                     except Exception as e:
-                        print(f"    Error processing portfolio link: {str(e)[:100]}")
+                        logger.warning("Error processing portfolio link %s: %s", p_link, str(e)[:100])
         else:
             # Just check if the URL itself is a career page
-            print("  Checking if URL is a career page...")
+            logger.debug("Checking if URL is a career page...")
             career_info = process_career_page(driver, url, timeout=timeout)
             if career_info["powered_by"]:
                 result["career_pages"][url] = {
@@ -301,7 +311,7 @@ def process_url(driver, url, crawl=False, portfolio=False, timeout=15):
                 }
         return result
     except Exception as e:
-        print(f"  Error processing URL {url}: {e}")
+        logger.error("Error processing URL %s: %s", url, e)
     
         return False
 
@@ -310,9 +320,9 @@ def save_results(results, output_file):
     try:
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(results, f, indent=2, ensure_ascii=False)
-        print(f"\nResults saved to {output_file}")
+        logger.debug("Results saved to %s", output_file)
     except Exception as e:
-        print(f"Error saving results: {e}")
+        logger.error("Error saving results: %s", e)
 
 def load_existing_results(output_file):
     """Load existing results from JSON file if it exists."""
@@ -324,13 +334,13 @@ def load_existing_results(output_file):
             return []
     return []
 
-def main(crawl, portfolio, output_file, skip_existing_domains):
+def main(crawl, portfolio, output_file, skip_existing_domains, profiler=None):
     # Load URLs from CSV file 'urls.csv' with header 'urls'
     try:
-        urls_df = pd.read_csv("urls.csv")
-        urls = urls_df["urls"].tolist()
+        with open("urls.csv", newline="", encoding="utf-8") as f:
+            urls = [row["urls"] for row in csv.DictReader(f) if row.get("urls")]
     except Exception as e:
-        print(f"Error reading urls.csv: {e}")
+        logger.error("Error reading urls.csv: %s", e)
         return
 
     # Load existing results
@@ -348,8 +358,7 @@ def main(crawl, portfolio, output_file, skip_existing_domains):
     # Build set of existing domains if skip_existing_domains is True
     existing_domains = set(domain_index.keys())
     if skip_existing_domains and existing_domains:
-        print(f"Found {len(existing_domains)} existing domains in results")
-        print(f"Skip existing domains: {skip_existing_domains}")
+        logger.info("Found %d existing domains in results; skipping them", len(existing_domains))
     
     # Set up Chrome options
     options = Options()
@@ -370,7 +379,7 @@ def main(crawl, portfolio, output_file, skip_existing_domains):
             
             # Skip if already processed (exact URL match)
             if url in processed_urls or check_url in processed_urls:
-                print(f"Skipping {url} (URL already processed)")
+                logger.debug("Skipping %s (URL already processed)", url)
                 skipped_count += 1
                 continue
             
@@ -381,15 +390,16 @@ def main(crawl, portfolio, output_file, skip_existing_domains):
             # Check if domain already exists
             if domain_lower and domain_lower in existing_domains:
                 if skip_existing_domains:
-                    print(f"Skipping {url} (domain {domain} already exists)")
+                    logger.debug("Skipping %s (domain %s already exists)", url, domain)
                     skipped_count += 1
                     continue
                 else:
                     # Process and merge with existing domain
-                    print(f"Processing {url} (will merge with existing domain {domain})")
+                    logger.info("Processing %s (will merge with existing domain %s)", url, domain)
                     
                     # Process the URL
-                    url_result = process_url(driver, url, crawl=crawl, portfolio=portfolio)
+                    with profiled(profiler, domain or url):
+                        url_result = process_url(driver, url, crawl=crawl, portfolio=portfolio)
                     if not url_result:
                         continue
                     
@@ -409,16 +419,17 @@ def main(crawl, portfolio, output_file, skip_existing_domains):
                         after_count = len(existing_entry["career_pages"])
                         new_count = after_count - before_count
                         
-                        print(f"  Merged: Added {new_count} new career page(s) to existing {before_count}")
+                        logger.info("Merged: Added %d new career page(s) to existing %d", new_count, before_count)
                         merged_count += 1
                     else:
-                        print(f"  No new career pages found to merge")
+                        logger.info("No new career pages found to merge")
             else:
                 # New domain - process normally
-                print(f"Processing {url} (new domain)")
+                logger.info("Processing %s (new domain)", url)
                 
                 # Process the URL
-                url_result = process_url(driver, url, crawl=crawl, portfolio=portfolio)
+                with profiled(profiler, domain or url):
+                    url_result = process_url(driver, url, crawl=crawl, portfolio=portfolio)
                 if not url_result:
                     continue
                 # Add to results
@@ -432,32 +443,29 @@ def main(crawl, portfolio, output_file, skip_existing_domains):
                 # Summary for this URL
                 career_count = len(url_result["career_pages"])
                 if career_count > 0:
-                    print(f"  Summary: Found {career_count} career page(s)")
+                    logger.info("Summary: Found %d career page(s)", career_count)
                     for career_url, info in url_result["career_pages"].items():
                         if info["powered_by"]:
-                            print(f"    - {career_url[:50]}... -> {info['powered_by']}")
+                            logger.debug("%s... -> %s", career_url[:50], info["powered_by"])
                 else:
-                    print(f"  Summary: No career pages found")
+                    logger.info("Summary: No career pages found")
             
             # Save after each URL (in case of crashes)
             save_results(results, output_file)
         
         if skipped_count > 0:
-            print(f"\nSkipped {skipped_count} URLs (already processed)")
+            logger.info("Skipped %d URLs (already processed)", skipped_count)
         if merged_count > 0:
-            print(f"Merged {merged_count} URLs with existing domains")
+            logger.info("Merged %d URLs with existing domains", merged_count)
     
     finally:
         driver.quit()
     
     # Final summary
-    print("\n" + "="*60)
-    print("FINAL SUMMARY")
-    print("="*60)
-    print(f"Total URLs processed: {len(results)}")
+    logger.info("Total URLs processed: %d", len(results))
     
     urls_with_careers = sum(1 for r in results if r.get("career_pages"))
-    print(f"URLs with career pages found: {urls_with_careers}")
+    logger.info("URLs with career pages found: %d", urls_with_careers)
     
     # Count by powered_by system
     system_counts = {}
@@ -468,9 +476,8 @@ def main(crawl, portfolio, output_file, skip_existing_domains):
                 system_counts[system] = system_counts.get(system, 0) + 1
     
     if system_counts:
-        print("\nCareer pages by system:")
-        for system, count in sorted(system_counts.items(), key=lambda x: x[1], reverse=True):
-            print(f"  - {system}: {count}")
+        logger.info("Career pages by system: %s", ", ".join(
+            f"{system}: {count}" for system, count in sorted(system_counts.items(), key=lambda x: x[1], reverse=True)))
 
 if __name__ == "__main__":
     parser = ArgumentParser(formatter_class=ArgumentDefaultsHelpFormatter)
@@ -479,7 +486,11 @@ if __name__ == "__main__":
     parser.add_argument("-o", "--output", default="career_links.json", help="Output JSON file")
     parser.add_argument("--no-skip-domains", action="store_true", 
                         help="Process URLs even if their domain already exists in results (default: skip existing domains)")
+    add_profile_arguments(parser, "url")
+    add_log_arguments(parser)
     args = parser.parse_args()
+    setup_logging(args.log_level, args.log_format)
+    profiler = profiler_from_args(args)
     
     # If portfolio is True, crawl must also be True
     crawl = args.crawl
@@ -490,4 +501,8 @@ if __name__ == "__main__":
     # skip_existing_domains is True by default, False if --no-skip-domains is passed
     skip_existing_domains = not args.no_skip_domains
     
-    main(crawl, portfolio, args.output, skip_existing_domains)
\ No newline at end of file
+    with profiled(profiler if args.profile == "run" else None, "run"):
+        main(crawl, portfolio, args.output, skip_existing_domains,
+             profiler=profiler if args.profile == "url" else None)
+    if profiler:
+        profiler.summary()
\ No newline at end of file
@@ -1,7 +1,10 @@
-import requests
+import logging
 
+from modules import http_client, metrics
 from modules.base import JobSite
 
+logger = logging.getLogger(__name__)
+
 class ApiJobSite(JobSite):
     """Intermediate class for API-based sites."""
     def __init__(self, id, name, url, method="GET", payload=None, **kwargs):
@@ -11,17 +14,18 @@ class ApiJobSite(JobSite):
 
     def scrape(self):
         try:
-            print(f"Scraping API site {self.name} using {self.method}")
+            logger.debug("Scraping API site %s using %s", self.name, self.method)
             if self.method == "POST":
-                response = requests.post(self.url, json=self.payload)
+                response = http_client.post(self.url, json=self.payload)
             else:
-                response = requests.get(self.url, params=self.payload)
+                response = http_client.get(self.url, params=self.payload)
             
             response.raise_for_status()
             data = response.json()
             return data
         except Exception as e:
-            print(f"Error scraping API site {self.name}: {e}")
-            print(f"Response: {response.text if 'response' in locals() else 'No response'}")
+            metrics.record_error(e)
+            logger.error("Error scraping API site %s: %s", self.name, e)
+            logger.debug("Response: %s", response.text if 'response' in locals() else 'No response')
             return None
         
@@ -1,16 +1,22 @@
+import logging
+
 from modules.api.base import ApiJobSite
+from modules.job import Job
+from modules.salary import Salary, parse_salary, salary_range
 from pprint import pprint as pp
 
+logger = logging.getLogger(__name__)
+
 class ConsiderApiSite(ApiJobSite):
     def scrape(self):
-        print(f"Scraping Consider API site: {self.name}")
+        logger.info("Scraping Consider API site: %s", self.name)
         self.method = "POST"
         self.payload = {
             "meta": {"size": 1000},
             "board": {"id": self.id, "isParent": True},
             "query": {"promoteFeatured": True}
         }
-        print(self.payload)
+        logger.debug("Payload: %s", self.payload)
         data = super().scrape()
         if not data:
             return None
@@ -24,11 +30,11 @@ class ConsiderApiSite(ApiJobSite):
             hybrid = False
             salary = item.get("salary", {})
             if isinstance(salary, dict):
-                min_salary = salary.get("minValue")
-                max_salary = salary.get("maxValue")
-            else:
-                min_salary = None
-                max_salary = None
+                salary = salary_range(salary.get("minValue"), salary.get("maxValue"),
+                                      salary.get("period"), salary.get("currency"))
+            elif salary:
+                salary = parse_salary(str(salary))
+            salary = salary or Salary(None, None, None)
 
             location_city = None
             location_state = None
@@ -59,21 +65,22 @@ class ConsiderApiSite(ApiJobSite):
             if not hybrid and "hybrid" in item.get("title", "").lower():
                 hybrid = True
 
-            job = {
-                "site_id": self.id,
-                "source_url": self.url,
-                "job_id": item.get("jobId"),
-                "title": item.get("title"),
-                "company_name": item.get("companyName"),
-                "apply_url": item.get("applyUrl"),
-                "min_salary": min_salary,
-                "max_salary": max_salary,
-                "location_city": location_city,
-                "location_state": location_state,
-                "location_country": location_country,
-                "remote": remote,
-                "hybrid": hybrid,
-            }
+            job = Job(
+                site_id=self.id,
+                source_url=self.url,
+                job_id=item.get("jobId"),
+                title=item.get("title"),
+                company_name=item.get("companyName"),
+                apply_url=item.get("applyUrl"),
+                salary_min=salary.min,
+                salary_max=salary.max,
+                salary_currency=salary.currency,
+                location_city=location_city,
+                location_state=location_state,
+                location_country=location_country,
+                remote=remote,
+                hybrid=hybrid,
+            )
        
             jobs.append(job)
 
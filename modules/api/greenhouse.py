@@ -1,9 +1,15 @@
+import logging
+
 from modules.api.base import ApiJobSite
+from modules.job import Job
+from modules.salary import Salary, parse_salary, salary_range
 from pprint import pprint as pp
 
+logger = logging.getLogger(__name__)
+
 class GreenhouseApiSite(ApiJobSite):
     def scrape(self):
-        print(f"Scraping Greenhouse API site: {self.name}")
+        logger.info("Scraping Greenhouse API site: %s", self.name)
         self.method = "GET"
         data = super().scrape()
     
@@ -11,7 +17,7 @@ class GreenhouseApiSite(ApiJobSite):
             return None
         
         if 'jobs' not in data:
-            print(f"No jobs found for {self.name}.")
+            logger.warning("No jobs found for %s.", self.name)
             return None
         
         jobs = self.transform(data["jobs"])
@@ -25,11 +31,11 @@ class GreenhouseApiSite(ApiJobSite):
             hybrid = False
             salary = item.get("salary", {})
             if isinstance(salary, dict):
-                min_salary = salary.get("minValue")
-                max_salary = salary.get("maxValue")
-            else:
-                min_salary = None
-                max_salary = None
+                salary = salary_range(salary.get("minValue"), salary.get("maxValue"),
+                                      salary.get("period"), salary.get("currency"))
+            elif salary:
+                salary = parse_salary(str(salary))
+            salary = salary or Salary(None, None, None)
 
             location_city = None
             location_state = None
@@ -53,21 +59,22 @@ class GreenhouseApiSite(ApiJobSite):
                 pass
 
 
-            job = {
-                "site_id": self.id,
-                "source_url": self.url,
-                "job_id": item.get("internal_job_id"),
-                "title": item.get("title"),
-                "company_name": item.get("company_name"),
-                "apply_url": item.get("absolute_url"),
-                "min_salary": min_salary,
-                "max_salary": max_salary,
-                "location_city": location_city,
-                "location_state": location_state,
-                "location_country": location_country,
-                "remote": remote,
-                "hybrid": hybrid,
-            }
+            job = Job(
+                site_id=self.id,
+                source_url=self.url,
+                job_id=item.get("internal_job_id"),
+                title=item.get("title"),
+                company_name=item.get("company_name"),
+                apply_url=item.get("absolute_url"),
+                salary_min=salary.min,
+                salary_max=salary.max,
+                salary_currency=salary.currency,
+                location_city=location_city,
+                location_state=location_state,
+                location_country=location_country,
+                remote=remote,
+                hybrid=hybrid,
+            )
        
             jobs.append(job)
 
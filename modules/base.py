@@ -1,4 +1,10 @@
 import difflib
+import logging
+
+from modules.log import Sampled
+
+logger = logging.getLogger(__name__)
+_job_log = Sampled(logger)
 
 
 class JobSite:
@@ -21,10 +27,13 @@ class JobSite:
 
         if not self.position_check(job):
             return False
+
+        if not self.salary_check(job):
+            return False
         
         if not self.remote_check(job) and not self.location_check(job):
-            print(f"Job {job['title']} does not match remote or location criteria.")
-            print(f"Job location: {job.get('location_city', '')}, Remote: {job.get('remote', False)}")
+            _job_log.debug("Job %s does not match remote or location criteria (location: %s, remote: %s)",
+                           job["title"], job.get("location_city", ""), job.get("remote", False))
             return False
         
         return True
@@ -50,6 +59,17 @@ class JobSite:
         return False
     
 
+    def salary_check(self, job):
+        min_salary = self.app_config.get("min_salary")
+        if not min_salary:
+            return True
+
+        top = job.get("salary_max") or job.get("salary_min")
+        if top is None:
+            return True
+
+        return top >= min_salary
+
     def position_check(self, job):
         title = job.get("title", "").lower()
         positive_terms = self.app_config.get("positive_terms", [])
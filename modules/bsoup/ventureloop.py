@@ -1,30 +1,37 @@
+import logging
 import time 
-import requests
 from bs4 import BeautifulSoup
+from modules import http_client, metrics
 from modules.bsoup.base import BsoupJobSite
+from modules.job import Job
+from modules.log import Sampled
 from pprint import pprint as pp
 from urllib.parse import urlparse, parse_qs, urljoin
 
+logger = logging.getLogger(__name__)
+_job_log = Sampled(logger)
+
 class VentureLoopJobSite(BsoupJobSite):
 
     def scrape(self):
         
-        data = []
+        jobs = []
 
         # this avoids endless loops for unpredictable reason
 
         for page in range (0, 100):
             current_url = f"{self.url}/pagination.php?&p={page}"
             current_url = current_url.replace("//pagination","/pagination")
-            #print(f"Fetching page {page}: {current_url}")
+            logger.debug("Fetching page %d: %s", page, current_url)
 
             try:
-                response = requests.get(current_url)
+                response = http_client.get(current_url)
                 if response.status_code != 200:
-                    print(f"Failed to fetch page {page} with status code {response.status_code}")
+                    logger.warning("Failed to fetch page %d with status code %s", page, response.status_code)
                     break
             except Exception as e:
-                print(f"Exception occurred while fetching page {page}: {e}")
+                metrics.record_error(e)
+                logger.error("Exception occurred while fetching page %d: %s", page, e)
                 break
 
             soup = BeautifulSoup(response.text, "html.parser")
@@ -32,10 +39,10 @@ class VentureLoopJobSite(BsoupJobSite):
             # Find all job elements; adjust the class name if necessary.
             job_elements = soup.find_all(class_="jobs_row")
             if not job_elements:
-                #print("No job elements found; end of pagination.")
+                logger.debug("No job elements found; end of pagination.")
                 break
 
-            #print(f"Found {len(job_elements)} job elements on page {page}")
+            logger.debug("Found %d job elements on page %d", len(job_elements), page)
             for idx, elem in enumerate(job_elements):
                 try:
                     location = None
@@ -44,7 +51,7 @@ class VentureLoopJobSite(BsoupJobSite):
                     title_elem = elem.select_one("div.jobs_topRow > div.jobs_descriptionBx > div.job_text > h3")
                     title = title_elem.get_text(strip=True) if title_elem else None 
                     if not title:
-                        print(f"No title found for job element on page {page}, index {idx}. Skipping.")
+                        _job_log.debug("No title found for job element on page %d, index %d. Skipping.", page, idx)
                         continue
                     link_elem = elem.select_one("div.jobs_btnnRow > div.apply_btnbx > div > div > a")
                     link = link_elem["href"] if link_elem and link_elem.has_attr("href") else None
@@ -65,71 +72,57 @@ class VentureLoopJobSite(BsoupJobSite):
                         location = lines[0]
                     company = company.replace("-", "").strip() if company else None
 
-                    record = {
-                        "id": f"{page}-{idx}",
-                        "title": title,
-                        "company_name": company,
-                        "apply_url": link,
-                        "location": location,
-                        "remote": remote,
-                    }
-                    data.append(record)
-                    #pp(record)
+                    with metrics.stage("transform"):
+                        jobs.append(self.make_job(title=title, company_name=company, apply_url=link,
+                                                  location=location, remote=remote, job_id=f"{page}-{idx}"))
                 except Exception as e:
-                    print(f"Error parsing a job element on page {page}: {e}")
+                    metrics.record_error(e)
+                    logger.warning("Error parsing a job element on page %d: %s", page, e)
            
                 
-        jobs = self.transform(data)
         return jobs
     
-    def transform(self, data):
-        jobs = []
-        for item in data:
-          
-            location_city = None
-            location_state = None
-            location_country = None
-
-            try: 
-                if "," in  item['location']:
-                    # TODO - need to check against list of actual countries and or states to parse inconsistent location strings
-                    location_data = item['location'].split(",")
-                    location_country = location_data[-1].strip() if len(location_data) > 0 else None
-                    location_state = location_data[-2].strip() if len(location_data) > 2 else None
-                    location_city = location_data[0].strip() if len(location_data) > 1 else None
-                else:
-                    location_city = item['location']
-            except Exception as e:
-                print(f"Error parsing location data: {e}")
-                pass
+    def make_job(self, title, company_name, apply_url, location, remote=False, job_id=None):
+        """
+        Builds the Job for one posting from the text scraped off a results page. `job_id`
+        is only used when there is no apply link to take the job id from.
+        """
+        location_city = None
+        location_state = None
+        location_country = None
 
-            apply_url = item.get("apply_url", "")
-            if apply_url:
-                # Convert the relative URL to a full URL.
-                full_apply_url = urljoin(self.url, apply_url)
-                # Parse the URL to extract the job id from the query parameters.
-                parsed_url = urlparse(full_apply_url)
-                job_id = parse_qs(parsed_url.query).get("jobid", [None])[0]
+        try: 
+            if "," in location:
+                # TODO - need to check against list of actual countries and or states to parse inconsistent location strings
+                location_data = location.split(",")
+                location_country = location_data[-1].strip() if len(location_data) > 0 else None
+                location_state = location_data[-2].strip() if len(location_data) > 2 else None
+                location_city = location_data[0].strip() if len(location_data) > 1 else None
             else:
-                job_id = item.get("id", None)
-                full_apply_url = None
+                location_city = location
+        except Exception as e:
+            _job_log.debug("Error parsing location data: %s", e)
 
-            job = {
-                "site_id": self.id,
-                "source_url": self.url,
-                "job_id": job_id,
-                "title": item.get("title"),
-                "company_name": item.get("company_name"),
-                "apply_url": full_apply_url,
-                "min_salary": None,
-                "max_salary": None,
-                "location_city": location_city,
-                "location_state": location_state,
-                "location_country": location_country,
-                "remote": item.get("remote", False),
-                "hybrid": False,
-            }
-            #pp(job)
-            jobs.append(job)
+        full_apply_url = None
+        if apply_url:
+            # Convert the relative URL to a full URL.
+            full_apply_url = urljoin(self.url, apply_url)
+            # Parse the URL to extract the job id from the query parameters.
+            parsed_url = urlparse(full_apply_url)
+            job_id = parse_qs(parsed_url.query).get("jobid", [None])[0]
 
-        return jobs
\ No newline at end of file
+        return Job(
+            site_id=self.id,
+            source_url=self.url,
+            job_id=job_id,
+            title=title,
+            company_name=company_name,
+            apply_url=full_apply_url,
+            salary_min=None,
+            salary_max=None,
+            location_city=location_city,
+            location_state=location_state,
+            location_country=location_country,
+            remote=remote,
+            hybrid=False,
+        )
@@ -0,0 +1,55 @@
+import hashlib
+import re
+from urllib.parse import urlparse
+
+# Legal suffixes dropped from company names so "Acme, Inc." and "Acme" match.
+COMPANY_SUFFIXES = {"inc", "incorporated", "llc", "ltd", "limited", "corp", "corporation", "co", "gmbh", "plc", "sa"}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_text(text):
+    """Lower-cases and collapses everything that isn't a letter or digit into single spaces."""
+    return _NON_ALNUM.sub(" ", (text or "").lower()).strip()
+
+
+def normalize_company(name):
+    words = normalize_text(name).split()
+    while words and words[-1] in COMPANY_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def normalize_title(title):
+    return normalize_text(title)
+
+
+def normalize_url(url):
+    """Returns host/path of a URL without scheme, www., query, fragment or trailing slash."""
+    if not url:
+        return ""
+    parsed = urlparse(url if "://" in url else f"http://{url}")
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return f"{host}{parsed.path.rstrip('/')}".lower()
+
+
+def normalize_location(job):
+    return normalize_text(" ".join(job.get(field) or "" for field in ("location_city", "location_state", "location_country")))
+
+
+def job_fingerprint(job):
+    """
+    Canonical id for a job posting, shared by every board that lists it.
+    Built from the normalized company, title and apply URL. Apply URLs that
+    point back at the board the job was found on (e.g. Getro job pages) are
+    board-specific, so they are replaced by the job's location: the same
+    role in two cities stays two jobs, while boards listing it still match.
+    """
+    apply_url = normalize_url(job.get("apply_url"))
+    source_host = normalize_url(job.get("source_url")).split("/")[0]
+    if apply_url and source_host and apply_url.split("/")[0] == source_host:
+        apply_url = "@" + normalize_location(job)
+    key = "|".join([normalize_company(job.get("company_name")), normalize_title(job.get("title")), apply_url])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
@@ -2,111 +2,924 @@ import sqlite3
 import json
 import os
 import datetime
+import hashlib
+import logging
+import re
+import time
 from uuid import uuid4
+
+from modules.canonical import job_fingerprint
+from modules.job import as_job
+from modules.log import Sampled
+from modules.sites import create_site_tables, mark_scraped
+
+logger = logging.getLogger(__name__)
+_job_log = Sampled(logger)
+
 # Use environment variable for database name, or default to "jobs.db"
 DATABASE_NAME = os.environ.get("DATABASE_NAME", "jobs.db")
 
 def create_db():
-    """Creates the SQLite database and the 'jobs' table if it doesn't already exist."""
+    """
+    Creates the SQLite database and the job tables if they don't already exist.
+    Each real posting is stored once in 'canonical_jobs'; 'job_sightings' maps every
+    (site_key, job_id) a board lists it under to its canonical id. Boards are keyed by
+    site_key ("type:id", see site_key()) because boards of different types share ids.
+    """
     conn = sqlite3.connect(DATABASE_NAME)
     cursor = conn.cursor()
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS jobs (
+        CREATE TABLE IF NOT EXISTS canonical_jobs (
             id TEXT PRIMARY KEY,
-            site_id TEXT,
-            job_id TEXT,
             title TEXT,
             company_name TEXT,
             apply_url TEXT,
-            source_url TEXT,
             salary_min REAL,
             salary_max REAL,
+            salary_currency TEXT,
             location_city TEXT,
             location_state TEXT,
             location_country TEXT,
             remote BOOLEAN,
             hybrid BOOLEAN,
+            first_seen DATE,
             last_seen DATE,
-            status TEXT DEFAULT '',
-            UNIQUE(site_id, job_id)
+            closed_at DATE,
+            status TEXT DEFAULT ''
         )
     ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS job_sightings (
+            site_key TEXT,
+            job_id TEXT,
+            canonical_id TEXT,
+            source_url TEXT,
+            apply_url TEXT,
+            first_seen DATE,
+            last_seen DATE,
+            closed_at DATE,
+            PRIMARY KEY(site_key, job_id)
+        )
+    ''')
+    add_column(conn, "canonical_jobs", "closed_at", "DATE")
+    add_column(conn, "job_sightings", "closed_at", "DATE")
+    add_column(conn, "canonical_jobs", "salary_currency", "TEXT")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_job_sightings_canonical ON job_sightings(canonical_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_canonical_jobs_last_seen ON canonical_jobs(last_seen)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_canonical_jobs_closed_at ON canonical_jobs(closed_at)")
+    # Matches the SALARY_TOP expression so salary filters and ordering use an index range scan.
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_canonical_jobs_salary ON canonical_jobs({SALARY_INDEX})")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS db_meta (
+            key TEXT PRIMARY KEY,
+            value
+        )
+    ''')
+    create_run_tables(conn)
+    create_site_tables(conn)
+    renamed = rename_sighting_site_column(conn)
+    create_search_index(conn)
+    create_stats_tables(conn)
+    migrated = migrate_legacy_jobs(conn)
+    if renamed or migrated:
+        qualify_sighting_keys(conn)
     conn.commit()
     return conn
 
-def save_job(conn, job):
+# Location text indexed for search, built from the separate location columns.
+SEARCH_LOCATION_SQL = "TRIM(COALESCE(location_city, '') || ' ' || COALESCE(location_state, '') || ' ' || COALESCE(location_country, ''))"
+
+def mark_changed(cursor):
     """
-    Saves a single job record into the SQLite database.
-    Only adds a job if it doesn't already exist.
-    Selected fields are extracted from the job object, and the entire job is stored as JSON.
-    """
-    cursor = conn.cursor()
-
-    site_id = job.get("site_id")
-    job_id = job.get("job_id")
-    title = job.get("title")
-    company_name = job.get("company_name")
-    apply_url = job.get("apply_url")
-    source_url = job.get("source_url")
-    salary_min = job.get("salary_min")
-    salary_max = job.get("salary_max")
-    location_city = job.get("location_city")
-    location_state = job.get("location_state")
-    location_country = job.get("location_country")
-    remote = int(job.get("remote", False))
-    hybrid = int(job.get("hybrid", False))
-    last_seen = datetime.datetime.now().strftime("%Y-%m-%d")
+    Bumps the change counter read by the dashboard for ETags and cache invalidation.
+    Call it inside the transaction that changes job data, once per transaction.
+    """
+    cursor.execute('''
+        INSERT INTO db_meta (key, value) VALUES ('change_counter', 1)
+        ON CONFLICT(key) DO UPDATE SET value = value + 1
+    ''')
+    cursor.execute('''
+        INSERT INTO db_meta (key, value) VALUES ('changed_at', ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    ''', (time.time(),))
 
-    print(site_id, job_id, title, company_name, apply_url, source_url, salary_min, salary_max, location_city, location_state, location_country, remote, hybrid, last_seen, last_seen)
+def get_change_state(conn):
+    """Returns (change_counter, changed_at unix time) or (0, None) if nothing was ever saved."""
+    cursor = conn.cursor()
     try:
+        cursor.execute("SELECT key, value FROM db_meta WHERE key IN ('change_counter', 'changed_at')")
+    except sqlite3.OperationalError:
+        return 0, None
+    meta = dict(cursor.fetchall())
+    return meta.get("change_counter", 0), meta.get("changed_at")
+
+def create_search_index(conn):
+    """
+    Creates the FTS5 index over canonical job title, company and location.
+    The save path adds new canonical jobs to it and archiving removes them;
+    when the index is first created it is backfilled from canonical_jobs.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'jobs_fts'")
+    if cursor.fetchone():
+        return
+    cursor.execute('''
+        CREATE VIRTUAL TABLE jobs_fts USING fts5(
+            canonical_id UNINDEXED, title, company_name, location,
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )
+    ''')
+    cursor.execute(f'''
+        INSERT INTO jobs_fts (canonical_id, title, company_name, location)
+        SELECT id, title, company_name, {SEARCH_LOCATION_SQL} FROM canonical_jobs
+    ''')
+    conn.commit()
+
+# bm25 column weights for jobs_fts: canonical_id, title, company_name, location.
+SEARCH_WEIGHTS = (0.0, 10.0, 5.0, 1.0)
+
+_SEARCH_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+def fts_query(text):
+    """
+    Turns free text into an FTS5 query where every word must match as a prefix,
+    e.g. 'head prod' -> '"head"* "prod"*'. Returns None if there are no words.
+    """
+    tokens = _SEARCH_TOKEN.findall(text or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+# Top and bottom of a job's salary range; "up to" salaries only have a maximum.
+# Expressions are on canonical_jobs aliased as c; SALARY_INDEX is the same top without the alias.
+SALARY_TOP = "COALESCE(c.salary_max, c.salary_min)"
+SALARY_BOTTOM = "COALESCE(c.salary_min, c.salary_max)"
+SALARY_INDEX = "COALESCE(salary_max, salary_min)"
+
+def salary_filters(min_salary=None, max_salary=None):
+    """SQL conditions and params selecting canonical jobs whose salary range overlaps [min_salary, max_salary]."""
+    conditions = []
+    params = []
+    if min_salary is not None:
+        conditions.append(f"{SALARY_TOP} >= ?")
+        params.append(min_salary)
+    if max_salary is not None:
+        conditions.append(f"{SALARY_BOTTOM} <= ?")
+        params.append(max_salary)
+    return conditions, params
+
+def search_jobs(conn, text, limit=25, offset=0, include_closed=False, min_salary=None, max_salary=None):
+    """
+    Full-text searches canonical jobs, best matches first, optionally only those
+    paying within [min_salary, max_salary]. With a salary range but no search
+    text, every job in the range is listed, best paid first.
+    Returns (total_matches, rows) where rows are dicts of canonical job columns plus 'rank'.
+    """
+    query = fts_query(text)
+    conditions, params = salary_filters(min_salary, max_salary)
+    if not query and not conditions:
+        return 0, []
+    if not include_closed:
+        conditions.append("c.closed_at IS NULL")
+    if query:
+        source = "jobs_fts f JOIN canonical_jobs c ON c.id = f.canonical_id"
+        conditions.insert(0, "jobs_fts MATCH ?")
+        params.insert(0, query)
+        rank = f"bm25(jobs_fts, {', '.join(str(w) for w in SEARCH_WEIGHTS)})"
+        order = "rank"
+    else:
+        source = "canonical_jobs c"
+        rank = "NULL"
+        order = f"{SALARY_TOP} DESC"
+    where = " AND ".join(conditions)
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM {source} WHERE {where}", params)
+    total = cursor.fetchone()[0]
+    cursor.execute(f'''
+        SELECT c.id, c.title, c.company_name, c.apply_url, c.location_city, c.location_state,
+               c.location_country, c.remote, c.hybrid, c.salary_min, c.salary_max, c.salary_currency,
+               c.last_seen, c.closed_at, c.status, {rank} AS rank
+        FROM {source}
+        WHERE {where}
+        ORDER BY {order}
+        LIMIT ? OFFSET ?
+    ''', params + [limit, offset])
+    columns = [d[0] for d in cursor.description]
+    return total, [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+# Summary tables kept up to date by triggers, read by the dashboard instead of scanning jobs.
+STATS_TABLES = {
+    "stats_company": "company_name TEXT PRIMARY KEY, jobs INTEGER DEFAULT 0, open_jobs INTEGER DEFAULT 0",
+    "stats_status": "status TEXT PRIMARY KEY, jobs INTEGER DEFAULT 0, open_jobs INTEGER DEFAULT 0",
+    "stats_first_seen": "day DATE PRIMARY KEY, jobs INTEGER DEFAULT 0",
+    "stats_site": "site_key TEXT PRIMARY KEY, sightings INTEGER DEFAULT 0, open_sightings INTEGER DEFAULT 0",
+}
+
+def _stats_add(row, sign):
+    """Trigger statements adding (sign=1) or removing (sign=-1) a canonical job row ('new' or 'old') from the stats."""
+    op = "+" if sign > 0 else "-"
+    is_open = f"({row}.closed_at IS NULL)"
+    return f'''
+        INSERT INTO stats_company (company_name, jobs, open_jobs) VALUES (COALESCE({row}.company_name, ''), {sign}, {sign} * {is_open})
+        ON CONFLICT(company_name) DO UPDATE SET jobs = jobs {op} 1, open_jobs = open_jobs {op} {is_open};
+        INSERT INTO stats_status (status, jobs, open_jobs) VALUES (COALESCE({row}.status, ''), {sign}, {sign} * {is_open})
+        ON CONFLICT(status) DO UPDATE SET jobs = jobs {op} 1, open_jobs = open_jobs {op} {is_open};
+    '''
+
+def _sightings_add(row, sign):
+    op = "+" if sign > 0 else "-"
+    is_open = f"({row}.closed_at IS NULL)"
+    return f'''
+        INSERT INTO stats_site (site_key, sightings, open_sightings) VALUES (COALESCE({row}.site_key, ''), {sign}, {sign} * {is_open})
+        ON CONFLICT(site_key) DO UPDATE SET sightings = sightings {op} 1, open_sightings = open_sightings {op} {is_open};
+    '''
+
+def create_stats_tables(conn):
+    """
+    Creates the summary tables and the triggers that maintain them incrementally
+    on every insert, status/closed change and delete (including archiving).
+    Tables created for an existing database are backfilled once.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'stats_%'")
+    existing = {row[0] for row in cursor.fetchall()}
+    for table, columns in STATS_TABLES.items():
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns})")
+    cursor.executescript(f'''
+        CREATE TRIGGER IF NOT EXISTS stats_canonical_insert AFTER INSERT ON canonical_jobs BEGIN
+            {_stats_add("new", 1)}
+            INSERT INTO stats_first_seen (day, jobs) VALUES (new.first_seen, 1)
+            ON CONFLICT(day) DO UPDATE SET jobs = jobs + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS stats_canonical_update AFTER UPDATE OF status, closed_at, company_name ON canonical_jobs
+        WHEN old.status IS NOT new.status OR old.closed_at IS NOT new.closed_at OR old.company_name IS NOT new.company_name
+        BEGIN
+            {_stats_add("old", -1)}
+            {_stats_add("new", 1)}
+        END;
+        CREATE TRIGGER IF NOT EXISTS stats_canonical_delete AFTER DELETE ON canonical_jobs BEGIN
+            {_stats_add("old", -1)}
+            UPDATE stats_first_seen SET jobs = jobs - 1 WHERE day = old.first_seen;
+        END;
+        CREATE TRIGGER IF NOT EXISTS stats_sighting_insert AFTER INSERT ON job_sightings BEGIN
+            {_sightings_add("new", 1)}
+        END;
+        CREATE TRIGGER IF NOT EXISTS stats_sighting_update AFTER UPDATE OF closed_at, site_key ON job_sightings
+        WHEN old.closed_at IS NOT new.closed_at OR old.site_key IS NOT new.site_key
+        BEGIN
+            {_sightings_add("old", -1)}
+            {_sightings_add("new", 1)}
+        END;
+        CREATE TRIGGER IF NOT EXISTS stats_sighting_delete AFTER DELETE ON job_sightings BEGIN
+            {_sightings_add("old", -1)}
+        END;
+    ''')
+    if set(STATS_TABLES) - existing:
+        rebuild_stats(conn)
+    conn.commit()
+
+def rebuild_stats(conn):
+    """Recomputes every summary table from scratch with full scans (backfill or repair)."""
+    cursor = conn.cursor()
+    for table in STATS_TABLES:
+        cursor.execute(f"DELETE FROM {table}")
+    cursor.execute('''
+        INSERT INTO stats_company (company_name, jobs, open_jobs)
+        SELECT COALESCE(company_name, ''), COUNT(*), SUM(closed_at IS NULL) FROM canonical_jobs GROUP BY 1
+    ''')
+    cursor.execute('''
+        INSERT INTO stats_status (status, jobs, open_jobs)
+        SELECT COALESCE(status, ''), COUNT(*), SUM(closed_at IS NULL) FROM canonical_jobs GROUP BY 1
+    ''')
+    cursor.execute('''
+        INSERT INTO stats_first_seen (day, jobs) SELECT first_seen, COUNT(*) FROM canonical_jobs GROUP BY 1
+    ''')
+    cursor.execute('''
+        INSERT INTO stats_site (site_key, sightings, open_sightings)
+        SELECT COALESCE(site_key, ''), COUNT(*), SUM(closed_at IS NULL) FROM job_sightings GROUP BY 1
+    ''')
+    conn.commit()
+
+def get_stats(conn, since=None, top=20):
+    """
+    Dashboard counts read from the summary tables.
+    `since` (YYYY-MM-DD) adds how many jobs were first seen on or after that day.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT COALESCE(SUM(jobs), 0), COALESCE(SUM(open_jobs), 0) FROM stats_status")
+    jobs, open_jobs = cursor.fetchone()
+    cursor.execute("SELECT status, jobs, open_jobs FROM stats_status WHERE jobs > 0 ORDER BY status")
+    by_status = {row[0]: {"jobs": row[1], "open_jobs": row[2]} for row in cursor.fetchall()}
+    cursor.execute('''
+        SELECT company_name, jobs, open_jobs FROM stats_company WHERE open_jobs > 0
+        ORDER BY open_jobs DESC, company_name LIMIT ?
+    ''', (top,))
+    by_company = [{"company_name": row[0], "jobs": row[1], "open_jobs": row[2]} for row in cursor.fetchall()]
+    cursor.execute('''
+        SELECT site_key, sightings, open_sightings FROM stats_site WHERE open_sightings > 0
+        ORDER BY open_sightings DESC, site_key LIMIT ?
+    ''', (top,))
+    by_site = [{"site_key": row[0], "sightings": row[1], "open_sightings": row[2]} for row in cursor.fetchall()]
+    stats = {
+        "jobs": jobs,
+        "open_jobs": open_jobs,
+        "by_status": by_status,
+        "by_company": by_company,
+        "by_site": by_site,
+    }
+    if since:
+        cursor.execute("SELECT COALESCE(SUM(jobs), 0) FROM stats_first_seen WHERE day >= ?", (since,))
+        stats["new_since"] = cursor.fetchone()[0]
+    return stats
+
+def migrate_legacy_jobs(conn):
+    """
+    Copies rows from the old per-board 'jobs' table into canonical_jobs/job_sightings.
+    Statuses set in the dashboard are carried over to the canonical job. Once every row
+    is found in job_sightings the old table is renamed to 'jobs_legacy' rather than
+    dropped; if any is missing nothing is committed and the migration runs again next start.
+    Sightings keep the legacy bare site_id until qualify_sighting_keys() runs.
+    Returns True if the table was migrated.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'jobs'")
+    if not cursor.fetchone():
+        return False
+    # Only the migration itself should be rolled back if it comes up short.
+    conn.commit()
+    cursor.execute('''
+        SELECT site_id, job_id, title, company_name, apply_url, source_url, salary_min, salary_max,
+               location_city, location_state, location_country, remote, hybrid, last_seen, status
+        FROM jobs ORDER BY last_seen
+    ''')
+    columns = [d[0] for d in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    logger.info("Migrating %d jobs to canonical_jobs", len(rows))
+    for job in rows:
+        _save_job(cursor, job, job["last_seen"], job["site_id"])
+        if job["status"]:
+            cursor.execute("UPDATE canonical_jobs SET status = ? WHERE id = ?", (job["status"], job_fingerprint(job)))
+    cursor.execute('''
+        SELECT COUNT(*) FROM jobs
+        WHERE NOT EXISTS (SELECT 1 FROM job_sightings s WHERE s.site_key IS jobs.site_id AND s.job_id IS jobs.job_id)
+    ''')
+    missing = cursor.fetchone()[0]
+    if missing:
+        conn.rollback()
+        logger.error("%d legacy jobs were not copied to job_sightings; keeping the 'jobs' table as it is", missing)
+        return False
+    backup, suffix = "jobs_legacy", 1
+    while cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (backup,)).fetchone():
+        suffix += 1
+        backup = f"jobs_legacy_{suffix}"
+    cursor.execute(f"ALTER TABLE jobs RENAME TO {backup}")
+    logger.info("Migrated legacy jobs; the old table is kept as '%s'", backup)
+    mark_changed(cursor)
+    conn.commit()
+    return True
+
+def rename_sighting_site_column(conn):
+    """
+    Renames the site_id column of job_sightings (and its archive), which held a board's
+    bare id, to site_key in databases created before sightings were keyed by site_key.
+    The sighting triggers and stats_site are dropped so create_stats_tables() recreates
+    and refills them. Returns True if the column was renamed.
+    """
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA table_info(job_sightings)")
+    if "site_id" not in {row[1] for row in cursor.fetchall()}:
+        return False
+    for trigger in ("stats_sighting_insert", "stats_sighting_update", "stats_sighting_delete"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    cursor.execute("DROP TABLE IF EXISTS stats_site")
+    cursor.execute("ALTER TABLE job_sightings RENAME COLUMN site_id TO site_key")
+    cursor.execute("PRAGMA table_info(job_sightings_archive)")
+    if "site_id" in {row[1] for row in cursor.fetchall()}:
+        cursor.execute("ALTER TABLE job_sightings_archive RENAME COLUMN site_id TO site_key")
+    conn.commit()
+    return True
+
+def qualify_sighting_keys(conn, today=None):
+    """
+    Rewrites sightings (archived ones too) still keyed by a bare site id to their board's
+    site_key, taking the type from board_history and the site registry when only one
+    board has that id.
+    Sightings whose board can't be told apart are closed, along with canonical jobs left
+    without an open sighting; the next scrape of their board lists them again.
+    """
+    today = today or datetime.datetime.now().strftime("%Y-%m-%d")
+    cursor = conn.cursor()
+    keys_by_id = {}
+    for (key,) in cursor.execute("SELECT site_key FROM board_history UNION SELECT site_key FROM sites").fetchall():
+        keys_by_id.setdefault(key.split(":", 1)[-1], set()).add(key)
+    renames = [(keys.pop(), site_id) for site_id, keys in keys_by_id.items() if len(keys) == 1]
+    cursor.executemany("UPDATE job_sightings SET site_key = ? WHERE site_key = ?", renames)
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'job_sightings_archive'")
+    if cursor.fetchone():
+        cursor.executemany("UPDATE job_sightings_archive SET site_key = ? WHERE site_key = ?", renames)
+    cursor.execute('''
+        UPDATE job_sightings SET closed_at = ?
+        WHERE closed_at IS NULL AND (site_key IS NULL OR INSTR(site_key, ':') = 0)
+    ''', (today,))
+    closed = cursor.rowcount
+    if closed:
+        logger.warning("Closed %d sightings whose board type is unknown; they reopen when their board is scraped", closed)
         cursor.execute('''
-            INSERT INTO jobs 
-            (id, site_id, job_id, title, company_name, apply_url, source_url, salary_min, salary_max, location_city, location_state, location_country, remote, hybrid, last_seen)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) 
-            ON CONFLICT(site_id, job_id) DO UPDATE SET last_seen = ?
-        ''',(str(uuid4()), site_id, job_id, title, company_name, apply_url, source_url, salary_min, salary_max, location_city, location_state, location_country, remote, hybrid, last_seen, last_seen))
+            UPDATE canonical_jobs SET closed_at = ?
+            WHERE closed_at IS NULL
+              AND NOT EXISTS (SELECT 1 FROM job_sightings s WHERE s.canonical_id = canonical_jobs.id AND s.closed_at IS NULL)
+        ''', (today,))
+    mark_changed(cursor)
+    conn.commit()
+
+def create_run_tables(conn):
+    """Creates the tables used to checkpoint search.py runs so they can be resumed."""
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS runs (
+            id TEXT PRIMARY KEY,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP,
+            status TEXT DEFAULT 'running'
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS run_sites (
+            run_id TEXT,
+            site_key TEXT,
+            site_type TEXT,
+            site_id TEXT,
+            site_name TEXT,
+            status TEXT DEFAULT 'pending',
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP,
+            jobs_found INTEGER,
+            jobs_saved INTEGER,
+            error TEXT,
+            PRIMARY KEY(run_id, site_key)
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_run_sites_status ON run_sites(run_id, status)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS board_history (
+            site_key TEXT PRIMARY KEY,
+            last_scraped TIMESTAMP,
+            last_changed TIMESTAMP,
+            jobs_hash TEXT,
+            jobs_found INTEGER DEFAULT 0,
+            jobs_matched INTEGER DEFAULT 0,
+            avg_duration REAL DEFAULT 0,
+            failure_rate REAL DEFAULT 0,
+            attempts INTEGER DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scrape_metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT,
+            site_key TEXT,
+            started_at TIMESTAMP,
+            duration REAL,
+            status TEXT,
+            fetch_seconds REAL,
+            parse_seconds REAL,
+            transform_seconds REAL,
+            filter_seconds REAL,
+            save_seconds REAL,
+            requests INTEGER,
+            bytes INTEGER,
+            jobs INTEGER,
+            matching INTEGER,
+            errors TEXT
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_scrape_metrics_site ON scrape_metrics(site_key, started_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_scrape_metrics_run ON scrape_metrics(run_id)")
+
+def save_scrape_metrics(conn, metrics):
+    """Stores one site's ScrapeMetrics (see modules/metrics.py)."""
+    data = metrics.to_dict()
+    stages = data["stages"]
+    conn.execute('''
+        INSERT INTO scrape_metrics (run_id, site_key, started_at, duration, status, fetch_seconds, parse_seconds,
+            transform_seconds, filter_seconds, save_seconds, requests, bytes, jobs, matching, errors)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (data["run_id"], data["site_key"],
+          datetime.datetime.fromtimestamp(data["started_at"]).strftime("%Y-%m-%d %H:%M:%S"),
+          data["duration"], data["status"], stages["fetch"], stages["parse"], stages["transform"],
+          stages["filter"], stages["save"], data["requests"], data["bytes"], data["jobs"], data["matching"],
+          json.dumps(data["errors"])))
+    conn.commit()
+
+def _restore_archived(cursor, canonical_id):
+    """
+    Brings an archived job back when it is listed again: its status is restored on the
+    new canonical row and its archived sightings return to job_sightings, still closed.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'canonical_jobs_archive'")
+    if not cursor.fetchone():
+        return
+    cursor.execute("SELECT status FROM canonical_jobs_archive WHERE id = ? ORDER BY rowid DESC LIMIT 1", (canonical_id,))
+    row = cursor.fetchone()
+    if not row:
+        return
+    cursor.execute("UPDATE canonical_jobs SET status = ? WHERE id = ?", (row[0], canonical_id))
+    cursor.execute("PRAGMA table_info(job_sightings)")
+    columns = ", ".join(info[1] for info in cursor.fetchall())
+    cursor.execute(f'''
+        INSERT OR IGNORE INTO job_sightings ({columns})
+        SELECT {columns} FROM job_sightings_archive WHERE canonical_id = ?
+    ''', (canonical_id,))
+    cursor.execute("DELETE FROM job_sightings_archive WHERE canonical_id = ?", (canonical_id,))
+    cursor.execute("DELETE FROM canonical_jobs_archive WHERE id = ?", (canonical_id,))
+
+def _save_job(cursor, job, last_seen, key):
+    """Upserts the canonical job and its sighting on the board `key`. Returns the canonical id."""
+    job = as_job(job)
+    canonical_id = job_fingerprint(job)
+    cursor.execute("SELECT 1 FROM canonical_jobs WHERE id = ?", (canonical_id,))
+    is_new = cursor.fetchone() is None
+    (site_id, source_url, job_id, title, company_name, apply_url, salary_min, salary_max, salary_currency,
+     location_city, location_state, location_country, remote, hybrid) = job.values()
+    remote = int(remote or False)
+    hybrid = int(hybrid or False)
+
+    _job_log.debug("Saving job %s (%s) from %s: %s at %s", job_id, canonical_id, key, title, company_name)
+    cursor.execute('''
+        INSERT INTO canonical_jobs
+        (id, title, company_name, apply_url, salary_min, salary_max, salary_currency, location_city, location_state, location_country, remote, hybrid, first_seen, last_seen)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET last_seen = MAX(last_seen, excluded.last_seen), closed_at = NULL,
+            salary_min = COALESCE(excluded.salary_min, salary_min),
+            salary_max = COALESCE(excluded.salary_max, salary_max),
+            salary_currency = COALESCE(excluded.salary_currency, salary_currency)
+    ''', (canonical_id, title, company_name, apply_url, salary_min, salary_max, salary_currency, location_city, location_state, location_country, remote, hybrid, last_seen, last_seen))
+    previous_id = None
+    if is_new:
+        _restore_archived(cursor, canonical_id)
+        # A sighting moving to a new canonical id (the fingerprint changed) keeps its status.
+        cursor.execute("SELECT canonical_id FROM job_sightings WHERE site_key = ? AND job_id = ?", (key, job_id))
+        row = cursor.fetchone()
+        if row and row[0] != canonical_id:
+            previous_id = row[0]
+            cursor.execute("UPDATE canonical_jobs SET status = (SELECT status FROM canonical_jobs WHERE id = ?) WHERE id = ?",
+                           (previous_id, canonical_id))
+    cursor.execute('''
+        INSERT INTO job_sightings (site_key, job_id, canonical_id, source_url, apply_url, first_seen, last_seen)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(site_key, job_id) DO UPDATE SET
+            last_seen = excluded.last_seen, canonical_id = excluded.canonical_id, closed_at = NULL
+    ''', (key, job_id, canonical_id, source_url, apply_url, last_seen, last_seen))
+    if previous_id:
+        cursor.execute('''
+            UPDATE canonical_jobs SET closed_at = ? WHERE id = ? AND closed_at IS NULL
+              AND NOT EXISTS (SELECT 1 FROM job_sightings s WHERE s.canonical_id = canonical_jobs.id AND s.closed_at IS NULL)
+        ''', (last_seen, previous_id))
+    if is_new:
+        location = " ".join(part for part in (location_city, location_state, location_country) if part)
+        cursor.execute("INSERT INTO jobs_fts (canonical_id, title, company_name, location) VALUES (?, ?, ?, ?)",
+                       (canonical_id, title, company_name, location))
+    return canonical_id
+
+def save_job(conn, job, key=None):
+    """
+    Saves a single job record into the SQLite database.
+    The job is stored once per real posting (see modules/canonical.py) and
+    every board listing it is recorded as a sighting under the board's site key
+    (`key`, see site_key()), or under the job's site_id when no key is given.
+    """
+    cursor = conn.cursor()
+    last_seen = datetime.datetime.now().strftime("%Y-%m-%d")
+    try:
+        _save_job(cursor, job, last_seen, key or job.get("site_id"))
+        mark_changed(cursor)
         conn.commit()
-        if cursor.rowcount > 0:
-            print(f"Saved job: {job_id} - {title}")
-        else:
-            print(f"Job {job_id} - {title} already exists. Skipping.")
+        logger.debug("Saved job: %s - %s", job.get("job_id"), job.get("title"))
     except Exception as e:
-        print(f"Error saving job {job_id}: {e}")
+        conn.rollback()
+        logger.warning("Error saving job %s: %s", job.get("job_id"), e)
 
-def update_job(conn, job, scrape_batch):
-    # updates date for job
+def save_jobs(conn, jobs, key=None):
+    """
+    Saves a batch of job records (e.g. everything matched on one board) in a single transaction.
+    Sightings are recorded under `key` as in save_job().
+    """
     cursor = conn.cursor()
-    job_id = job.get("jobId")
     last_seen = datetime.datetime.now().strftime("%Y-%m-%d")
+    saved = 0
+    for job in jobs:
+        try:
+            _save_job(cursor, job, last_seen, key or job.get("site_id"))
+            saved += 1
+        except Exception as e:
+            logger.warning("Error saving job %s: %s", job.get("job_id"), e)
+    if saved:
+        mark_changed(cursor)
+    conn.commit()
+    logger.info("Saved %d jobs", saved)
+    return saved
+
+def update_statuses(conn, updates):
+    """
+    Applies many dashboard status changes in one transaction.
+    Each update is a dict with 'job_id' (a canonical id, or a board's job id when
+    the board's 'site_key' is given) and 'status'. Returns the number of canonical jobs updated.
+    """
+    by_canonical = [(u["status"], u["job_id"]) for u in updates if u.get("site_key") is None]
+    by_sighting = [(u["status"], u["site_key"], u["job_id"]) for u in updates if u.get("site_key") is not None]
+    cursor = conn.cursor()
+    updated = 0
     try:
-        cursor.execute('''
-            UPDATE jobs 
-            SET last_seen = ?
-            WHERE job_id = ?
-        ''', (scrape_batch, job_id))
+        if by_canonical:
+            cursor.executemany("UPDATE canonical_jobs SET status = ? WHERE id = ?", by_canonical)
+            updated += cursor.rowcount
+        if by_sighting:
+            cursor.executemany('''
+                UPDATE canonical_jobs SET status = ?
+                WHERE id = (SELECT canonical_id FROM job_sightings WHERE site_key = ? AND job_id = ?)
+            ''', by_sighting)
+            updated += cursor.rowcount
+        mark_changed(cursor)
         conn.commit()
-        if cursor.rowcount > 0:
-            print(f"Updated job: {job_id}")
-        else:
-            print(f"Job {job_id} not found for update. Skipping.")
-    except Exception as e:
-        print(f"Error updating job {job_id}: {e}")
+    except Exception:
+        conn.rollback()
+        raise
+    return updated
 
+# Filters accepted by update_status_where(), mapped to their SQL condition on canonical_jobs.
+STATUS_FILTERS = {
+    "company_name": "company_name = ? COLLATE NOCASE",
+    "site_key": "id IN (SELECT canonical_id FROM job_sightings WHERE site_key = ?)",
+    "title_contains": "title LIKE '%' || ? || '%'",
+    "current_status": "status = ?",
+}
 
-def update_table(conn):
+def update_status_where(conn, status, **filters):
     """
-    Updates the 'jobs' table to add a new column if it doesn't already exist.
-    This is useful for adding new fields to the job records without losing existing data.
+    Sets the status of every open canonical job matching all given filters
+    (see STATUS_FILTERS), e.g. company_name="Acme" to mark a whole company.
+    At least one filter is required. Returns the number of jobs updated.
     """
+    filters = {name: value for name, value in filters.items() if value is not None}
+    unknown = set(filters) - set(STATUS_FILTERS)
+    if unknown:
+        raise ValueError(f"Unknown status filters: {', '.join(sorted(unknown))}")
+    if not filters:
+        raise ValueError("At least one filter is required for a bulk status update")
+    conditions = " AND ".join(STATUS_FILTERS[name] for name in filters)
     cursor = conn.cursor()
     try:
+        cursor.execute(f"UPDATE canonical_jobs SET status = ? WHERE closed_at IS NULL AND {conditions}",
+                       (status, *filters.values()))
+        updated = cursor.rowcount
+        mark_changed(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return updated
+
+def reconcile_board(conn, key, job_ids, today=None):
+    """
+    Brings the sightings of the board `key` (its site key, see site_key()) in line with
+    its latest scrape in a few set-based statements.
+    Every id in `job_ids` (all jobs listed on the board, matching or not) gets last_seen bumped;
+    open sightings not in the set are closed, and canonical jobs left with no open sighting
+    are closed too. Canonical jobs with a sighting listed again are reopened.
+    Returns the number of sightings closed.
+    """
+    today = today or datetime.datetime.now().strftime("%Y-%m-%d")
+    cursor = conn.cursor()
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS seen_job_ids (job_id TEXT PRIMARY KEY)")
+    cursor.execute("DELETE FROM temp.seen_job_ids")
+    cursor.executemany("INSERT OR IGNORE INTO temp.seen_job_ids (job_id) VALUES (?)",
+                       [(str(job_id),) for job_id in job_ids if job_id is not None])
+    cursor.execute('''
+        UPDATE job_sightings SET last_seen = ?, closed_at = NULL
+        WHERE site_key = ? AND job_id IN (SELECT job_id FROM temp.seen_job_ids)
+    ''', (today, key))
+    # A job listed again reopens even if it no longer passes the filters (and so isn't re-saved).
+    cursor.execute('''
+        UPDATE canonical_jobs SET closed_at = NULL
+        WHERE closed_at IS NOT NULL AND id IN (
+            SELECT canonical_id FROM job_sightings WHERE site_key = ? AND job_id IN (SELECT job_id FROM temp.seen_job_ids)
+        )
+    ''', (key,))
+    cursor.execute('''
+        UPDATE job_sightings SET closed_at = ?
+        WHERE site_key = ? AND closed_at IS NULL AND job_id NOT IN (SELECT job_id FROM temp.seen_job_ids)
+    ''', (today, key))
+    closed = cursor.rowcount
+    if closed:
         cursor.execute('''
-            ALTER TABLE jobs ADD COLUMN status TEXT DEFAULT ''
-        ''')
+            UPDATE canonical_jobs SET closed_at = ?
+            WHERE closed_at IS NULL
+              AND id IN (SELECT canonical_id FROM job_sightings WHERE site_key = ? AND closed_at = ?)
+              AND NOT EXISTS (
+                  SELECT 1 FROM job_sightings s WHERE s.canonical_id = canonical_jobs.id AND s.closed_at IS NULL
+              )
+        ''', (today, key, today))
+    cursor.execute("DELETE FROM temp.seen_job_ids")
+    mark_changed(cursor)
+    conn.commit()
+    return closed
+
+def _ensure_archive_table(cursor, table):
+    """Creates <table>_archive with the same columns, adding any columns added to <table> since."""
+    archive = f"{table}_archive"
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {archive} AS SELECT * FROM {table} WHERE 0")
+    cursor.execute(f"PRAGMA table_info({table})")
+    columns = [(row[1], row[2]) for row in cursor.fetchall()]
+    cursor.execute(f"PRAGMA table_info({archive})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, column_type in columns:
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {archive} ADD COLUMN {name} {column_type}")
+    return [name for name, _ in columns]
+
+def archive_closed_jobs(conn, older_than_days=30):
+    """
+    Moves canonical jobs closed more than `older_than_days` ago, and their sightings,
+    into cold *_archive tables so the hot tables only hold live postings.
+    Returns the number of canonical jobs archived.
+    """
+    cutoff = (datetime.datetime.now() - datetime.timedelta(days=older_than_days)).strftime("%Y-%m-%d")
+    cursor = conn.cursor()
+    try:
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS archive_ids (id TEXT PRIMARY KEY)")
+        cursor.execute("DELETE FROM temp.archive_ids")
+        cursor.execute("INSERT INTO temp.archive_ids SELECT id FROM canonical_jobs WHERE closed_at < ?", (cutoff,))
+        archived = cursor.rowcount
+        if archived:
+            for table, key in (("canonical_jobs", "id"), ("job_sightings", "canonical_id")):
+                columns = ", ".join(_ensure_archive_table(cursor, table))
+                cursor.execute(f'''
+                    INSERT INTO {table}_archive ({columns})
+                    SELECT {columns} FROM {table} WHERE {key} IN (SELECT id FROM temp.archive_ids)
+                ''')
+                cursor.execute(f"DELETE FROM {table} WHERE {key} IN (SELECT id FROM temp.archive_ids)")
+            cursor.execute("DELETE FROM jobs_fts WHERE canonical_id IN (SELECT id FROM temp.archive_ids)")
+            mark_changed(cursor)
+        cursor.execute("DELETE FROM temp.archive_ids")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    if archived:
+        logger.info("Archived %d jobs closed before %s", archived, cutoff)
+    return archived
+
+def add_column(conn, table, column, definition):
+    """
+    Adds a column to an existing table if it doesn't already exist.
+    This is useful for adding new fields to the job records without losing existing data.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
         conn.commit()
-        print("Table updated successfully.")
     except sqlite3.OperationalError as e:
-        if "duplicate column name" in str(e):
-            print("Column already exists. No changes made.")
-        else:
-            print(f"Error updating table: {e}")
\ No newline at end of file
+        if "duplicate column name" not in str(e):
+            raise
+
+def site_key(site_config):
+    """Stable key identifying a site config across runs."""
+    return f"{site_config.get('type')}:{site_config.get('id')}"
+
+def _now():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def start_run(conn, site_configs):
+    """Registers a new run with every site marked pending and returns its id."""
+    run_id = str(uuid4())
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO runs (id, started_at, status) VALUES (?, ?, 'running')", (run_id, _now()))
+    cursor.executemany('''
+        INSERT OR IGNORE INTO run_sites (run_id, site_key, site_type, site_id, site_name)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [(run_id, site_key(c), c.get("type"), c.get("id"), c.get("name")) for c in site_configs])
+    conn.commit()
+    return run_id
+
+def latest_unfinished_run(conn):
+    """Returns the id of the most recently started run that did not complete, or None."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM runs WHERE status != 'finished' ORDER BY started_at DESC LIMIT 1")
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def get_run_site_keys(conn, run_id, statuses):
+    """Returns the site keys of a run whose status is one of `statuses`."""
+    cursor = conn.cursor()
+    placeholders = ",".join("?" for _ in statuses)
+    cursor.execute(f"SELECT site_key FROM run_sites WHERE run_id = ? AND status IN ({placeholders})",
+                   (run_id, *statuses))
+    return {row[0] for row in cursor.fetchall()}
+
+def reopen_run(conn, run_id, retry_failed=False):
+    """
+    Prepares an existing run to be resumed.
+    Sites left 'running' by a crash go back to pending; failed sites too if retry_failed is set.
+    """
+    statuses = ("running", "failed") if retry_failed else ("running",)
+    placeholders = ",".join("?" for _ in statuses)
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        UPDATE run_sites SET status = 'pending', started_at = NULL, finished_at = NULL, error = NULL
+        WHERE run_id = ? AND status IN ({placeholders})
+    ''', (run_id, *statuses))
+    cursor.execute("UPDATE runs SET status = 'running', finished_at = NULL WHERE id = ?", (run_id,))
+    conn.commit()
+
+def mark_site_started(conn, run_id, key):
+    conn.execute('''
+        UPDATE run_sites SET status = 'running', started_at = ? WHERE run_id = ? AND site_key = ?
+    ''', (_now(), run_id, key))
+    conn.commit()
+
+def mark_site_finished(conn, run_id, key, jobs_found, jobs_saved):
+    conn.execute('''
+        UPDATE run_sites SET status = 'done', finished_at = ?, jobs_found = ?, jobs_saved = ?
+        WHERE run_id = ? AND site_key = ?
+    ''', (_now(), jobs_found, jobs_saved, run_id, key))
+    conn.commit()
+
+def mark_site_failed(conn, run_id, key, error):
+    conn.execute('''
+        UPDATE run_sites SET status = 'failed', finished_at = ?, error = ? WHERE run_id = ? AND site_key = ?
+    ''', (_now(), error, run_id, key))
+    conn.commit()
+
+def finish_run(conn, run_id):
+    """Marks the run finished, or 'incomplete' if any site failed or never ran."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM run_sites WHERE run_id = ? AND status != 'done'", (run_id,))
+    remaining = cursor.fetchone()[0]
+    status = "finished" if remaining == 0 else "incomplete"
+    cursor.execute("UPDATE runs SET status = ?, finished_at = ? WHERE id = ?", (status, _now(), run_id))
+    conn.commit()
+    return status
+
+
+# Weight given to the latest scrape when updating moving averages in board_history.
+HISTORY_ALPHA = 0.3
+
+BOARD_HISTORY_COLUMNS = ["site_key", "last_scraped", "last_changed", "jobs_hash", "jobs_found",
+                         "jobs_matched", "avg_duration", "failure_rate", "attempts"]
+
+def get_board_history(conn):
+    """Returns board_history rows as dicts keyed by site_key."""
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {', '.join(BOARD_HISTORY_COLUMNS)} FROM board_history")
+    return {row[0]: dict(zip(BOARD_HISTORY_COLUMNS, row)) for row in cursor.fetchall()}
+
+def record_board_result(conn, key, duration, job_ids=None, matched=0, failed=False):
+    """
+    Updates the scrape history of a board after an attempt.
+    last_changed only moves when the set of job ids differs from the previous scrape.
+    """
+    now = _now()
+    previous = get_board_history_row(conn, key)
+    attempts = (previous["attempts"] if previous else 0) + 1
+    prev_failure = previous["failure_rate"] if previous else 0.0
+    prev_duration = previous["avg_duration"] if previous else 0.0
+    failure_rate = HISTORY_ALPHA * (1.0 if failed else 0.0) + (1 - HISTORY_ALPHA) * prev_failure
+    avg_duration = duration if not prev_duration else HISTORY_ALPHA * duration + (1 - HISTORY_ALPHA) * prev_duration
+
+    if failed:
+        values = dict(previous or {}, last_scraped=now, failure_rate=failure_rate,
+                      avg_duration=avg_duration, attempts=attempts)
+    else:
+        jobs_hash = hashlib.sha1("\n".join(sorted(str(i) for i in job_ids or [])).encode()).hexdigest()
+        changed = not previous or previous["jobs_hash"] != jobs_hash
+        values = {
+            "last_scraped": now,
+            "last_changed": now if changed else previous["last_changed"],
+            "jobs_hash": jobs_hash,
+            "jobs_found": len(job_ids or []),
+            "jobs_matched": matched,
+            "avg_duration": avg_duration,
+            "failure_rate": failure_rate,
+            "attempts": attempts,
+        }
+
+    conn.execute('''
+        INSERT INTO board_history
+        (site_key, last_scraped, last_changed, jobs_hash, jobs_found, jobs_matched, avg_duration, failure_rate, attempts)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(site_key) DO UPDATE SET
+            last_scraped = excluded.last_scraped, last_changed = excluded.last_changed,
+            jobs_hash = excluded.jobs_hash, jobs_found = excluded.jobs_found,
+            jobs_matched = excluded.jobs_matched, avg_duration = excluded.avg_duration,
+            failure_rate = excluded.failure_rate, attempts = excluded.attempts
+    ''', (key, values["last_scraped"], values.get("last_changed"), values.get("jobs_hash"),
+          values.get("jobs_found", 0), values.get("jobs_matched", 0), values["avg_duration"],
+          values["failure_rate"], values["attempts"]))
+    mark_scraped(conn, key, now, "failed" if failed else "ok")
+    conn.commit()
+
+def get_board_history_row(conn, key):
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {', '.join(BOARD_HISTORY_COLUMNS)} FROM board_history WHERE site_key = ?", (key,))
+    row = cursor.fetchone()
+    return dict(zip(BOARD_HISTORY_COLUMNS, row)) if row else None
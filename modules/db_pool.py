@@ -0,0 +1,113 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Compiled statements kept per connection. sqlite3 reuses a prepared statement
+# whenever the same SQL string runs again on a connection, so long-lived
+# connections with constant query strings skip re-parsing on every request.
+CACHED_STATEMENTS = 256
+
+# Borrowed connections kept open for reuse once returned.
+MAX_IDLE_BORROWED = 4
+
+
+class ConnectionPool:
+    """
+    SQLite connections for a multi-threaded server.
+    Each thread gets its own long-lived read connection, and all writes go
+    through one writer connection guarded by a lock, since SQLite allows a
+    single writer at a time anyway. WAL mode lets readers run while a write
+    (or a scrape in another process) is in progress; databases shared between
+    hosts need another `journal_mode` (see modules/workqueue.py).
+    """
+    def __init__(self, database, busy_timeout=5000, journal_mode="WAL"):
+        self.database = database
+        self.busy_timeout = busy_timeout
+        self.journal_mode = journal_mode
+        self.local = threading.local()
+        self.readers = []
+        self.readers_lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.writer = None
+        # Number and total seconds (lock wait included) of write() blocks, for monitoring.
+        self.writes = 0
+        self.write_seconds = 0.0
+        self.idle = []
+        self.idle_lock = threading.Lock()
+
+    def _connect(self):
+        # Connections are only ever used by the thread that owns them (or under
+        # write_lock); check_same_thread is off so close() can run at shutdown.
+        conn = sqlite3.connect(self.database, check_same_thread=False, cached_statements=CACHED_STATEMENTS)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout)}")
+        conn.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        return conn
+
+    def reader(self):
+        """Returns this thread's read-only connection, opening it on first use."""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            conn.execute("PRAGMA query_only = 1")
+            self.local.conn = conn
+            with self.readers_lock:
+                self.readers.append(conn)
+        return conn
+
+    @contextmanager
+    def borrow(self):
+        """
+        Lends a read-only connection for work that hops between threads, such as
+        a streaming response whose generator is advanced from the threadpool.
+        The connection is used by one borrower at a time and returned afterwards.
+        """
+        with self.idle_lock:
+            conn = self.idle.pop() if self.idle else None
+        if conn is None:
+            conn = self._connect()
+            conn.execute("PRAGMA query_only = 1")
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            with self.idle_lock:
+                if len(self.idle) < MAX_IDLE_BORROWED:
+                    self.idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    @contextmanager
+    def write(self):
+        """Serializes writers; commits on success and rolls back on error."""
+        started = time.perf_counter()
+        with self.write_lock:
+            if self.writer is None:
+                self.writer = self._connect()
+            try:
+                yield self.writer
+                self.writer.commit()
+            except Exception:
+                self.writer.rollback()
+                raise
+            finally:
+                self.writes += 1
+                self.write_seconds += time.perf_counter() - started
+
+    def close(self):
+        with self.readers_lock:
+            for conn in self.readers:
+                conn.close()
+            self.readers = []
+        self.local = threading.local()
+        with self.idle_lock:
+            for conn in self.idle:
+                conn.close()
+            self.idle = []
+        with self.write_lock:
+            if self.writer is not None:
+                self.writer.close()
+                self.writer = None
@@ -0,0 +1,68 @@
+import logging
+import time
+
+import requests
+
+from modules import metrics
+from modules.ratelimit import RETRY_STATUSES, THROTTLE_STATUSES, backoff_delay, limiter, parse_retry_after
+
+MAX_RETRIES = 5
+
+logger = logging.getLogger(__name__)
+
+
+def request(method, url, session=None, max_retries=MAX_RETRIES, **kwargs):
+    """
+    Send a rate-limited HTTP request.
+    Waits on the shared per-host token bucket before every attempt and retries
+    429/5xx responses and connection errors with backoff, honoring Retry-After.
+    Only 429 and 503 also slow down the host's rate.
+    The last response is returned as-is once retries are exhausted.
+    Time spent here (waits included), requests, bytes and errors are counted
+    towards the current scrape's metrics.
+    """
+    with metrics.stage("fetch"):
+        return _request(method, url, session, max_retries, **kwargs)
+
+
+def _request(method, url, session, max_retries, **kwargs):
+    client = session or requests
+    for attempt in range(max_retries + 1):
+        limiter.wait(url)
+        try:
+            response = client.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            metrics.record_error(e)
+            if attempt == max_retries:
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning("Request to %s failed (%s), retrying in %.1fs", url, e.__class__.__name__, delay)
+            time.sleep(delay)
+            continue
+
+        metrics.record_request(len(response.content))
+        if response.status_code >= 400:
+            metrics.record_error(f"HTTP {response.status_code}")
+        if response.status_code not in RETRY_STATUSES:
+            limiter.recover(url)
+            return response
+        if attempt == max_retries:
+            return response
+
+        delay = parse_retry_after(response.headers.get("Retry-After"))
+        if delay is None:
+            delay = backoff_delay(attempt)
+        logger.warning("Got %s from %s, backing off %.1fs", response.status_code, url, delay)
+        if response.status_code in THROTTLE_STATUSES:
+            limiter.throttle(url, delay)
+        else:
+            time.sleep(delay)
+    return response
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
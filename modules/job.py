@@ -0,0 +1,101 @@
+# Fields of a scraped job, in the order they are stored and serialized.
+JOB_FIELDS = (
+    "site_id",
+    "source_url",
+    "job_id",
+    "title",
+    "company_name",
+    "apply_url",
+    "salary_min",
+    "salary_max",
+    "salary_currency",
+    "location_city",
+    "location_state",
+    "location_country",
+    "remote",
+    "hybrid",
+)
+
+_FIELD_SET = frozenset(JOB_FIELDS)
+
+# Older field names, still found in results queued by workers running earlier code.
+_FIELD_ALIASES = {"min_salary": "salary_min", "max_salary": "salary_max"}
+
+
+class Job:
+    """
+    A job posting as produced by a site's transform().
+    Uses __slots__ so a large run holds compact records instead of one dict per
+    job, and supports the dict-style access (job["title"], job.get("remote"))
+    the filters and database code were written against.
+    """
+    __slots__ = JOB_FIELDS
+
+    def __init__(self, site_id=None, source_url=None, job_id=None, title=None, company_name=None, apply_url=None,
+                 salary_min=None, salary_max=None, salary_currency=None, location_city=None, location_state=None,
+                 location_country=None, remote=False, hybrid=False):
+        self.site_id = site_id
+        self.source_url = source_url
+        self.job_id = job_id
+        self.title = title
+        self.company_name = company_name
+        self.apply_url = apply_url
+        self.salary_min = salary_min
+        self.salary_max = salary_max
+        self.salary_currency = salary_currency
+        self.location_city = location_city
+        self.location_state = location_state
+        self.location_country = location_country
+        self.remote = remote
+        self.hybrid = hybrid
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds a Job from a dict (e.g. one read back from the work queue), ignoring unknown keys."""
+        fields = {}
+        for key, value in data.items():
+            key = _FIELD_ALIASES.get(key, key)
+            if key in _FIELD_SET:
+                fields[key] = value
+        return cls(**fields)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in JOB_FIELDS}
+
+    def values(self):
+        """Field values as a tuple in JOB_FIELDS order."""
+        return tuple(getattr(self, field) for field in JOB_FIELDS)
+
+    def keys(self):
+        return JOB_FIELDS
+
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key):
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in _FIELD_SET
+
+    def __eq__(self, other):
+        if not isinstance(other, Job):
+            return NotImplemented
+        return self.values() == other.values()
+
+    def __repr__(self):
+        return f"Job({self.site_id!r}, {self.job_id!r}, {self.title!r}, {self.company_name!r})"
+
+
+def as_job(record):
+    """Returns `record` as a Job, converting dicts."""
+    return record if isinstance(record, Job) else Job.from_dict(record)
@@ -0,0 +1,114 @@
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+# Overridden by setup_logging(level=...) or the --log-level flag of the scripts.
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+
+# "text" for console lines, "json" for one JSON object per line.
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+
+# Per-job messages (one per job saved, filtered out, ...) are logged once every this many calls.
+SAMPLE_EVERY = int(os.environ.get("LOG_SAMPLE_EVERY", "100"))
+
+# Attributes every LogRecord has; anything else on a record came from `extra=` and is logged as a field.
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener = None
+
+
+def _fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class TextFormatter(logging.Formatter):
+    """'12:00:01 INFO modules.db: Saved 3 jobs site=a run=...' — extra fields appended as key=value."""
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s", "%H:%M:%S")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = _fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(_fields(record))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def setup_logging(level=None, fmt=None, stream=None):
+    """
+    Sends all logging through a queue to a background thread that writes to `stream` (stderr by default),
+    so scrapers never block on console output. Safe to call more than once; the last call wins.
+    """
+    global _listener
+    stop_logging()
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter() if (fmt or LOG_FORMAT) == "json" else TextFormatter())
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel((level or LOG_LEVEL).upper())
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+def stop_logging():
+    """Flushes queued messages and stops the background writer."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(stop_logging)
+
+
+class Sampled:
+    """
+    Logs one of every `every` messages sent through it, for messages that would
+    otherwise be written once per job. Each record carries `sampled=every`.
+    """
+    def __init__(self, logger, every=None):
+        self.logger = logger
+        self.every = every or SAMPLE_EVERY
+        self.counter = itertools.count()
+
+    def log(self, level, msg, *args, **kwargs):
+        if not self.logger.isEnabledFor(level):
+            return
+        if next(self.counter) % self.every:
+            return
+        kwargs["extra"] = dict(kwargs.get("extra") or {}, sampled=self.every)
+        kwargs.setdefault("stacklevel", 3)
+        self.logger.log(level, msg, *args, **kwargs)
+
+    def debug(self, msg, *args, **kwargs):
+        self.log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        self.log(logging.INFO, msg, *args, **kwargs)
+
+
+def add_log_arguments(parser):
+    parser.add_argument("--log-level", default=None, choices=["DEBUG", "INFO", "WARNING", "ERROR"], type=str.upper,
+                        help="Logging level; the LOG_LEVEL environment variable if not given")
+    parser.add_argument("--log-format", default=None, choices=["text", "json"],
+                        help="Log line format; the LOG_FORMAT environment variable if not given")
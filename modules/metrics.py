@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+STAGES = ("fetch", "parse", "transform", "filter", "save")
+
+# Every finished site scrape is appended here as one JSON line. Set to "" to disable.
+METRICS_LOG = os.environ.get("SCRAPE_METRICS_LOG", "data/scrape_metrics.jsonl")
+
+_local = threading.local()
+
+
+class ScrapeMetrics:
+    """
+    Timings and counters for one site scrape.
+    Parse time is whatever the scraper spends outside fetching and transform(),
+    e.g. walking the DOM or building records.
+    """
+    def __init__(self, site_key, run_id=None):
+        self.site_key = site_key
+        self.run_id = run_id
+        self.started_at = time.time()
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.requests = 0
+        self.bytes = 0
+        self.jobs = 0
+        self.matching = 0
+        self.errors = Counter()
+        self.duration = None
+        self.status = None
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - started
+
+    def timed(self, name, func):
+        """Wraps `func` so every call is counted towards stage `name`."""
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def scrape(self, func):
+        """Runs a scraper's scrape(); time not spent in fetch or transform is booked as parse."""
+        fetch, transform = self.stages["fetch"], self.stages["transform"]
+        started = time.perf_counter()
+        try:
+            with collecting(self):
+                return func()
+        finally:
+            elapsed = time.perf_counter() - started
+            inner = (self.stages["fetch"] - fetch) + (self.stages["transform"] - transform)
+            self.stages["parse"] += max(0.0, elapsed - inner)
+
+    def add_request(self, size):
+        self.requests += 1
+        self.bytes += size
+
+    def add_error(self, error):
+        """Counts an error by class; accepts an exception or a label such as 'HTTP 429'."""
+        self.errors[error if isinstance(error, str) else error.__class__.__name__] += 1
+
+    def finish(self, status):
+        if self.duration is None:
+            self.duration = time.time() - self.started_at
+        self.status = status
+
+    def to_dict(self):
+        return {
+            "run_id": self.run_id,
+            "site_key": self.site_key,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "status": self.status,
+            "stages": dict(self.stages),
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "jobs": self.jobs,
+            "matching": self.matching,
+            "errors": dict(self.errors),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        metrics = cls(data["site_key"], data.get("run_id"))
+        metrics.started_at = data["started_at"]
+        metrics.duration = data.get("duration")
+        metrics.status = data.get("status")
+        metrics.stages.update(data.get("stages", {}))
+        metrics.requests = data.get("requests", 0)
+        metrics.bytes = data.get("bytes", 0)
+        metrics.jobs = data.get("jobs", 0)
+        metrics.matching = data.get("matching", 0)
+        metrics.errors.update(data.get("errors", {}))
+        return metrics
+
+
+@contextmanager
+def collecting(metrics):
+    """Makes `metrics` the target of record_request/record_error/stage calls on this thread."""
+    previous = getattr(_local, "metrics", None)
+    _local.metrics = metrics
+    try:
+        yield metrics
+    finally:
+        _local.metrics = previous
+
+def current():
+    return getattr(_local, "metrics", None)
+
+def record_request(size):
+    metrics = current()
+    if metrics is not None:
+        metrics.add_request(size)
+
+def record_error(error):
+    metrics = current()
+    if metrics is not None:
+        metrics.add_error(error)
+
+@contextmanager
+def stage(name):
+    """Times a block towards the current scrape's stage `name`; does nothing outside a scrape."""
+    metrics = current()
+    if metrics is None:
+        yield
+        return
+    with metrics.stage(name):
+        yield
+
+def emit(metrics, path=None):
+    """Appends the metrics as a JSON line to METRICS_LOG."""
+    path = METRICS_LOG if path is None else path
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(metrics.to_dict()) + "\n")
@@ -0,0 +1,200 @@
+import datetime
+import sqlite3
+import time
+
+from modules.workqueue import queue_depth
+
+# Sites running (or leased to a worker without a heartbeat) for longer than this are reported as stalled.
+STALLED_AFTER_SECONDS = 15 * 60
+
+# Throughput, error rate and save latency are computed over scrapes started in this window.
+RATE_WINDOW_SECONDS = 60 * 60
+
+# Site types scraped with a browser; each one in flight holds a Chrome instance.
+BROWSER_SITE_TYPES = ("getro",)
+
+STAGES = ("fetch", "parse", "transform", "filter", "save")
+
+
+def _age(timestamp, now):
+    """Seconds since a 'YYYY-MM-DD HH:MM:SS' local timestamp, as written by modules/db.py."""
+    if not timestamp:
+        return None
+    return now - datetime.datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S").timestamp()
+
+def _rows(conn, query, params=()):
+    """Runs a query, returning [] instead of failing when the table doesn't exist yet."""
+    try:
+        cursor = conn.execute(query, params)
+    except sqlite3.OperationalError as e:
+        if "no such table" in str(e):
+            return []
+        raise
+    columns = [d[0] for d in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def in_flight_sites(conn, now=None):
+    """Sites currently being scraped by search.py, longest running first."""
+    now = now or time.time()
+    sites = _rows(conn, '''
+        SELECT s.run_id, s.site_key, s.site_type, s.site_name, s.started_at
+        FROM run_sites s JOIN runs r ON r.id = s.run_id
+        WHERE r.status = 'running' AND s.status = 'running'
+        ORDER BY s.started_at
+    ''')
+    for site in sites:
+        site["running_seconds"] = _age(site["started_at"], now)
+        site["stalled"] = (site["running_seconds"] or 0) > STALLED_AFTER_SECONDS
+    return sites
+
+def leased_sites(queue_conn, now=None):
+    """Sites leased to worker.py processes, with the time since their last heartbeat."""
+    if queue_conn is None:
+        return []
+    now = now or time.time()
+    sites = _rows(queue_conn, '''
+        SELECT run_id, site_key, worker_id, heartbeat_at, lease_expires, attempts
+        FROM work_queue WHERE status = 'leased' ORDER BY heartbeat_at
+    ''')
+    for site in sites:
+        site["site_type"] = site["site_key"].split(":")[0]
+        site["heartbeat_seconds"] = now - site["heartbeat_at"] if site["heartbeat_at"] else None
+        site["stalled"] = (site["lease_expires"] or 0) < now
+    return sites
+
+def queue_status(queue_conn):
+    """Uncollected work queue items by status; empty when there is no queue."""
+    if queue_conn is None:
+        return {}
+    try:
+        return queue_depth(queue_conn)
+    except sqlite3.OperationalError:
+        return {}
+
+def recent_runs(conn, limit=5):
+    """The latest runs with their sites counted by status."""
+    runs = _rows(conn, "SELECT id, started_at, finished_at, status FROM runs ORDER BY started_at DESC LIMIT ?",
+                 (limit,))
+    for run in runs:
+        run["sites"] = {row["status"]: row["sites"] for row in _rows(conn, '''
+            SELECT status, COUNT(*) AS sites FROM run_sites WHERE run_id = ? GROUP BY status
+        ''', (run["id"],))}
+    return runs
+
+def throughput(conn, window=RATE_WINDOW_SECONDS, now=None):
+    """Jobs/sec, failure rate and save (DB write) latency over scrapes started in the last `window` seconds."""
+    now = now or time.time()
+    cutoff = datetime.datetime.fromtimestamp(now - window).strftime("%Y-%m-%d %H:%M:%S")
+    rows = _rows(conn, '''
+        SELECT COUNT(*) AS sites, SUM(status = 'failed') AS failed, SUM(jobs) AS jobs,
+               SUM(duration) AS seconds, AVG(save_seconds) AS save_avg, MAX(save_seconds) AS save_max
+        FROM scrape_metrics WHERE started_at >= ?
+    ''', (cutoff,))
+    row = rows[0] if rows else {}
+    sites = row.get("sites") or 0
+    seconds = row.get("seconds") or 0.0
+    return {
+        "window_seconds": window,
+        "sites": sites,
+        "failed": row.get("failed") or 0,
+        "jobs": row.get("jobs") or 0,
+        "jobs_per_second": (row.get("jobs") or 0) / seconds if seconds else 0.0,
+        "failure_rate": (row.get("failed") or 0) / sites if sites else 0.0,
+        "save_seconds_avg": row.get("save_avg") or 0.0,
+        "save_seconds_max": row.get("save_max") or 0.0,
+    }
+
+def error_counts(conn):
+    """Errors recorded in scrape_metrics, summed by class, most frequent first."""
+    return {row["error"]: row["count"] for row in _rows(conn, '''
+        SELECT e.key AS error, SUM(e.value) AS count
+        FROM scrape_metrics m, json_each(m.errors) e
+        GROUP BY e.key ORDER BY count DESC
+    ''')}
+
+def scrape_totals(conn):
+    """Counters over every recorded scrape, by status."""
+    return _rows(conn, f'''
+        SELECT status, COUNT(*) AS scrapes, SUM(jobs) AS jobs, SUM(requests) AS requests, SUM(bytes) AS bytes,
+               SUM(duration) AS duration, {", ".join(f"SUM({stage}_seconds) AS {stage}" for stage in STAGES)}
+        FROM scrape_metrics GROUP BY status
+    ''')
+
+def run_status(conn, queue_conn=None, now=None):
+    """Everything the run status page and /metrics report, read from the jobs and queue databases."""
+    now = now or time.time()
+    in_flight = in_flight_sites(conn, now)
+    leased = leased_sites(queue_conn, now)
+    return {
+        "in_flight": in_flight,
+        "leased": leased,
+        "queue": queue_status(queue_conn),
+        "runs": recent_runs(conn),
+        "throughput": throughput(conn, now=now),
+        "errors": error_counts(conn),
+        "totals": scrape_totals(conn),
+        "browsers_in_use": sum(1 for site in in_flight + leased if site["site_type"] in BROWSER_SITE_TYPES),
+    }
+
+
+# ====================
+# Prometheus text format
+# ====================
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _family(lines, name, metric_type, help_text, samples):
+    """Appends one metric family; samples are (labels dict, value) pairs."""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {metric_type}")
+    for labels, value in samples:
+        label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+        lines.append(f"{name}{{{label_text}}} {float(value or 0)!r}" if label_text else f"{name} {float(value or 0)!r}")
+
+def prometheus_text(status, extra=()):
+    """
+    Renders run_status() output in the Prometheus text exposition format.
+    `extra` holds additional (name, type, help, samples) families, e.g. from the web app itself.
+    """
+    lines = []
+    sites = status["in_flight"] + status["leased"]
+    _family(lines, "headhunter_sites_in_flight", "gauge", "Sites being scraped right now.",
+            [({"mode": "local"}, len(status["in_flight"])), ({"mode": "worker"}, len(status["leased"]))])
+    _family(lines, "headhunter_sites_stalled", "gauge",
+            f"In-flight sites running over {STALLED_AFTER_SECONDS}s or with an expired worker lease.",
+            [({}, sum(1 for site in sites if site["stalled"]))])
+    _family(lines, "headhunter_site_running_seconds", "gauge", "Seconds each in-flight search.py site has been running.",
+            [({"site": site["site_key"]}, site["running_seconds"]) for site in status["in_flight"]])
+    _family(lines, "headhunter_site_heartbeat_age_seconds", "gauge", "Seconds since each leased site's last worker heartbeat.",
+            [({"site": site["site_key"], "worker": site["worker_id"]}, site["heartbeat_seconds"])
+             for site in status["leased"]])
+    _family(lines, "headhunter_browsers_in_use", "gauge", "Browser (Selenium) scrapes in flight.",
+            [({}, status["browsers_in_use"])])
+    _family(lines, "headhunter_queue_items", "gauge", "Uncollected work queue items by status.",
+            [({"status": name}, count) for name, count in sorted(status["queue"].items())])
+
+    rates = status["throughput"]
+    window = {"window": f"{rates['window_seconds']}s"}
+    _family(lines, "headhunter_jobs_per_second", "gauge", "Jobs scraped per second of scrape time in the window.",
+            [(window, rates["jobs_per_second"])])
+    _family(lines, "headhunter_scrape_failure_ratio", "gauge", "Share of site scrapes in the window that failed.",
+            [(window, rates["failure_rate"])])
+    _family(lines, "headhunter_save_seconds", "gauge", "Time spent saving a site's jobs (DB writes) in the window.",
+            [(dict(window, stat="avg"), rates["save_seconds_avg"]), (dict(window, stat="max"), rates["save_seconds_max"])])
+
+    totals = status["totals"]
+    _family(lines, "headhunter_scrapes_total", "counter", "Site scrapes recorded, by outcome.",
+            [({"status": row["status"] or ""}, row["scrapes"]) for row in totals])
+    _family(lines, "headhunter_scraped_jobs_total", "counter", "Jobs found by all recorded scrapes.",
+            [({}, sum(row["jobs"] or 0 for row in totals))])
+    _family(lines, "headhunter_requests_total", "counter", "HTTP requests and page loads made by scrapers.",
+            [({}, sum(row["requests"] or 0 for row in totals))])
+    _family(lines, "headhunter_response_bytes_total", "counter", "Response bytes downloaded by scrapers.",
+            [({}, sum(row["bytes"] or 0 for row in totals))])
+    _family(lines, "headhunter_stage_seconds_total", "counter", "Time spent in each scrape stage.",
+            [({"stage": stage}, sum(row[stage] or 0 for row in totals)) for stage in STAGES])
+    _family(lines, "headhunter_scrape_errors_total", "counter", "Errors recorded by scrapers, by class.",
+            [({"error": error}, count) for error, count in status["errors"].items()])
+    for family in extra:
+        _family(lines, *family)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,230 @@
+"""
+Fetches VC firms and their websites from NFX Signal (signal.nfx.com).
+
+Every investor list is paged through `scored_investors` (following endCursor), and the
+details of each new firm are fetched concurrently. All requests go through
+modules/http_client, so they share the per-host rate limit and retry policy.
+Progress is checkpointed per list, so an interrupted refresh resumes where it stopped.
+Firms are kept in the SQLite store of modules/nfx_store.py and exported as JSON lines.
+"""
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from bs4 import BeautifulSoup
+
+from modules import http_client
+from modules.nfx_store import export_jsonl, known_slugs, upsert_firms
+
+LOGIN_URL = "https://signal.nfx.com/login"
+API_URL = "https://signal-api.nfx.com/graphql"
+
+OUTPUT_FILE = "data/nfx-investors-api-2.json"
+PROGRESS_FILE = "data/nfx-progress.json"
+
+# Firm detail requests in flight at once; the rate limit for signal-api.nfx.com still applies.
+MAX_WORKERS = 8
+
+# Used when the login page can't be read.
+DEFAULT_LIST_SLUGS = ["consumer-internet-pre-seed"]
+
+REQUEST_TIMEOUT = 30
+
+API_HEADERS = {
+    'Content-Type': 'application/json',
+    'User-Agent': 'PostmanRuntime/7.29.4',
+    'Accept': '*/*',
+    'Host': 'signal-api.nfx.com',
+    'Connection': 'keep-alive',
+}
+
+LIST_QUERY = "query vclInvestors($slug: String!, $after: String) {\n  list(slug: $slug) {\n    id\n    slug\n    investor_count\n    vertical {\n      id\n      display_name\n      kind\n      __typename\n    }\n    location {\n      id\n      display_name\n      __typename\n    }\n    stage\n    firms {\n      id\n      name\n      slug\n      __typename\n    }\n    scored_investors(first: 8, after: $after) {\n      pageInfo {\n        hasNextPage\n        hasPreviousPage\n        endCursor\n        __typename\n      }\n      record_count\n      edges {\n        node {\n          ...investorListInvestorProfileFields\n          __typename\n        }\n        __typename\n      }\n      __typename\n    }\n    __typename\n  }\n}\n\nfragment investorListInvestorProfileFields on InvestorProfile {\n  id\n  person {\n    id\n    first_name\n    last_name\n    name\n    slug\n    is_me\n    is_on_target_list\n    __typename\n  }\n  image_urls\n  position\n  min_investment\n  max_investment\n  target_investment\n  is_preferred_coinvestor\n  firm {\n    id\n    name\n    slug\n    __typename\n  }\n  investment_locations {\n    id\n    display_name\n    location_investor_list {\n      id\n      slug\n      __typename\n    }\n    __typename\n  }\n  investor_lists {\n    id\n    stage_name\n    slug\n    vertical {\n      id\n      display_name\n      __typename\n    }\n    __typename\n  }\n  __typename\n}\n"
+
+FIRM_QUERY = "query FirmForFirmPageQuery($slug: String!) {\n  firm(slug: $slug) {\n    id\n    slug\n    name\n    angellist_url\n    twitter_url\n    linkedin_url\n    url\n    crunchbase_url\n    description\n    founding_year\n    investor_lists {\n      id\n      stage_name\n      vertical {\n        id\n        display_name\n        __typename\n      }\n      __typename\n    }\n    locations {\n      id\n      display_name\n      __typename\n    }\n    coinvested_firms {\n      id\n      name\n      slug\n      __typename\n    }\n    investor_profiles {\n      ...investorListInvestorProfileFields\n      __typename\n    }\n    __typename\n  }\n}\n\nfragment investorListInvestorProfileFields on InvestorProfile {\n  id\n  person {\n    id\n    first_name\n    last_name\n    name\n    slug\n    is_me\n    is_on_target_list\n    __typename\n  }\n  image_urls\n  position\n  min_investment\n  max_investment\n  target_investment\n  is_preferred_coinvestor\n  firm {\n    id\n    name\n    slug\n    __typename\n  }\n  investment_locations {\n    id\n    display_name\n    location_investor_list {\n      id\n      slug\n      __typename\n    }\n    __typename\n  }\n  investor_lists {\n    id\n    stage_name\n    slug\n    vertical {\n      id\n      display_name\n      __typename\n    }\n    __typename\n  }\n  __typename\n}\n"
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class NfxError(Exception):
+    """A GraphQL request failed or returned no usable data."""
+
+
+def session():
+    """This thread's keep-alive session to the NFX API."""
+    if getattr(_local, "session", None) is None:
+        _local.session = requests.Session()
+        _local.session.headers.update(API_HEADERS)
+    return _local.session
+
+def get_investor_list_slugs():
+    """Fetch and parse investor list slugs from NFX login page"""
+    try:
+        # Use curl-like headers to match your successful request
+        headers = {
+            'User-Agent': 'curl/7.68.0',
+            'Accept': '*/*'
+        }
+        response = http_client.get(LOGIN_URL, headers=headers, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+    except Exception as e:
+        logger.error("Error fetching slugs: %s", e)
+        return []
+
+    soup = BeautifulSoup(response.text, 'html.parser')
+    slugs = []
+    # Links look like /investor-lists/top-enterprise-seed-investors; we want just enterprise-seed
+    for link in soup.find_all('a'):
+        href = link.get('href', '')
+        if 'investor-lists' in href and '/top-' in href and '-investors' in href:
+            slug = href.split('/top-')[1].replace('-investors', '')
+            if slug and slug not in slugs:
+                slugs.append(slug)
+    logger.info("Found %d unique investor list slugs", len(slugs))
+    return slugs
+
+def graphql(operation, variables, query):
+    """Runs a GraphQL operation and returns its `data`, raising NfxError on any failure."""
+    payload = {"operationName": operation, "variables": variables, "query": query}
+    response = http_client.post(API_URL, session=session(), data=json.dumps(payload), timeout=REQUEST_TIMEOUT)
+    if response.status_code != 200:
+        raise NfxError(f"{operation} returned {response.status_code}: {response.text[:200]}")
+    try:
+        body = response.json()
+    except ValueError as e:
+        raise NfxError(f"{operation} returned invalid JSON ({e}): {response.text[:200]}")
+    if not body.get("data"):
+        raise NfxError(f"{operation} returned no data: {body.get('errors')}")
+    return body["data"]
+
+def iter_list_pages(list_slug, after=None):
+    """
+    Yields (firms, next_cursor) for each page of an investor list, starting after `after`.
+    Firms come from the list itself and from each scored investor's firm; next_cursor is None on the last page.
+    """
+    while True:
+        data = graphql("vclInvestors", {"slug": list_slug, "order": [{}], "after": after}, LIST_QUERY)
+        investor_list = data.get("list")
+        if not investor_list:
+            raise NfxError(f"Invalid response for slug {list_slug}")
+        firms = list(investor_list.get("firms") or []) if after is None else []
+        investors = investor_list.get("scored_investors") or {}
+        for edge in investors.get("edges") or []:
+            firm = (edge.get("node") or {}).get("firm")
+            if firm:
+                firms.append(firm)
+        page_info = investors.get("pageInfo") or {}
+        after = page_info.get("endCursor") if page_info.get("hasNextPage") else None
+        yield firms, after
+        if after is None:
+            return
+
+def fetch_firm(firm):
+    """Returns the stored record for a firm: its ids plus website and social links."""
+    details = graphql("FirmForFirmPageQuery", {"slug": firm["slug"]}, FIRM_QUERY)["firm"]
+    if not details:
+        raise NfxError(f"No firm found for {firm['slug']}")
+    return {
+        "id": firm["id"],
+        "name": firm["name"],
+        "slug": firm["slug"],
+        "linkedin": details["linkedin_url"],
+        "twitter": details["twitter_url"],
+        "crunchbase": details["crunchbase_url"],
+        "url": details["url"],
+    }
+
+def _fetch_firm_or_none(firm):
+    try:
+        return fetch_firm(firm)
+    except Exception as e:
+        logger.warning("Error processing investor %s: %s", firm.get("slug"), e)
+        return None
+
+def load_progress(path=PROGRESS_FILE):
+    """
+    {"lists": {list_slug: {"after": cursor, "done": bool}}, "failed": {firm_slug: firm}},
+    where "lists" is the state of an unfinished pass over the lists and "failed" holds
+    firms whose details could not be fetched yet.
+    """
+    try:
+        with open(path) as f:
+            progress = json.load(f)
+    except FileNotFoundError:
+        progress = {}
+    progress.setdefault("lists", {})
+    progress.setdefault("failed", {})
+    return progress
+
+def save_progress(progress, path=PROGRESS_FILE):
+    # Written to a temporary file first so an interrupted run never leaves a truncated checkpoint.
+    with open(path + ".tmp", "w") as f:
+        json.dump(progress, f)
+    os.replace(path + ".tmp", path)
+
+def _fetch_new(conn, pool, firms, seen, progress):
+    """Fetches the firms not in `seen` and upserts them into the store as one batch. Returns how many were stored."""
+    new = []
+    for firm in firms:
+        if firm.get("slug") and firm["slug"] not in seen:
+            seen.add(firm["slug"])
+            new.append(firm)
+    records = [record for record in pool.map(_fetch_firm_or_none, new) if record]
+    fetched = {record["slug"] for record in records}
+    for firm in new:
+        if firm["slug"] in fetched:
+            progress["failed"].pop(firm["slug"], None)
+        else:
+            # Forgotten so a later page or run retries it.
+            seen.discard(firm["slug"])
+            progress["failed"][firm["slug"]] = firm
+    if records:
+        upsert_firms(conn, records)
+    return len(records)
+
+def fetch_all(conn, list_slugs=None, output_file=OUTPUT_FILE, progress_file=PROGRESS_FILE, max_workers=MAX_WORKERS,
+              refresh=False):
+    """
+    Fetches every firm of every investor list into the store `conn` (see modules/nfx_store.py), then
+    exports the store to `output_file` as JSON lines. Every list is paged on each run so newly listed
+    firms are found; firms already stored are skipped, unless `refresh` is set: then every firm is
+    re-fetched, so changed links replace stale ones. A failing list is logged and left for the next run
+    instead of stopping the others; that run finishes the interrupted pass, skipping lists already done
+    and resuming the others from their last cursor. Firms that failed before are retried first.
+    Returns the number of firms stored.
+    """
+    list_slugs = list_slugs or get_investor_list_slugs() or DEFAULT_LIST_SLUGS
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    seen = set() if refresh else known_slugs(conn)
+    progress = load_progress(progress_file)
+    if refresh:
+        progress["lists"] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        added = _fetch_new(conn, pool, list(progress["failed"].values()), seen, progress)
+        save_progress(progress, progress_file)
+        for list_slug in list_slugs:
+            state = progress["lists"].get(list_slug, {})
+            if state.get("done"):
+                logger.debug("Skipping investor list %s (finished in an earlier run)", list_slug)
+                continue
+            logger.info("Processing investor list: %s", list_slug)
+            try:
+                for firms, after in iter_list_pages(list_slug, state.get("after")):
+                    added += _fetch_new(conn, pool, firms, seen, progress)
+                    progress["lists"][list_slug] = {"after": after, "done": after is None}
+                    save_progress(progress, progress_file)
+            except Exception as e:
+                logger.error("Error fetching investor list %s: %s", list_slug, e)
+                continue
+            logger.info("Finished investor list %s; %d firms stored so far", list_slug, added)
+        if all(progress["lists"].get(list_slug, {}).get("done") for list_slug in list_slugs):
+            # The pass is complete, so the next run starts a new one from the first page.
+            progress["lists"] = {}
+            save_progress(progress, progress_file)
+    exported = export_jsonl(conn, output_file)
+    logger.info("Exported %d firms to %s", exported, output_file)
+    return added
@@ -0,0 +1,100 @@
+import datetime
+import json
+import logging
+import os
+import sqlite3
+
+# Firms fetched by modules/nfx.py, keyed by their NFX slug.
+NFX_DATABASE_NAME = os.environ.get("NFX_DATABASE_NAME", "data/nfx.db")
+
+FIRM_FIELDS = ("id", "name", "slug", "linkedin", "twitter", "crunchbase", "url")
+
+logger = logging.getLogger(__name__)
+
+
+def _now():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def create_store(db_path=None, seed_file=None):
+    """
+    Opens the NFX firm store, creating the 'nfx_firms' table if needed.
+    A new, empty store is filled from `seed_file` (the JSON lines export) when given.
+    """
+    db_path = db_path or NFX_DATABASE_NAME
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS nfx_firms (
+            slug TEXT PRIMARY KEY,
+            id TEXT,
+            name TEXT,
+            linkedin TEXT,
+            twitter TEXT,
+            crunchbase TEXT,
+            url TEXT,
+            first_seen TIMESTAMP,
+            updated_at TIMESTAMP,
+            changed_at TIMESTAMP
+        )
+    ''')
+    conn.commit()
+    if seed_file and os.path.exists(seed_file) and not conn.execute("SELECT 1 FROM nfx_firms LIMIT 1").fetchone():
+        imported = import_jsonl(conn, seed_file)
+        logger.info("Imported %d firms from %s", imported, seed_file)
+    return conn
+
+def upsert_firms(conn, records):
+    """
+    Inserts or updates a batch of firm records in one transaction.
+    A firm seen again replaces its stored links; changed_at only moves when a link or name actually changed.
+    Returns the number of records written.
+    """
+    now = _now()
+    conn.executemany('''
+        INSERT INTO nfx_firms (slug, id, name, linkedin, twitter, crunchbase, url, first_seen, updated_at, changed_at)
+        VALUES (:slug, :id, :name, :linkedin, :twitter, :crunchbase, :url, :now, :now, :now)
+        ON CONFLICT(slug) DO UPDATE SET
+            changed_at = CASE WHEN (name, linkedin, twitter, crunchbase, url) IS NOT
+                (excluded.name, excluded.linkedin, excluded.twitter, excluded.crunchbase, excluded.url)
+                THEN excluded.updated_at ELSE changed_at END,
+            id = excluded.id, name = excluded.name, linkedin = excluded.linkedin, twitter = excluded.twitter,
+            crunchbase = excluded.crunchbase, url = excluded.url, updated_at = excluded.updated_at
+    ''', [dict({field: record.get(field) for field in FIRM_FIELDS}, now=now) for record in records])
+    conn.commit()
+    return len(records)
+
+def known_slugs(conn):
+    return {row[0] for row in conn.execute("SELECT slug FROM nfx_firms")}
+
+def iter_firms(conn):
+    """Yields stored firms as dicts, ordered by slug."""
+    cursor = conn.execute(f"SELECT {', '.join(FIRM_FIELDS)} FROM nfx_firms ORDER BY slug")
+    for row in cursor:
+        yield dict(zip(FIRM_FIELDS, row))
+
+def import_jsonl(conn, path, batch_size=1000):
+    """Loads a JSON lines file of firms; later lines win over earlier ones for the same slug."""
+    imported = 0
+    batch = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                imported += upsert_firms(conn, batch)
+                batch = []
+    if batch:
+        imported += upsert_firms(conn, batch)
+    return imported
+
+def export_jsonl(conn, path):
+    """Writes every stored firm to `path` as JSON lines (one per slug), replacing the file atomically."""
+    count = 0
+    with open(path + ".tmp", "w") as f:
+        for firm in iter_firms(conn):
+            f.write(json.dumps(firm) + "\n")
+            count += 1
+    os.replace(path + ".tmp", path)
+    return count
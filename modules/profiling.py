@@ -0,0 +1,148 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+PROFILE_DIR = "profiles"
+
+logger = logging.getLogger(__name__)
+
+# Functions and allocation sites listed in each summary.
+TOP_N = 25
+
+# Allocations made by the profilers themselves are left out of the memory report.
+_MEMORY_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, pstats.__file__),
+    tracemalloc.Filter(False, cProfile.__file__),
+]
+
+
+def _file_name(name):
+    return re.sub(r"[^\w.-]+", "_", name).strip("_") or "profile"
+
+def _hot_functions(stats, sort, top):
+    buf = io.StringIO()
+    stats.stream = buf
+    stats.sort_stats(sort).print_stats(top)
+    return buf.getvalue()
+
+
+class RunProfiler:
+    """
+    Profiles blocks of a run (one site, or the whole run) with cProfile and tracemalloc.
+    Each block writes <out_dir>/<name>.prof, loadable with pstats or snakeviz, and
+    <name>.txt with its hottest functions and the lines that allocated the most memory.
+    Blocks sharing a name (e.g. several URLs on one domain) get <name>-2, <name>-3, ...
+    summary() merges every block into a run-wide top-N.
+    """
+    def __init__(self, out_dir=None, top=TOP_N, memory=True):
+        self.out_dir = out_dir or os.path.join(PROFILE_DIR, time.strftime("%Y%m%d-%H%M%S"))
+        self.top = top
+        self.memory = memory
+        self.stats = None
+        self.blocks = []
+        self.file_names = set()
+
+    @contextmanager
+    def profile(self, name):
+        os.makedirs(self.out_dir, exist_ok=True)
+        started_tracing = False
+        before = None
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - started
+            after = peak = None
+            if self.memory:
+                after = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+            self._write(name, profiler, elapsed, before, after, peak)
+
+    def _write(self, name, profiler, elapsed, before, after, peak):
+        file_name = base = _file_name(name)
+        count = 1
+        while file_name in self.file_names:
+            count += 1
+            file_name = f"{base}-{count}"
+        self.file_names.add(file_name)
+        path = os.path.join(self.out_dir, file_name)
+        profiler.dump_stats(path + ".prof")
+        stats = pstats.Stats(profiler)
+        if self.stats is None:
+            self.stats = pstats.Stats(profiler)
+        else:
+            self.stats.add(profiler)
+        self.blocks.append((name, elapsed, peak))
+
+        with open(path + ".txt", "w") as f:
+            f.write(f"{name}: {elapsed:.2f}s")
+            if peak is not None:
+                f.write(f", peak traced memory {peak / 1024 / 1024:.1f} MB")
+            f.write("\n\n")
+            f.write(_hot_functions(stats, "cumulative", self.top))
+            f.write(_hot_functions(stats, "tottime", self.top))
+            if after is not None:
+                f.write(f"Top {self.top} allocation sites (growth during the block):\n")
+                growth = after.filter_traces(_MEMORY_FILTERS).compare_to(before.filter_traces(_MEMORY_FILTERS), "lineno")
+                for stat in growth[:self.top]:
+                    f.write(f"  {stat}\n")
+
+    def summary(self):
+        """Writes summary.txt (slowest blocks and run-wide hot functions), prints the top functions and returns its path."""
+        if self.stats is None:
+            return None
+        path = os.path.join(self.out_dir, "summary.txt")
+        hot = _hot_functions(self.stats, "tottime", self.top)
+        with open(path, "w") as f:
+            f.write("Slowest blocks:\n")
+            for name, elapsed, peak in sorted(self.blocks, key=lambda block: block[1], reverse=True)[:self.top]:
+                memory = f", peak {peak / 1024 / 1024:.1f} MB" if peak is not None else ""
+                f.write(f"  {elapsed:8.2f}s  {name}{memory}\n")
+            f.write("\n")
+            f.write(hot)
+            f.write(_hot_functions(self.stats, "cumulative", self.top))
+        logger.info("Hot functions:\n%s", hot)
+        logger.info("Profiles written to %s", self.out_dir)
+        return path
+
+
+def add_profile_arguments(parser, unit):
+    """Adds --profile/--profile-dir/--profile-top/--no-profile-memory; `unit` names what is profiled separately."""
+    parser.add_argument("--profile", nargs="?", const=unit, choices=[unit, "run"],
+                        help=f"Profile with cProfile and tracemalloc, one file per {unit} or one for the whole run")
+    parser.add_argument("--profile-dir", default=None,
+                        help=f"Directory for profile files; a new timestamped folder under {PROFILE_DIR}/ if not given")
+    parser.add_argument("--profile-top", type=int, default=TOP_N,
+                        help="Number of functions and allocation sites listed in each summary")
+    parser.add_argument("--no-profile-memory", action="store_true",
+                        help="Skip tracemalloc, which slows the run noticeably")
+
+def profiler_from_args(args):
+    """Returns a RunProfiler for the parsed arguments, or None when --profile was not given."""
+    if not args.profile:
+        return None
+    return RunProfiler(args.profile_dir, top=args.profile_top, memory=not args.no_profile_memory)
+
+def profiled(profiler, name):
+    """profiler.profile(name), or a no-op context when profiling is off."""
+    return profiler.profile(name) if profiler else nullcontext()
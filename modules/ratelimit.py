@@ -0,0 +1,153 @@
+"""
+Per-host token buckets shared by every request made through modules/http_client.py.
+The limits hold per process: each worker.py process (and the coordinator) gets the
+full per-host budget, so N workers can send up to N times HOST_LIMITS to one host.
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Requests per second and burst size used for any host not listed below.
+DEFAULT_RATE = 2.0
+DEFAULT_BURST = 4
+
+# Per-host overrides as (requests per second, burst size).
+HOST_LIMITS = {
+    "boards-api.greenhouse.io": (8.0, 16),
+    "signal-api.nfx.com": (4.0, 8),
+    "signal.nfx.com": (1.0, 2),
+    "www.ventureloop.com": (2.0, 4),
+}
+
+# Never let adaptive throttling push a host below this rate.
+MIN_RATE = 0.1
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Retried statuses that mean the host wants fewer requests, so its rate is halved.
+# Other server errors are only retried after a backoff.
+THROTTLE_STATUSES = {429, 503}
+
+
+class TokenBucket:
+    """Thread-safe token bucket that also supports adaptive slow-down."""
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.blocked_until = 0.0
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def reserve(self):
+        """Take a token and return how long the caller must wait before using it."""
+        with self.lock:
+            now = self.clock()
+            self._refill(now)
+            # Tokens may go negative; the deficit is the queue of waiting callers.
+            self.tokens -= 1
+            wait = 0.0
+            if self.tokens < 0:
+                wait = -self.tokens / self.rate
+            return max(wait, self.blocked_until - now)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+    def throttle(self, delay):
+        """Halve the rate and block the bucket for `delay` seconds (after a 429 or 503)."""
+        with self.lock:
+            now = self.clock()
+            self._refill(now)
+            self.rate = max(MIN_RATE, self.rate / 2)
+            self.blocked_until = max(self.blocked_until, now + delay)
+
+    def recover(self):
+        """Creep the rate back towards its configured maximum after a success."""
+        with self.lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate * 1.1)
+
+
+class RateLimiter:
+    """Keeps one token bucket per host so parallel scrapers in this process share the same budget."""
+    def __init__(self, default_rate=DEFAULT_RATE, default_burst=DEFAULT_BURST, host_limits=None,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.host_limits = dict(HOST_LIMITS if host_limits is None else host_limits)
+        self.clock = clock
+        self.sleep = sleep
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url):
+        host = host_for(url)
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                rate, burst = self.host_limits.get(host, (self.default_rate, self.default_burst))
+                bucket = TokenBucket(rate, burst, clock=self.clock, sleep=self.sleep)
+                self.buckets[host] = bucket
+            return bucket
+
+    def wait(self, url):
+        """Block until a request to the host of `url` is allowed."""
+        return self.bucket(url).acquire()
+
+    def throttle(self, url, delay):
+        self.bucket(url).throttle(delay)
+
+    def recover(self, url):
+        self.bucket(url).recover()
+
+
+def host_for(url):
+    """Return the lower-cased host of a URL (or the URL itself if it has no scheme)."""
+    parsed = urlparse(url if "://" in url else f"http://{url}")
+    return (parsed.hostname or "").lower()
+
+
+def parse_retry_after(value, now=None):
+    """
+    Parse a Retry-After header value into seconds.
+    Supports both delta-seconds and HTTP-date forms; returns None if unparseable.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    now = now if now is not None else time.time()
+    return max(0.0, retry_at.timestamp() - now)
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+# Shared limiter used by every outbound request in the process.
+limiter = RateLimiter()
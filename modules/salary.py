@@ -0,0 +1,149 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+Salary = namedtuple("Salary", ["min", "max", "currency"])
+
+# Multipliers that turn a pay rate into an annual amount (40h weeks, 52 weeks).
+PERIOD_MULTIPLIERS = {
+    "hour": 2080,
+    "day": 260,
+    "week": 52,
+    "month": 12,
+    "year": 1,
+}
+
+_PERIOD_PATTERNS = [
+    (re.compile(r"/\s*h((ou)?r)?\b|\bper\s+h(ou)?r\b|\bhourly\b|\ban\s+hour\b|\bph\b", re.I), "hour"),
+    (re.compile(r"/\s*day\b|\bper\s+day\b|\bdaily\b", re.I), "day"),
+    (re.compile(r"/\s*w(ee)?k\b|\bper\s+week\b|\bweekly\b", re.I), "week"),
+    (re.compile(r"/\s*mo(nth)?\b|\bper\s+month\b|\bmonthly\b", re.I), "month"),
+]
+
+# Checked in order, so the prefixed dollar signs win over a bare "$".
+_CURRENCY_SYMBOLS = [("CA$", "CAD"), ("C$", "CAD"), ("A$", "AUD"), ("$", "USD"), ("£", "GBP"), ("€", "EUR"), ("¥", "JPY"), ("₹", "INR")]
+_CURRENCY_CODES = re.compile(r"\b(USD|CAD|AUD|EUR|GBP|CHF|JPY|INR|SGD|SEK|NOK|DKK|PLN|ILS|BRL|MXN)\b", re.I)
+
+# A trailing "%" marks a percentage (bonus, equity), which is not an amount.
+_AMOUNT = re.compile(r"(\d+(?:[.,]\d+)*)\s*([kKmM](?![a-zA-Z]))?\s*(%)?")
+
+# Bare annual figures below this ("5 years", "401") are not salaries; "150k" is fine.
+MIN_ANNUAL_AMOUNT = 1000
+_UP_TO = re.compile(r"\b(up\s+to|max(imum)?|under)\b", re.I)
+
+_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+
+def _number(text):
+    """'150,000' -> 150000.0, '1.5' -> 1.5, '150.000' (European thousands) -> 150000.0."""
+    parts = re.split(r"[.,]", text)
+    if len(parts) > 1 and all(len(part) == 3 for part in parts[1:]):
+        return float("".join(parts))
+    return float(text.replace(",", ""))
+
+
+def period_of(text):
+    """Returns the pay period named in a salary string ('hour', 'day', 'week', 'month' or 'year')."""
+    for pattern, period in _PERIOD_PATTERNS:
+        if pattern.search(text):
+            return period
+    return "year"
+
+
+def currency_of(text):
+    """Returns the ISO currency code of a salary string, or None if it names none."""
+    match = _CURRENCY_CODES.search(text)
+    if match:
+        return match.group(1).upper()
+    for symbol, code in _CURRENCY_SYMBOLS:
+        if symbol in text:
+            return code
+    return None
+
+
+@lru_cache(maxsize=4096)
+def parse_salary(text):
+    """
+    Parses salary text such as '$150k - $200k', '120,000-140,000 USD/yr',
+    '£60/hour' or 'Up to €1.2M' into an annual Salary(min, max, currency).
+    Percentages and bare annual figures under MIN_ANNUAL_AMOUNT are skipped.
+    Board listings repeat the same few strings, hence the cache.
+    Returns None if the text holds no amount.
+    """
+    if not text:
+        return None
+    amounts = []
+    for number, suffix, percent in _AMOUNT.findall(text):
+        if percent:
+            continue
+        try:
+            value = _number(number)
+        except ValueError:
+            continue
+        amounts.append((value, suffix.lower()))
+
+    # "150-200k": the suffix on the upper bound applies to the lower one too.
+    for i in range(len(amounts) - 1):
+        (value, suffix), (_, next_suffix) = amounts[i], amounts[i + 1]
+        if next_suffix and not suffix and value < 1000:
+            amounts[i] = (value, next_suffix)
+    period = period_of(text)
+    if period == "year":
+        amounts = [(value, suffix) for value, suffix in amounts if suffix or value >= MIN_ANNUAL_AMOUNT]
+    if not amounts:
+        return None
+    multiplier = PERIOD_MULTIPLIERS[period]
+    values = [round(value * _SUFFIXES.get(suffix, 1) * multiplier, 2) for value, suffix in amounts[:2]]
+
+    if len(values) == 1:
+        low, high = (None, values[0]) if _UP_TO.search(text) else (values[0], values[0])
+    else:
+        low, high = min(values), max(values)
+    return Salary(low, high, currency_of(text))
+
+
+def _label(value):
+    # APIs give currency/period either as a plain string or as {"value": ..., "label": ...}.
+    if isinstance(value, dict):
+        value = value.get("value") or value.get("label")
+    return str(value) if value else ""
+
+
+def _period_from_label(label):
+    """'HOUR', 'Hourly', 'per month', ... -> a PERIOD_MULTIPLIERS key; unknown labels count as annual."""
+    label = label.lower().replace("daily", "day")
+    for period in PERIOD_MULTIPLIERS:
+        if period in label:
+            return period
+    return "year"
+
+
+def salary_range(min_value, max_value, period=None, currency=None):
+    """
+    Normalizes a structured salary (e.g. an API's minValue/maxValue) to an
+    annual Salary. Values may be numbers or salary strings.
+    """
+    low = _amount(min_value)
+    high = _amount(max_value)
+    if low is None and high is None:
+        return None
+    multiplier = PERIOD_MULTIPLIERS[_period_from_label(_label(period))]
+    if low is not None:
+        low = round(low * multiplier, 2)
+    if high is not None:
+        high = round(high * multiplier, 2)
+    return Salary(low, high, (_label(currency).upper() or None) if currency else None)
+
+
+def _amount(value):
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        # A plain number; its period comes from the API's own field.
+        return float(str(value).replace(",", ""))
+    except ValueError:
+        pass
+    salary = parse_salary(str(value))
+    return salary.max if salary else None
@@ -0,0 +1,78 @@
+import datetime
+
+from modules.db import site_key
+
+# Hours between scrapes for each board tier. Overridable via APP_CONFIG["freshness_budgets"].
+DEFAULT_BUDGETS = {
+    "high": 1,        # boards that produced matching jobs last time
+    "normal": 24,     # boards whose listings change but have no matches
+    "dormant": 168,   # boards whose listings have not changed in DORMANT_AFTER_DAYS
+    "failing": 72,    # boards that keep failing
+}
+
+# A board whose job list has not changed for this many days is considered dormant.
+DORMANT_AFTER_DAYS = 14
+
+# Failure rate (moving average, 0..1) above which a board is treated as failing.
+FAILING_RATE = 0.5
+
+
+def _parse(timestamp):
+    if not timestamp:
+        return None
+    return datetime.datetime.fromisoformat(timestamp)
+
+
+def classify(history, now):
+    """Returns the freshness tier of a board given its board_history row (or None if never scraped)."""
+    if not history or not history.get("last_scraped"):
+        return "new"
+    if history.get("failure_rate", 0) >= FAILING_RATE:
+        return "failing"
+    if history.get("jobs_matched"):
+        return "high"
+    last_changed = _parse(history.get("last_changed"))
+    if not last_changed or now - last_changed > datetime.timedelta(days=DORMANT_AFTER_DAYS):
+        return "dormant"
+    return "normal"
+
+
+def is_due(history, now, budgets):
+    tier = classify(history, now)
+    if tier == "new":
+        return True
+    last_scraped = _parse(history["last_scraped"])
+    return now - last_scraped >= datetime.timedelta(hours=budgets[tier])
+
+
+def priority(history, now, budgets):
+    """
+    Higher is scraped first. Never-scraped boards come first, then boards are
+    ranked by expected matches per second of scrape time, boosted by how
+    overdue they are relative to their budget and penalised by failure rate.
+    """
+    tier = classify(history, now)
+    if tier == "new":
+        return float("inf")
+    last_scraped = _parse(history["last_scraped"])
+    overdue = (now - last_scraped).total_seconds() / (budgets[tier] * 3600)
+    expected_yield = 1 + history.get("jobs_matched", 0)
+    duration = max(history.get("avg_duration") or 0, 1.0)
+    return overdue * expected_yield * (1 - history.get("failure_rate", 0)) / duration
+
+
+def plan(site_configs, board_history, budgets=None, now=None, due_only=True):
+    """
+    Orders site configs for a run using their board_history rows.
+    With due_only, boards still inside their freshness budget are left out.
+    """
+    budgets = dict(DEFAULT_BUDGETS, **(budgets or {}))
+    now = now or datetime.datetime.now()
+    scheduled = []
+    for config in site_configs:
+        history = board_history.get(site_key(config))
+        if due_only and not is_due(history, now, budgets):
+            continue
+        scheduled.append((priority(history, now, budgets), config))
+    scheduled.sort(key=lambda item: item[0], reverse=True)
+    return [config for _, config in scheduled]
@@ -0,0 +1,26 @@
+import importlib
+
+# Scraper class for each site config "type", as "module:Class".
+# Classes are imported on first use, so a run that only scrapes API boards
+# never loads Selenium or BeautifulSoup.
+SCRAPER_CLASSES = {
+    "consider": "modules.api.consider:ConsiderApiSite",
+    "getro": "modules.selenium.getro:GetroSeleniumSite",
+    "greenhouse": "modules.api.greenhouse:GreenhouseApiSite",
+    "ventureloop": "modules.bsoup.ventureloop:VentureLoopJobSite",
+}
+
+_loaded = {}
+
+
+def get_scraper_class(site_type):
+    """Returns the scraper class registered for a site type, importing it if needed, or None if there is none."""
+    scraper_class = _loaded.get(site_type)
+    if scraper_class is None:
+        path = SCRAPER_CLASSES.get(site_type)
+        if not path:
+            return None
+        module_name, class_name = path.split(":")
+        scraper_class = getattr(importlib.import_module(module_name), class_name)
+        _loaded[site_type] = scraper_class
+    return scraper_class
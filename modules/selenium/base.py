@@ -1,3 +1,4 @@
+import logging
 import time 
 
 from selenium import webdriver
@@ -7,6 +8,10 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.action_chains import ActionChains
 
 from modules.base import JobSite
+from modules import metrics
+from modules.ratelimit import limiter
+
+logger = logging.getLogger(__name__)
 
 class SeleniumJobSite(JobSite):
     """Intermediate class for Selenium-based sites."""
@@ -19,13 +24,17 @@ class SeleniumJobSite(JobSite):
         options.add_argument("--disable-gpu")
         self.driver = webdriver.Chrome(options=options)
         try:
-            print(f"Scraping Selenium site {self.name}")
-            self.driver.get(self.url)
-            time.sleep(5)
+            logger.info("Scraping Selenium site %s", self.name)
+            with metrics.stage("fetch"):
+                limiter.wait(self.url)
+                self.driver.get(self.url)
+                metrics.record_request(0)
+                time.sleep(5)
             # Default behavior: return the page source.
             return self.driver.page_source
         except Exception as e:
-            print(f"Error scraping Selenium site {self.name}: {e}")
+            metrics.record_error(e)
+            logger.error("Error scraping Selenium site %s: %s", self.name, e)
             return None
         finally:
             self.driver.quit()
@@ -37,7 +46,7 @@ class SeleniumJobSite(JobSite):
                 click_target = element.find_element(how, what)
             except Exception as e:
                 if show_error:
-                    print('error finding element',  what, e)
+                    logger.debug("error finding element %s: %s", what, e)
                 return False
        
         try:
@@ -47,7 +56,7 @@ class SeleniumJobSite(JobSite):
             return True
         except Exception as e:
             if show_error:
-                print('error clicking element', how, what, e)
+                logger.debug("error clicking element %s %s: %s", how, what, e)
             return False
         return False
     
@@ -81,7 +90,7 @@ class SeleniumJobSite(JobSite):
             return element
         except Exception as e:
             if show_error:
-                print('error finding element', e)
+                logger.debug("error finding element %s: %s", what, e)
             return False
 
     def return_element_list_if_exists(self, element, how, what, check_displayed=True, show_error=False):
@@ -90,7 +99,7 @@ class SeleniumJobSite(JobSite):
             return elements
         except Exception as e:
             if show_error:
-                print('error finding element', e)
+                logger.debug("error finding element %s: %s", what, e)
             return False
 
     def return_text_if_exists(self, element, how=None, what=None):
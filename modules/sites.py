@@ -0,0 +1,218 @@
+import datetime
+import json
+import logging
+import os
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# The JSON config files per board type. They stay the hand-editable format; the
+# registry re-imports a file, adding and removing sites, whenever its size or
+# modification time changes.
+SITE_FILES = {
+    "consider": "consider_sites.json",
+    "getro": "getro_sites.json",
+    "greenhouse": "greenhouse_sites.json",
+    "ventureloop": "ventureloop_sites.json",
+}
+
+# Keys every site config has; anything else is kept in the 'config' column.
+SITE_FIELDS = ("id", "name", "type", "url")
+
+
+def _now():
+    return datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def create_site_tables(conn):
+    """
+    Creates the site registry: one row per board in 'sites', keyed by site_key
+    (see modules/db.py), and 'site_files' recording which JSON files were imported.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sites (
+            site_key TEXT PRIMARY KEY,
+            type TEXT NOT NULL,
+            id TEXT NOT NULL,
+            name TEXT,
+            url TEXT,
+            host TEXT,
+            config TEXT,
+            enabled INTEGER NOT NULL DEFAULT 1,
+            added_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            last_scraped TIMESTAMP,
+            last_status TEXT
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sites_type ON sites(type, enabled, last_scraped)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sites_due ON sites(enabled, last_scraped)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sites_id ON sites(id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sites_host ON sites(host)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS site_files (
+            path TEXT PRIMARY KEY,
+            size INTEGER,
+            mtime_ns INTEGER,
+            imported_at TIMESTAMP
+        )
+    ''')
+
+def _host(url):
+    try:
+        host = urlsplit(url or "").hostname
+    except ValueError:
+        return None
+    return host[4:] if host and host.startswith("www.") else host
+
+def upsert_sites(conn, site_configs):
+    """
+    Adds site configs to the registry or updates their name, url and extra keys.
+    The enabled flag and scrape metadata of known sites are left alone.
+    """
+    now = _now()
+    conn.executemany('''
+        INSERT INTO sites (site_key, type, id, name, url, host, config, added_at, updated_at)
+        VALUES (:site_key, :type, :id, :name, :url, :host, :config, :now, :now)
+        ON CONFLICT(site_key) DO UPDATE SET
+            name = excluded.name, url = excluded.url, host = excluded.host,
+            config = excluded.config, updated_at = excluded.updated_at
+    ''', [{
+        "site_key": f"{config['type']}:{config['id']}",
+        "type": config["type"],
+        "id": config["id"],
+        "name": config.get("name"),
+        "url": config.get("url"),
+        "host": _host(config.get("url")),
+        "config": json.dumps({k: v for k, v in config.items() if k not in SITE_FIELDS}) if set(config) - set(SITE_FIELDS) else None,
+        "now": now,
+    } for config in site_configs])
+    # Sites scraped before they were registered pick up their last scrape from board_history.
+    conn.execute('''
+        UPDATE sites SET last_scraped = (
+            SELECT last_scraped FROM board_history WHERE board_history.site_key = sites.site_key
+        ) WHERE last_scraped IS NULL AND site_key IN (SELECT site_key FROM board_history)
+    ''')
+    conn.commit()
+    return len(site_configs)
+
+def _config(row):
+    config = {"id": row[0], "name": row[1], "type": row[2], "url": row[3]}
+    if row[4]:
+        config.update(json.loads(row[4]))
+    return config
+
+def _where(types=None, not_scraped_within=None, host=None, enabled=True, now=None):
+    clauses, params = [], []
+    if enabled is not None:
+        clauses.append("enabled = ?")
+        params.append(int(enabled))
+    if types:
+        clauses.append(f"type IN ({','.join('?' for _ in types)})")
+        params.extend(types)
+    if host:
+        clauses.append("host = ?")
+        params.append(host)
+    if not_scraped_within is not None:
+        now = now or datetime.datetime.now()
+        cutoff = (now - datetime.timedelta(hours=not_scraped_within)).strftime("%Y-%m-%d %H:%M:%S")
+        clauses.append("(last_scraped IS NULL OR last_scraped < ?)")
+        params.append(cutoff)
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+def select_sites(conn, types=None, not_scraped_within=None, host=None, enabled=True, now=None):
+    """
+    Site configs from the registry in the order they were added, e.g. every greenhouse
+    board not scraped in a day: select_sites(conn, ["greenhouse"], not_scraped_within=24).
+    `not_scraped_within` is in hours; sites never scraped are always included.
+    `enabled=None` includes disabled sites.
+    """
+    where, params = _where(types, not_scraped_within, host, enabled, now)
+    cursor = conn.execute(f"SELECT id, name, type, url, config FROM sites {where} ORDER BY rowid", params)
+    return [_config(row) for row in cursor]
+
+def count_sites(conn, types=None, enabled=True):
+    where, params = _where(types, enabled=enabled)
+    return conn.execute(f"SELECT COUNT(*) FROM sites {where}", params).fetchone()[0]
+
+def site_ids(conn, site_type):
+    """Ids of every registered site of a type, enabled or not."""
+    return {row[0] for row in conn.execute("SELECT id FROM sites WHERE type = ?", (site_type,))}
+
+def set_enabled(conn, keys, enabled=True):
+    """Enables or disables sites by site_key. Returns the number of sites found."""
+    cursor = conn.executemany("UPDATE sites SET enabled = ? WHERE site_key = ?", [(int(enabled), key) for key in keys])
+    conn.commit()
+    return cursor.rowcount
+
+def mark_scraped(conn, key, when, status):
+    """Records a scrape attempt on a registered site. Left for the caller to commit."""
+    conn.execute("UPDATE sites SET last_scraped = ?, last_status = ? WHERE site_key = ?", (when, status, key))
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+def record_file(conn, path):
+    """Remembers the current size and mtime of a JSON file whose sites are all in the registry."""
+    size, mtime_ns = _stat(path)
+    conn.execute('''
+        INSERT INTO site_files (path, size, mtime_ns, imported_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, imported_at = excluded.imported_at
+    ''', (os.path.abspath(path), size, mtime_ns, _now()))
+    conn.commit()
+
+def import_json(conn, path, site_type=None):
+    """
+    Imports a JSON config file (a list of site configs). Returns the number of sites in it.
+    With `site_type` the file is the whole list for that type: registered sites of the type
+    missing from it are removed. Their board_history stays, so a site added back picks up
+    its last scrape again.
+    """
+    with open(path, encoding="utf-8") as f:
+        site_configs = json.load(f)
+    upsert_sites(conn, site_configs)
+    if site_type:
+        listed = {f"{config['type']}:{config['id']}" for config in site_configs}
+        removed = [(row[0],) for row in conn.execute("SELECT site_key FROM sites WHERE type = ?", (site_type,))
+                   if row[0] not in listed]
+        conn.executemany("DELETE FROM sites WHERE site_key = ?", removed)
+        conn.commit()
+        if removed:
+            logger.info("Removed %d %s sites no longer in %s", len(removed), site_type, path)
+    record_file(conn, path)
+    return len(site_configs)
+
+def sync_files(conn, types=None):
+    """
+    Imports the JSON config files (see SITE_FILES) of `types`, or of every type, that
+    changed since they were last imported. Returns the number of sites imported.
+    """
+    imported = 0
+    for site_type in types or SITE_FILES:
+        path = SITE_FILES[site_type]
+        stat = _stat(path)
+        if stat is None:
+            logger.warning("Config file %s does not exist. Skipping.", path)
+            continue
+        row = conn.execute("SELECT size, mtime_ns FROM site_files WHERE path = ?", (os.path.abspath(path),)).fetchone()
+        if row != stat:
+            count = import_json(conn, path, site_type)
+            logger.info("Imported %d sites from %s", count, path)
+            imported += count
+    return imported
+
+def export_json(conn, path, site_type):
+    """
+    Writes every registered site of a type, including disabled ones, to `path` in the
+    JSON config format, replacing the file atomically. Returns the number of sites.
+    """
+    site_configs = select_sites(conn, [site_type], enabled=None)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(site_configs, f, indent=4)
+    os.replace(path + ".tmp", path)
+    record_file(conn, path)
+    return len(site_configs)
@@ -0,0 +1,182 @@
+import json
+import os
+import sqlite3
+import time
+
+from modules.db import DATABASE_NAME, site_key
+
+# The queue can live in its own file (e.g. on storage shared by several hosts)
+# so workers never need to open the jobs database owned by the coordinator.
+QUEUE_DATABASE_NAME = os.environ.get("QUEUE_DATABASE_NAME", DATABASE_NAME)
+
+# WAL keeps its index in shared memory, which only works between processes on one host.
+# A queue in its own file may be shared over a network filesystem, so it uses the
+# rollback journal; a queue inside the jobs database stays in WAL like the rest of it.
+QUEUE_JOURNAL_MODE = "WAL" if QUEUE_DATABASE_NAME == DATABASE_NAME else "DELETE"
+
+# Seconds a claimed site stays leased without a heartbeat before another worker may take it.
+LEASE_SECONDS = 300
+
+# Give up on a site after this many claims (crashes or failures).
+MAX_ATTEMPTS = 3
+
+
+def create_queue(db_path=None, journal_mode=None):
+    """
+    Opens the work queue database, creating the 'work_queue' table if needed.
+    `journal_mode` defaults to QUEUE_JOURNAL_MODE.
+    """
+    conn = sqlite3.connect(db_path or QUEUE_DATABASE_NAME, timeout=30)
+    conn.execute(f"PRAGMA journal_mode={journal_mode or QUEUE_JOURNAL_MODE}")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS work_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT,
+            site_key TEXT,
+            site_config TEXT,
+            status TEXT DEFAULT 'pending',
+            worker_id TEXT,
+            lease_expires REAL,
+            heartbeat_at REAL,
+            attempts INTEGER DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            enqueued_at REAL,
+            finished_at REAL,
+            collected INTEGER DEFAULT 0,
+            UNIQUE(run_id, site_key)
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_work_queue_status ON work_queue(status, lease_expires)")
+    conn.commit()
+    return conn
+
+def enqueue(conn, run_id, site_configs):
+    """Adds site configs to the queue for a run. Sites already queued for the run are left alone."""
+    now = time.time()
+    cursor = conn.cursor()
+    cursor.executemany('''
+        INSERT OR IGNORE INTO work_queue (run_id, site_key, site_config, enqueued_at)
+        VALUES (?, ?, ?, ?)
+    ''', [(run_id, site_key(c), json.dumps(c), now) for c in site_configs])
+    conn.commit()
+    return cursor.rowcount
+
+def claim(conn, worker_id, lease_seconds=LEASE_SECONDS):
+    """
+    Leases the next available site to a worker.
+    Pending sites and sites whose lease expired (their worker died) are eligible.
+    Returns a dict with the queue item, or None if there is nothing to do.
+    """
+    now = time.time()
+    cursor = conn.cursor()
+    # IMMEDIATE takes the write lock up front so two workers cannot claim the same row.
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute('''
+            SELECT id, run_id, site_key, site_config, attempts FROM work_queue
+            WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?))
+              AND attempts < ?
+            ORDER BY id
+            LIMIT 1
+        ''', (now, MAX_ATTEMPTS))
+        row = cursor.fetchone()
+        if row is None:
+            conn.commit()
+            return None
+        cursor.execute('''
+            UPDATE work_queue
+            SET status = 'leased', worker_id = ?, lease_expires = ?, heartbeat_at = ?, attempts = attempts + 1
+            WHERE id = ?
+        ''', (worker_id, now + lease_seconds, now, row[0]))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return {
+        "id": row[0],
+        "run_id": row[1],
+        "site_key": row[2],
+        "site_config": json.loads(row[3]),
+        "attempts": row[4] + 1,
+    }
+
+def heartbeat(conn, item_id, worker_id, lease_seconds=LEASE_SECONDS):
+    """Extends a lease. Returns False if the worker no longer owns the item."""
+    now = time.time()
+    cursor = conn.cursor()
+    cursor.execute('''
+        UPDATE work_queue SET lease_expires = ?, heartbeat_at = ?
+        WHERE id = ? AND worker_id = ? AND status = 'leased'
+    ''', (now + lease_seconds, now, item_id, worker_id))
+    conn.commit()
+    return cursor.rowcount > 0
+
+def complete(conn, item_id, worker_id, result):
+    """Stores a worker's result. Returns False if the lease was lost to another worker."""
+    cursor = conn.cursor()
+    cursor.execute('''
+        UPDATE work_queue SET status = 'done', result = ?, finished_at = ?, lease_expires = NULL
+        WHERE id = ? AND worker_id = ? AND status = 'leased'
+    ''', (json.dumps(result), time.time(), item_id, worker_id))
+    conn.commit()
+    return cursor.rowcount > 0
+
+def fail(conn, item_id, worker_id, error):
+    """Releases a failed item for retry, or marks it failed once MAX_ATTEMPTS is reached."""
+    cursor = conn.cursor()
+    cursor.execute('''
+        UPDATE work_queue
+        SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+            error = ?, finished_at = ?, lease_expires = NULL
+        WHERE id = ? AND worker_id = ? AND status = 'leased'
+    ''', (MAX_ATTEMPTS, error, time.time(), item_id, worker_id))
+    conn.commit()
+    return cursor.rowcount > 0
+
+def expire_exhausted(conn):
+    """Marks items whose worker died on the final attempt as failed so they get collected."""
+    conn.execute('''
+        UPDATE work_queue SET status = 'failed', error = COALESCE(error, 'lease expired'), finished_at = ?
+        WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+    ''', (time.time(), time.time(), MAX_ATTEMPTS))
+    conn.commit()
+
+def fetch_finished(conn, run_id=None):
+    """Returns finished (done or failed) items that the coordinator has not collected yet."""
+    cursor = conn.cursor()
+    query = '''
+        SELECT id, run_id, site_key, site_config, status, result, error FROM work_queue
+        WHERE status IN ('done', 'failed') AND collected = 0
+    '''
+    params = ()
+    if run_id:
+        query += " AND run_id = ?"
+        params = (run_id,)
+    cursor.execute(query + " ORDER BY id", params)
+    return [{
+        "id": row[0],
+        "run_id": row[1],
+        "site_key": row[2],
+        "site_config": json.loads(row[3]),
+        "status": row[4],
+        "result": json.loads(row[5]) if row[5] else None,
+        "error": row[6],
+    } for row in cursor.fetchall()]
+
+def mark_collected(conn, item_ids):
+    conn.executemany("UPDATE work_queue SET collected = 1, result = NULL WHERE id = ?",
+                     [(item_id,) for item_id in item_ids])
+    conn.commit()
+
+def run_outstanding(conn, run_id):
+    """Returns how many items of a run are still waiting for or held by a worker."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM work_queue WHERE run_id = ? AND status IN ('pending', 'leased')", (run_id,))
+    return cursor.fetchone()[0]
+
+def queue_depth(conn):
+    """Returns a dict of item counts by status for items not yet collected."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT status, COUNT(*) FROM work_queue WHERE collected = 0 GROUP BY status")
+    return dict(cursor.fetchall())
@@ -5,192 +5,255 @@ Convert NFX scraping results (JSON lines format) to urls.csv for processing with
 Usage:
     python nfx_to_urls.py                           # Use default input/output
     python nfx_to_urls.py -i data/nfx.json -o urls.csv
-    python nfx_to_urls.py --unique                  # Only output unique domains
+    python nfx_to_urls.py --unique                  # Only output one URL per registrable domain
 """
 
 import json
 import csv
+import itertools
+import logging
 import os
 import argparse
-from urllib.parse import urlparse
+import re
+from collections import Counter
+
+from modules.log import add_log_arguments, setup_logging
+
+logger = logging.getLogger(__name__)
+
+# Social media and other non-company sites; subdomains (e.g. uk.linkedin.com) are skipped too.
+SKIP_DOMAINS = frozenset([
+    'linkedin.com', 'twitter.com', 'facebook.com',
+    'crunchbase.com', 'angellist.com', 'github.com',
+    'youtube.com', 'instagram.com', 'medium.com'
+])
+
+# Second-level suffixes under which organizations register a third label (example.co.uk).
+# A short list covering the countries in the NFX data rather than the full public suffix list.
+MULTI_PART_SUFFIXES = frozenset([
+    'co.uk', 'org.uk', 'ac.uk', 'co.jp', 'co.kr', 'co.in', 'co.il', 'co.nz', 'co.za', 'co.id',
+    'com.au', 'net.au', 'org.au', 'com.br', 'com.mx', 'com.ar', 'com.co', 'com.sg', 'com.hk',
+    'com.cn', 'com.tr', 'com.tw', 'com.my', 'com.ng', 'com.pk', 'com.ph', 'com.vn', 'com.ua',
+])
+
+EMPTY_VALUES = frozenset(['None', 'null', 'N/A', ''])
+
+# Anchored at a label boundary, so uk.linkedin.com is skipped but notlinkedin.com is not.
+_SKIPPED = re.compile(r"(?:^|\.)(?:%s)$" % "|".join(re.escape(domain) for domain in sorted(SKIP_DOMAINS)))
+
+# URL fields of a flat record, in the order they are preferred.
+URL_FIELDS = ('url', 'website', 'company_url')
+
+# URL fields as json.dumps writes them. An escaped quote can't precede the closing
+# one, so these never match inside another string value.
+_URL_KEYS = tuple(f'"{field}": ' for field in URL_FIELDS)
+
+# Optional scheme and user info, then the host up to a port, path, query or fragment.
+# Much cheaper than urlsplit(), which is most of the cost per line otherwise.
+_HOST = re.compile(r'(?:[a-zA-Z][a-zA-Z0-9+.-]*://)?(?:[^@/?#]*@)?([^:/?#\s]*)')
+
+
+def hostname(url):
+    """Lower-cased host of a URL without port or leading 'www.', or None if it has none."""
+    host = _HOST.match(url).group(1).lower().rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    return host if '.' in host else None
+
+def is_skipped(host):
+    """True if `host` is one of SKIP_DOMAINS or a subdomain of one."""
+    return _SKIPPED.search(host) is not None
+
+def registrable_domain(host):
+    """'jobs.example.co.uk' -> 'example.co.uk', 'a.b.example.com' -> 'example.com'."""
+    labels = host.split('.')
+    if len(labels) > 2 and '.'.join(labels[-2:]) in MULTI_PART_SUFFIXES:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+def url_of(line):
+    """
+    The URL field of one JSON line (None if it has none).
+    Flat records as json.dumps writes them are read with a few str.find calls instead of
+    parsing the whole line; anything else (nested objects, other spacing, escapes) is
+    parsed in full. Raises json.JSONDecodeError for lines that are not JSON.
+    """
+    if line.count('{') == 1:
+        found = False
+        for key in _URL_KEYS:
+            start = line.find(key)
+            if start < 0:
+                continue
+            start += len(key)
+            if line.startswith('null', start):
+                found = True
+                continue
+            end = line.find('"', start + 1) if line.startswith('"', start) else -1
+            if end < 0 or '\\' in line[start:end]:
+                found = False
+                break
+            found = True
+            if end > start + 1:
+                return line[start + 1:end]
+        if found:
+            return None
+    data = json.loads(line)
+    return data.get('url') or data.get('website') or data.get('company_url')
+
+def iter_urls(lines, unique_domains=False, stats=None):
+    """
+    Yields company URLs from NFX JSON lines, one line at a time.
+    Each URL's host is parsed once; social media URLs are dropped and, with
+    `unique_domains`, so is every URL whose registrable domain was already yielded.
+    Only the index of seen domains grows with the input.
+    Counts of lines, URLs, skipped and duplicate URLs are added to `stats` (a Counter).
+    """
+    counts = Counter()
+    seen_domains = set()
+    line_number = 0
+    try:
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                # Extract URL field (could be 'url' or 'website' depending on format)
+                url = url_of(line)
+            except json.JSONDecodeError as e:
+                logger.warning("Failed to parse JSON on line %d: %s", line_number, e)
+                counts['invalid'] += 1
+                continue
+            if not isinstance(url, str) or url.strip() in EMPTY_VALUES:
+                continue
+            url = url.strip()
+            host = hostname(url)
+            if host is None:
+                counts['invalid'] += 1
+                continue
+            if is_skipped(host):
+                counts['skipped'] += 1
+                continue
+            if unique_domains:
+                domain = registrable_domain(host)
+                if domain in seen_domains:
+                    counts['duplicates'] += 1
+                    continue
+                seen_domains.add(domain)
+            counts['urls'] += 1
+            yield url
+    finally:
+        counts['lines'] = line_number
+        if stats is not None:
+            stats.update(counts)
 
 def extract_urls_from_nfx_data(input_file, unique_domains=False):
     """
     Extract URLs from NFX investor data file (JSON lines format).
-    
+
     Args:
         input_file: Path to NFX JSON lines file
-        unique_domains: If True, only return one URL per domain
-    
+        unique_domains: If True, only return one URL per registrable domain
+
     Returns:
         List of URLs
     """
-    urls = []
-    seen_domains = set()
-    
     if not os.path.exists(input_file):
-        print(f"Error: Input file '{input_file}' not found")
-        return urls
-    
-    print(f"Reading NFX data from: {input_file}")
-    
-    try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            line_count = 0
-            for line in f:
-                line_count += 1
-                if not line.strip():
-                    continue
-                
-                try:
-                    # Parse JSON line
-                    data = json.loads(line)
-                    
-                    # Extract URL field (could be 'url' or 'website' depending on format)
-                    url = data.get('url') or data.get('website') or data.get('company_url')
-                    
-                    if url and url.strip():
-                        # Clean up the URL
-                        url = url.strip()
-                        
-                        # Skip if it's not a valid URL
-                        if url in ['None', 'null', 'N/A', '']:
-                            continue
-                        
-                        # Skip social media and other non-company URLs
-                        skip_domains = [
-                            'linkedin.com', 'twitter.com', 'facebook.com', 
-                            'crunchbase.com', 'angellist.com', 'github.com',
-                            'youtube.com', 'instagram.com', 'medium.com'
-                        ]
-                        
-                        if any(domain in url.lower() for domain in skip_domains):
-                            continue
-                        
-                        # If unique_domains is True, check if we've seen this domain
-                        if unique_domains:
-                            try:
-                                parsed = urlparse(url if url.startswith(('http://', 'https://')) else f'http://{url}')
-                                domain = parsed.netloc or parsed.path
-                                domain = domain.lower()
-                                
-                                if domain in seen_domains:
-                                    continue
-                                
-                                seen_domains.add(domain)
-                            except:
-                                pass
-                        
-                        urls.append(url)
-                        
-                        # Also check for LinkedIn URL that might contain company website
-                        linkedin = data.get('linkedin')
-                        if linkedin and '/company/' in linkedin:
-                            # Some LinkedIn company pages might have websites, but we'll skip these
-                            pass
-                
-                except json.JSONDecodeError as e:
-                    print(f"  Warning: Failed to parse JSON on line {line_count}: {e}")
-                    continue
-                except Exception as e:
-                    print(f"  Warning: Error processing line {line_count}: {e}")
-                    continue
-        
-        print(f"Processed {line_count} lines")
-        print(f"Found {len(urls)} valid URLs")
-        if unique_domains:
-            print(f"Unique domains: {len(seen_domains)}")
-            
-    except Exception as e:
-        print(f"Error reading file: {e}")
-    
-    return urls
+        logger.error("Input file '%s' not found", input_file)
+        return []
+    with open(input_file, 'r', encoding='utf-8') as f:
+        return list(iter_urls(f, unique_domains))
 
 def save_urls_to_csv(urls, output_file):
     """
-    Save URLs to CSV file with 'urls' as header.
-    
+    Streams URLs to a CSV file with 'urls' as header.
+    The file is only replaced once every URL has been written.
+
     Args:
-        urls: List of URLs
+        urls: Iterable of URLs
         output_file: Path to output CSV file
+
+    Returns:
+        Number of URLs saved
     """
-    if not urls:
-        print("No URLs to save")
-        return False
-    
-    try:
-        with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile)
-            # Write header
-            writer.writerow(['urls'])
-            # Write URLs
-            for url in urls:
-                writer.writerow([url])
-        
-        print(f"\nSuccessfully saved {len(urls)} URLs to: {output_file}")
-        return True
-        
-    except Exception as e:
-        print(f"Error saving CSV: {e}")
-        return False
+    count = 0
+    with open(output_file + '.tmp', 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['urls'])
+        for url in urls:
+            writer.writerow([url])
+            count += 1
+    if count:
+        os.replace(output_file + '.tmp', output_file)
+    else:
+        os.remove(output_file + '.tmp')
+    return count
 
 def main():
     parser = argparse.ArgumentParser(
         description='Convert NFX investor data to urls.csv for find_listings.py',
         formatter_class=argparse.ArgumentDefaultsHelpFormatter
     )
-    
+
     parser.add_argument(
         '-i', '--input',
         default='data/nfx-investors-api-2.json',
         help='Input NFX JSON lines file'
     )
-    
+
     parser.add_argument(
         '-o', '--output',
         default='urls.csv',
         help='Output CSV file'
     )
-    
+
     parser.add_argument(
         '--unique',
         action='store_true',
-        help='Only output one URL per unique domain'
+        help='Only output one URL per registrable domain'
     )
-    
+
     parser.add_argument(
         '--preview',
         type=int,
         metavar='N',
-        help='Preview first N URLs without saving'
+        help='Preview first N URLs before saving'
     )
-    
+
+    add_log_arguments(parser)
     args = parser.parse_args()
-    
-    # Extract URLs from NFX data
-    urls = extract_urls_from_nfx_data(args.input, unique_domains=args.unique)
-    
-    if not urls:
-        print("No URLs found to process")
+    setup_logging(args.log_level, args.log_format)
+
+    if not os.path.exists(args.input):
+        logger.error("Input file '%s' not found", args.input)
         return
-    
-    # Preview mode
-    if args.preview:
-        print(f"\nPreview of first {args.preview} URLs:")
-        print("-" * 60)
-        for i, url in enumerate(urls[:args.preview], 1):
-            print(f"{i:3}. {url}")
-        if len(urls) > args.preview:
-            print(f"... and {len(urls) - args.preview} more")
-        print("-" * 60)
-        response = input("\nProceed to save? (y/n): ")
-        if response.lower() != 'y':
-            print("Cancelled")
-            return
-    
-    # Save to CSV
-    save_urls_to_csv(urls, args.output)
-    
+
+    logger.info("Reading NFX data from: %s", args.input)
+    stats = Counter()
+    with open(args.input, 'r', encoding='utf-8') as f:
+        urls = iter_urls(f, unique_domains=args.unique, stats=stats)
+
+        # Preview mode
+        if args.preview:
+            head = list(itertools.islice(urls, args.preview))
+            print(f"\nPreview of first {len(head)} URLs:")
+            print("-" * 60)
+            for i, url in enumerate(head, 1):
+                print(f"{i:3}. {url}")
+            print("-" * 60)
+            response = input("\nProceed to save? (y/n): ")
+            if response.lower() != 'y':
+                print("Cancelled")
+                return
+            urls = itertools.chain(head, urls)
+
+        saved = save_urls_to_csv(urls, args.output)
+
+    logger.info("Processed %d lines: %d URLs, %d social media URLs skipped, %d duplicate domains, %d invalid",
+                stats['lines'], stats['urls'], stats['skipped'], stats['duplicates'], stats['invalid'])
+    if not saved:
+        logger.warning("No URLs found to process")
+        return
+    logger.info("Successfully saved %d URLs to: %s", saved, args.output)
+
     # Show summary
     print("\nYou can now run:")
     print(f"  python find_listings.py -c")
@@ -198,4 +261,4 @@ def main():
     print(f"  python find_listings.py -c --no-skip-domains  # Process all URLs even if domain exists")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
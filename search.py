@@ -1,100 +1,299 @@
-import difflib
-import json
-import os
-import requests
-import sqlite3
+import logging
 import time
 
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
 from dotenv import load_dotenv
-from modules.db import create_db, save_job
-from modules.api.consider import ConsiderApiSite
-from modules.selenium.getro import GetroSeleniumSite
-from modules.api.greenhouse import GreenhouseApiSite
-from modules.bsoup.ventureloop import VentureLoopJobSite
-from pprint import pprint as pp
+from modules.db import (
+    create_db, save_jobs, site_key, start_run, latest_unfinished_run, reopen_run,
+    get_run_site_keys, mark_site_started, mark_site_finished, mark_site_failed, finish_run,
+    get_board_history, record_board_result, reconcile_board, archive_closed_jobs, save_scrape_metrics,
+)
+from modules.log import add_log_arguments, setup_logging
+from modules.metrics import ScrapeMetrics, emit
+from modules.profiling import add_profile_arguments, profiled, profiler_from_args
+from modules.scheduler import DEFAULT_BUDGETS, plan
+from modules.scrapers import get_scraper_class
+from modules.sites import count_sites, select_sites, sync_files
+from modules.workqueue import (
+    create_queue, enqueue, expire_exhausted, fetch_finished, mark_collected, queue_depth, run_outstanding,
+)
 
 # Load environment variables from a local .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 APP_CONFIG = {
     "positive_terms": ["vp of product", "head of product", "chief product officer", "vp product", "svp product", "cpo"],
     "negative_terms": ["Product Design", "Product Marketing", "Product Development", "Product Engineering", "Product Operations", "Product Insights", "Production", "Product Compliance", "Product Analytics", "Product Ops", "Chief of Staff", "Product Sales"],
     "location_terms" : ["new york", "ny","USA","United States","US","NYC"],
     "remote" : True,
-}
-
-SCRAPER_CLASSES = {
-    "consider": ConsiderApiSite,
-    "getro": GetroSeleniumSite,
-    "greenhouse": GreenhouseApiSite,
-    "ventureloop": VentureLoopJobSite,
+    # Skip jobs whose listed salary tops out below this (annual). Jobs without a salary are kept.
+    "min_salary": None,
+    # Hours between scrapes per board tier, see modules/scheduler.py
+    "freshness_budgets": {"high": 1, "normal": 24, "dormant": 168, "failing": 72},
+    # Jobs closed (no longer listed on any board) for this many days move to the archive tables
+    "archive_after_days": 30,
 }
 
 
-SITE_CONFIGS = []
-
-CONFIG_FILES = [
-    #'ventureloop_sites.json',
-    #'consider_sites.json',
-    #'greenhouse_sites.json',
-    'getro_sites.json',
+# Board types to scrape from the site registry (modules/sites.py). Individual
+# sites can be switched off with `python site_registry.py disable TYPE:ID`.
+SITE_TYPES = [
+    #'ventureloop',
+    #'consider',
+    #'greenhouse',
+    'getro',
 ]
-#CONFIG_FILES = ['test_site_configs.json']
 
-for config_file in CONFIG_FILES:
-    if os.path.exists(config_file):
-        with open(config_file) as f:
-            SITE_CONFIGS.extend(json.load(f))
-    else:
-        print(f"Config file {config_file} does not exist. Skipping.")
 
+def load_site_configs(conn, due_only=True):
+    """
+    Enabled sites of SITE_TYPES in the order they should be scraped, after importing any
+    edited JSON config files into the registry. With due_only, sites scraped within the
+    shortest freshness budget are already left out by the registry query.
+    """
+    sync_files(conn)
+    budgets = dict(DEFAULT_BUDGETS, **(APP_CONFIG.get("freshness_budgets") or {}))
+    site_configs = select_sites(conn, SITE_TYPES, not_scraped_within=min(budgets.values()) if due_only else None)
+    return plan(site_configs, get_board_history(conn), budgets, due_only=due_only)
 
 
 # ====================
 # Main Processing
 # ====================
-def main():
+def run_scraper(site_config, metrics=None):
+    """
+    Scrapes a single site and applies its filters.
+    Stage timings, requests and errors are added to `metrics` when given.
+    Returns (jobs, matching_jobs), or None if the site could not be scraped.
+    """
+    metrics = metrics or ScrapeMetrics(site_key(site_config))
+    site_config = dict(site_config)
+    site_type = site_config.pop("type")
+    site_name = site_config.get("name")
+    scraper_class = get_scraper_class(site_type)
+    if not scraper_class:
+        logger.warning("No scraper class defined for type '%s' (site: %s). Skipping.", site_type, site_name)
+        return None
+
+    logger.info("Processing site: %s (type: %s)", site_name, site_type)
+    scraper = scraper_class(app_config = APP_CONFIG, **site_config)
+    scraper.transform = metrics.timed("transform", scraper.transform)
+
+    jobs = metrics.scrape(scraper.scrape)
+    if jobs is None:
+        logger.error("Failed to scrape data from %s.", site_name)
+        return None
+
+    with metrics.stage("filter"):
+        matching = [job for job in jobs if scraper.should_save_job(job)]
+    metrics.jobs = len(jobs)
+    metrics.matching = len(matching)
+    return jobs, matching
+
+def save_results(conn, key, matching, job_ids, metrics):
+    """
+    Saves a board's matching jobs and closes the ones it no longer lists, timed as the save stage.
+    `key` is the board's site key; bare ids are shared by boards of different types.
+    """
+    with metrics.stage("save"):
+        save_jobs(conn, matching, key)
+        # An empty scrape is more likely a broken selector than a board with no jobs.
+        if job_ids:
+            closed = reconcile_board(conn, key, job_ids)
+            logger.info("Closed %d jobs no longer listed on %s", closed, key)
+
+def scrape_site(conn, site_config, metrics=None):
+    """
+    Scrapes a single site and saves the jobs that pass its filters.
+    Returns (jobs, jobs_saved), or None if the site could not be scraped.
+    """
+    metrics = metrics or ScrapeMetrics(site_key(site_config))
+    result = run_scraper(site_config, metrics)
+    if result is None:
+        return None
+
+    jobs, matching = result
+    save_results(conn, site_key(site_config), matching, [job.get("job_id") for job in jobs], metrics)
+    return jobs, len(matching)
+
+def report_metrics(conn, metrics, status):
+    """Finishes a site's metrics, stores them in scrape_metrics and appends them to the JSON lines log."""
+    metrics.finish(status)
+    save_scrape_metrics(conn, metrics)
+    emit(metrics)
+
+def enqueue_run(conn, queue_conn, scrape_all=False):
+    """Starts a run and puts its due sites on the work queue for worker.py processes."""
+    site_configs = load_site_configs(conn, due_only=not scrape_all)
+    run_id = start_run(conn, site_configs)
+    added = enqueue(queue_conn, run_id, site_configs)
+    logger.info("Queued %d sites for run %s", added, run_id)
+    return run_id
+
+def collect_results(conn, queue_conn, run_id=None):
+    """
+    Saves results that workers wrote back to the queue into the jobs database.
+    Returns the ids of the runs whose results were collected.
+    """
+    expire_exhausted(queue_conn)
+    items = fetch_finished(queue_conn, run_id)
+    runs = set()
+    for item in items:
+        key = item["site_key"]
+        runs.add(item["run_id"])
+        result = item["result"]
+        if item["status"] != "done" or result is None:
+            logger.error("Site %s failed on workers: %s", key, item["error"])
+            mark_site_failed(conn, item["run_id"], key, item["error"])
+            record_board_result(conn, key, 0, failed=True)
+            metrics = ScrapeMetrics(key, item["run_id"])
+            metrics.add_error((item["error"] or "scrape failed").split(":")[0])
+            report_metrics(conn, metrics, "failed")
+            continue
+
+        # Workers send the metrics of their scrape; the save stage happens here.
+        metrics = ScrapeMetrics.from_dict(result["metrics"]) if result.get("metrics") else ScrapeMetrics(key)
+        metrics.run_id = item["run_id"]
+        save_results(conn, key, result["jobs"], result["job_ids"], metrics)
+        if metrics.duration is not None:
+            metrics.duration += metrics.stages["save"]
+        report_metrics(conn, metrics, "ok")
+        mark_site_finished(conn, item["run_id"], key, len(result["job_ids"]), len(result["jobs"]))
+        record_board_result(conn, key, result["duration"], job_ids=result["job_ids"], matched=len(result["jobs"]))
+        logger.info("Collected %d matching jobs from %s", len(result["jobs"]), key)
+    mark_collected(queue_conn, [item["id"] for item in items])
+    return runs
+
+def coordinate(conn, queue_conn, run_id, poll_seconds=10):
+    """Collects worker results for a run until nothing is left pending or leased."""
+    while True:
+        collect_results(conn, queue_conn, run_id)
+        outstanding = run_outstanding(queue_conn, run_id)
+        if not outstanding:
+            break
+        logger.info("Waiting on %d sites for run %s: %s", outstanding, run_id, queue_depth(queue_conn))
+        time.sleep(poll_seconds)
+    status = finish_run(conn, run_id)
+    logger.info("Run %s %s.", run_id, status)
+    archive_closed_jobs(conn, APP_CONFIG.get("archive_after_days", 30))
+
+def main(resume=None, retry_failed=False, scrape_all=False, profiler=None):
+    """Scrapes the run's sites here. With a `profiler`, each site is profiled separately."""
     conn = create_db()
+
+    run_id = None
+    if resume:
+        run_id = latest_unfinished_run(conn) if resume == "latest" else resume
+        if run_id:
+            reopen_run(conn, run_id, retry_failed=retry_failed)
+            logger.info("Resuming run %s", run_id)
+        else:
+            logger.info("No unfinished run to resume. Starting a new run.")
+    if not run_id:
+        site_configs = load_site_configs(conn, due_only=not scrape_all)
+        run_id = start_run(conn, site_configs)
+        logger.info("Starting run %s: %d of %d sites are due", run_id, len(site_configs), count_sites(conn, SITE_TYPES))
+    else:
+        site_configs = load_site_configs(conn, due_only=False)
+
+    pending = get_run_site_keys(conn, run_id, ("pending",))
+    logger.info("%d sites left to scrape in this run", len(pending))
+
     total_jobs_checked = 0
     total_jobs_saved = 0
-    for site_config in SITE_CONFIGS:
-        site_type = site_config.pop("type")
+    for site_config in site_configs:
+        key = site_key(site_config)
+        if key not in pending:
+            continue
+        pending.discard(key)
         site_name = site_config.get("name")
-        scraper_class = SCRAPER_CLASSES.get(site_type)
-        if not scraper_class:
-            print(f"No scraper class defined for type '{site_type}' (site: {site_name}). Skipping.")
+
+        mark_site_started(conn, run_id, key)
+        started = time.monotonic()
+        metrics = ScrapeMetrics(key, run_id)
+        try:
+            with profiled(profiler, key):
+                result = scrape_site(conn, site_config, metrics)
+        except Exception as e:
+            logger.error("Error processing site %s: %s", site_name, e)
+            mark_site_failed(conn, run_id, key, f"{e.__class__.__name__}: {e}")
+            record_board_result(conn, key, time.monotonic() - started, failed=True)
+            metrics.add_error(e)
+            report_metrics(conn, metrics, "failed")
             continue
-        
-        print("")
-        print(f"Processing site: {site_name} (type: {site_type})")
-        #if site_type == "consider":
-        #    continue
-        scraper = scraper_class(app_config = APP_CONFIG, **site_config)
-    
-        jobs = scraper.scrape()
-        
-        if jobs is not None:
-            total_jobs_checked += len(jobs)
-            print(f"Found {len(jobs)} jobs for {site_name}. Total jobs checked: {total_jobs_checked}")
-            saved = 0
-            for job in jobs:
-                if scraper.should_save_job(job):
-                    saved += 1
-                    save_job(conn, job)
-            
-            total_jobs_saved += saved
-            print(f"Saved {saved} jobs for {site_name}. Total saved jobs: {total_jobs_saved}")
-        else:
-            print(f"Failed to scrape data from {site_name}.")
-      
-    
+
+        if result is None:
+            mark_site_failed(conn, run_id, key, "scrape failed")
+            record_board_result(conn, key, time.monotonic() - started, failed=True)
+            report_metrics(conn, metrics, "failed")
+            continue
+        report_metrics(conn, metrics, "ok")
+
+        jobs, saved = result
+        found = len(jobs)
+        mark_site_finished(conn, run_id, key, found, saved)
+        record_board_result(conn, key, time.monotonic() - started,
+                            job_ids=[job.get("job_id") for job in jobs], matched=saved)
+        total_jobs_checked += found
+        total_jobs_saved += saved
+        logger.info("Found %d jobs for %s, saved %d. Totals: %d checked, %d saved",
+                    found, site_name, saved, total_jobs_checked, total_jobs_saved)
+
+    status = finish_run(conn, run_id)
+    logger.info("Run %s %s.", run_id, status)
+    archive_closed_jobs(conn, APP_CONFIG.get("archive_after_days", 30))
+    if status != "finished":
+        logger.info("Resume with: python search.py --resume %s [--retry-failed]", run_id)
+
     cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM jobs")
+    cursor.execute("SELECT COUNT(*) FROM canonical_jobs")
     count = cursor.fetchone()[0]
-    summary = f"Job Scraper Summary:\n\nTotal number of jobs in the database: {count}"
-    print(summary)
+    logger.info("Job Scraper Summary: total number of jobs in the database: %d", count)
     
     conn.close()
 
 if __name__ == "__main__":
-    main()
+    parser = ArgumentParser(formatter_class=ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--resume", nargs="?", const="latest", metavar="RUN_ID",
+                        help="Resume an interrupted run (the latest unfinished one if no id is given)")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="When resuming, also retry sites that failed")
+    parser.add_argument("--all", action="store_true", dest="scrape_all",
+                        help="Scrape every configured site, ignoring freshness budgets")
+    parser.add_argument("--enqueue", action="store_true",
+                        help="Queue the run for worker.py processes and collect their results instead of scraping here")
+    parser.add_argument("--collect", nargs="?", const="latest", metavar="RUN_ID",
+                        help="Collect worker results for a queued run (the latest unfinished one if no id is given)")
+    add_profile_arguments(parser, "site")
+    add_log_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(args.log_level, args.log_format)
+    profiler = profiler_from_args(args)
+
+    if args.enqueue or args.collect:
+        with profiled(profiler, "run"):
+            conn = create_db()
+            queue_conn = create_queue()
+            if args.enqueue:
+                run_id = enqueue_run(conn, queue_conn, scrape_all=args.scrape_all)
+            else:
+                run_id = latest_unfinished_run(conn) if args.collect == "latest" else args.collect
+            if run_id:
+                coordinate(conn, queue_conn, run_id)
+            queue_conn.close()
+            conn.close()
+        if profiler:
+            profiler.summary()
+        raise SystemExit
+
+    resume = args.resume
+    if args.retry_failed and not resume:
+        resume = "latest"
+
+    with profiled(profiler if args.profile == "run" else None, "run"):
+        main(resume=resume, retry_failed=args.retry_failed, scrape_all=args.scrape_all,
+             profiler=profiler if args.profile == "site" else None)
+    if profiler:
+        profiler.summary()
@@ -0,0 +1,54 @@
+"""
+Manages the site registry (the 'sites' table in the jobs database) that search.py scrapes from.
+
+Usage:
+    python site_registry.py import                         # re-import every *_sites.json file
+    python site_registry.py export                         # write the registry back to the *_sites.json files
+    python site_registry.py list -t greenhouse --stale 24  # greenhouse boards not scraped in 24 hours
+    python site_registry.py disable getro:acme             # stop scraping a site without deleting it
+"""
+import logging
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
+
+from modules.db import create_db
+from modules.log import add_log_arguments, setup_logging
+from modules.sites import SITE_FILES, export_json, import_json, select_sites, set_enabled
+
+logger = logging.getLogger(__name__)
+
+if __name__ == "__main__":
+    parser = ArgumentParser(formatter_class=ArgumentDefaultsHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="Import JSON config files, whether or not they changed")
+    import_parser.add_argument("files", nargs="*", help="Files whose sites to add (default: every *_sites.json file, which replaces the sites of its type)")
+    export_parser = commands.add_parser("export", help="Write registered sites to their type's JSON config file")
+    export_parser.add_argument("-t", "--types", nargs="+", choices=list(SITE_FILES), help="Only these types")
+    list_parser = commands.add_parser("list", help="Print registered sites")
+    list_parser.add_argument("-t", "--types", nargs="+", choices=list(SITE_FILES), help="Only these types")
+    list_parser.add_argument("--stale", type=float, metavar="HOURS", help="Only sites not scraped in this many hours")
+    list_parser.add_argument("--host", help="Only sites on this host")
+    list_parser.add_argument("--disabled", action="store_true", help="List disabled sites instead")
+    for name in ("enable", "disable"):
+        commands.add_parser(name, help=f"{name.title()} sites").add_argument("keys", nargs="+", metavar="TYPE:ID")
+    add_log_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(args.log_level, args.log_format)
+
+    conn = create_db()
+    if args.command == "import":
+        # Named files only add sites; the *_sites.json files replace the sites of their type.
+        imports = [(path, None) for path in args.files] or [(path, site_type) for site_type, path in SITE_FILES.items()]
+        for path, site_type in imports:
+            logger.info("Imported %d sites from %s", import_json(conn, path, site_type), path)
+    elif args.command == "export":
+        for site_type in args.types or SITE_FILES:
+            logger.info("Exported %d sites to %s", export_json(conn, SITE_FILES[site_type], site_type),
+                        SITE_FILES[site_type])
+    elif args.command == "list":
+        for site in select_sites(conn, args.types, not_scraped_within=args.stale, host=args.host,
+                                 enabled=not args.disabled):
+            print(f"{site['type']}:{site['id']}\t{site['name']}\t{site['url']}")
+    else:
+        found = set_enabled(conn, args.keys, enabled=args.command == "enable")
+        logger.info("%sd %d of %d sites", args.command.title(), found, len(args.keys))
+    conn.close()
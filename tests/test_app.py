@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+import modules.db as db
+from modules.db_pool import ConnectionPool
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def job(job_id, title, company_name):
+    return {
+        "site_id": "a",
+        "job_id": job_id,
+        "source_url": "https://a.example.com/jobs",
+        "title": title,
+        "company_name": company_name,
+        "apply_url": f"https://boards.greenhouse.io/a/jobs/{job_id}",
+        "remote": True,
+    }
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DATABASE_NAME", str(tmp_path / "jobs.db"))
+    conn = db.create_db()
+    db.save_jobs(conn, [job("1", "VP of Product", "Acme"), job("2", "Head of Engineering", "Beta")], "greenhouse:a")
+    conn.close()
+    pool = ConnectionPool(db.DATABASE_NAME)
+    monkeypatch.setattr(app, "pool", pool)
+    monkeypatch.setattr(app, "queue_pool", pool)
+    monkeypatch.setattr(app, "response_cache", app.ResponseCache())
+    # Templates are looked up relative to the working directory.
+    monkeypatch.chdir(ROOT)
+    with TestClient(app.app) as client:
+        yield client
+
+def statuses():
+    conn = sqlite3.connect(db.DATABASE_NAME)
+    try:
+        return dict(conn.execute("SELECT title, status FROM canonical_jobs").fetchall())
+    finally:
+        conn.close()
+
+def test_unchanged_responses_are_not_modified(client):
+    response = client.get("/api/stats")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    last_modified = response.headers["last-modified"]
+
+    response = client.get("/api/stats", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert client.get("/api/stats", headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get("/api/stats", headers={"If-None-Match": 'W/"0"'}).status_code == 200
+
+def test_cached_responses_are_dropped_when_the_change_counter_moves(client):
+    response = client.get("/api/stats")
+    etag = response.headers["etag"]
+    assert response.json()["by_status"] == {"": {"jobs": 2, "open_jobs": 2}}
+    counter = db.get_change_state(app.pool.reader())[0]
+    assert app.response_cache.get(counter, "stats?") is not None
+
+    client.put("/update_status/bulk", json={"status": "applied", "company_name": "acme"})
+
+    response = client.get("/api/stats", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["by_status"] == {"": {"jobs": 1, "open_jobs": 1}, "applied": {"jobs": 1, "open_jobs": 1}}
+
+def test_index_is_streamed_and_then_cached(client, monkeypatch):
+    rendered = []
+    render_index = app.render_index
+    monkeypatch.setattr(app, "render_index", lambda request: rendered.append(1) or render_index(request))
+
+    response = client.get("/")
+    assert response.status_code == 200
+    # Streamed bodies go out without a Content-Length; the cached copy has one.
+    assert "content-length" not in response.headers
+    assert "VP of Product" in response.text and "Head of Engineering" in response.text
+
+    cached = client.get("/")
+    assert cached.text == response.text
+    assert "content-length" in cached.headers
+    assert rendered == [1]
+
+def test_batch_status_update_by_canonical_id_and_board_job_id(client):
+    ids = {row["title"]: row["id"] for row in client.get("/api/search", params={"q": "product"}).json()["results"]}
+    response = client.put("/update_status/batch", json={"updates": [
+        {"job_id": ids["VP of Product"], "status": "applied"},
+        {"job_id": "2", "site_key": "greenhouse:a", "status": "rejected"},
+    ]})
+    assert response.json() == {"success": True, "updated": 2}
+    assert statuses() == {"VP of Product": "applied", "Head of Engineering": "rejected"}
+
+def test_bulk_status_update_needs_a_filter(client):
+    response = client.put("/update_status/bulk", json={"status": "rejected"})
+    assert response.status_code == 400
+    assert statuses() == {"VP of Product": "", "Head of Engineering": ""}
+
+    response = client.put("/update_status/bulk", json={"status": "rejected", "site_key": "greenhouse:a",
+                                                        "title_contains": "engineering"})
+    assert response.json() == {"success": True, "updated": 1}
+    assert statuses() == {"VP of Product": "", "Head of Engineering": "rejected"}
+
+def test_status_update_of_unknown_job_is_404(client):
+    assert client.put("/update_status", json={"job_id": "missing", "status": "applied"}).status_code == 404
+    response = client.put("/update_status", json={"job_id": "1", "site_key": "greenhouse:a", "status": "applied"})
+    assert response.json() == {"success": True}
+
+def test_search_and_stats(client):
+    body = client.get("/api/search", params={"q": "product", "page_size": 10}).json()
+    assert body["total"] == 1 and body["page"] == 1 and body["page_size"] == 10
+    assert [row["title"] for row in body["results"]] == ["VP of Product"]
+    assert client.get("/api/search", params={"q": "product", "page": 0}).status_code == 422
+
+    stats = client.get("/api/stats", params={"since": "2000-01-01"}).json()
+    assert stats["jobs"] == 2 and stats["open_jobs"] == 2 and stats["new_since"] == 2
+    assert stats["by_site"] == [{"site_key": "greenhouse:a", "sightings": 2, "open_sightings": 2}]
+    assert [company["company_name"] for company in stats["by_company"]] == ["Acme", "Beta"]
+    assert client.get("/api/stats", params={"since": "yesterday"}).status_code == 422
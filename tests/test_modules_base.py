@@ -74,3 +74,9 @@ def test_should_save_job_fails_remote_and_location(jobsite):
         "title": "Software Engineer"
     }
     assert jobsite.should_save_job(job) is False
+
+def test_salary_check(app_config):
+    jobsite = JobSite(id="test", name="TestSite", url="https://example.com", app_config=dict(app_config, min_salary=150000))
+    assert jobsite.salary_check({"salary_min": 120000, "salary_max": 160000}) is True
+    assert jobsite.salary_check({"salary_min": 90000, "salary_max": 120000}) is False
+    assert jobsite.salary_check({}) is True
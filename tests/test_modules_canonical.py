@@ -0,0 +1,43 @@
+from modules.canonical import job_fingerprint, normalize_company, normalize_url
+
+
+def job(**overrides):
+    record = {
+        "site_id": "board-a",
+        "source_url": "https://jobs.board-a.com/api-boards/search-jobs",
+        "job_id": "1",
+        "title": "VP of Product",
+        "company_name": "Acme, Inc.",
+        "apply_url": "https://boards.greenhouse.io/acme/jobs/123?gh_src=board-a",
+    }
+    record.update(overrides)
+    return record
+
+def test_normalize_company_drops_legal_suffixes():
+    assert normalize_company("Acme, Inc.") == "acme"
+    assert normalize_company("ACME Corp") == "acme"
+
+def test_normalize_url_drops_scheme_www_query_and_slash():
+    assert normalize_url("https://www.Example.com/Jobs/1/?ref=x#top") == "example.com/jobs/1"
+
+def test_same_posting_on_two_boards_shares_fingerprint():
+    other_board = job(site_id="board-b", job_id="xyz", company_name="ACME",
+                      source_url="https://careers.board-b.vc/jobs",
+                      apply_url="http://boards.greenhouse.io/acme/jobs/123?gh_src=board-b")
+    assert job_fingerprint(job()) == job_fingerprint(other_board)
+
+def test_board_hosted_apply_urls_are_ignored():
+    a = job(source_url="https://careers.a.vc/jobs", apply_url="https://careers.a.vc/companies/acme/jobs/1-vp")
+    b = job(source_url="https://careers.b.vc/jobs", apply_url="https://careers.b.vc/companies/acme/jobs/9-vp")
+    assert job_fingerprint(a) == job_fingerprint(b)
+
+def test_board_hosted_postings_in_different_locations_differ():
+    nyc = job(source_url="https://careers.a.vc/jobs", apply_url="https://careers.a.vc/companies/acme/jobs/1-vp",
+              location_city="New York")
+    london = dict(nyc, job_id="2", apply_url="https://careers.a.vc/companies/acme/jobs/2-vp", location_city="London")
+    assert job_fingerprint(nyc) != job_fingerprint(london)
+    other_board = dict(nyc, source_url="https://careers.b.vc/jobs", apply_url="https://careers.b.vc/companies/acme/jobs/7")
+    assert job_fingerprint(nyc) == job_fingerprint(other_board)
+
+def test_different_titles_differ():
+    assert job_fingerprint(job()) != job_fingerprint(job(title="Head of Product"))
@@ -0,0 +1,352 @@
+import sqlite3
+import pytest
+import modules.db as db
+from modules.job import Job
+from modules.metrics import ScrapeMetrics
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DATABASE_NAME", str(tmp_path / "jobs.db"))
+    conn = db.create_db()
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def site_configs():
+    return [
+        {"id": "a", "name": "A", "type": "greenhouse", "url": "https://a.example.com"},
+        {"id": "b", "name": "B", "type": "consider", "url": "https://b.example.com"},
+        {"id": "c", "name": "C", "type": "getro", "url": "https://c.example.com"},
+    ]
+
+def test_start_run_marks_all_sites_pending(conn, site_configs):
+    run_id = db.start_run(conn, site_configs)
+    assert db.get_run_site_keys(conn, run_id, ("pending",)) == {"greenhouse:a", "consider:b", "getro:c"}
+
+def test_interrupted_run_resumes_unfinished_sites(conn, site_configs):
+    run_id = db.start_run(conn, site_configs)
+    db.mark_site_started(conn, run_id, "greenhouse:a")
+    db.mark_site_finished(conn, run_id, "greenhouse:a", 10, 1)
+    db.mark_site_started(conn, run_id, "consider:b")
+    # crash while scraping consider:b
+
+    assert db.latest_unfinished_run(conn) == run_id
+    db.reopen_run(conn, run_id)
+    assert db.get_run_site_keys(conn, run_id, ("pending",)) == {"consider:b", "getro:c"}
+
+def test_failed_sites_only_retried_on_request(conn, site_configs):
+    run_id = db.start_run(conn, site_configs)
+    for config in site_configs:
+        db.mark_site_started(conn, run_id, db.site_key(config))
+    db.mark_site_finished(conn, run_id, "greenhouse:a", 10, 1)
+    db.mark_site_finished(conn, run_id, "consider:b", 5, 0)
+    db.mark_site_failed(conn, run_id, "getro:c", "boom")
+    assert db.finish_run(conn, run_id) == "incomplete"
+
+    db.reopen_run(conn, run_id)
+    assert db.get_run_site_keys(conn, run_id, ("pending",)) == set()
+    db.reopen_run(conn, run_id, retry_failed=True)
+    assert db.get_run_site_keys(conn, run_id, ("pending",)) == {"getro:c"}
+
+def test_finished_run_is_not_resumed(conn, site_configs):
+    run_id = db.start_run(conn, site_configs[:1])
+    db.mark_site_finished(conn, run_id, "greenhouse:a", 1, 1)
+    assert db.finish_run(conn, run_id) == "finished"
+    assert db.latest_unfinished_run(conn) is None
+
+def test_board_history_tracks_changes_and_failures(conn):
+    db.record_board_result(conn, "greenhouse:a", 4.0, job_ids=["1", "2"], matched=1)
+    first = db.get_board_history_row(conn, "greenhouse:a")
+    assert first["jobs_found"] == 2
+    assert first["last_changed"] == first["last_scraped"]
+
+    conn.execute("UPDATE board_history SET last_changed = '2000-01-01 00:00:00'")
+    db.record_board_result(conn, "greenhouse:a", 4.0, job_ids=["2", "1"], matched=1)
+    assert db.get_board_history_row(conn, "greenhouse:a")["last_changed"] == "2000-01-01 00:00:00"
+
+    db.record_board_result(conn, "greenhouse:a", 4.0, failed=True)
+    row = db.get_board_history(conn)["greenhouse:a"]
+    assert row["failure_rate"] == pytest.approx(db.HISTORY_ALPHA)
+    assert row["jobs_matched"] == 1
+    assert row["attempts"] == 3
+
+def sighting(site_id, job_id, **overrides):
+    job = {
+        "site_id": site_id,
+        "job_id": job_id,
+        "source_url": f"https://{site_id}.example.com/jobs",
+        "title": "VP of Product",
+        "company_name": "Acme",
+        "apply_url": "https://boards.greenhouse.io/acme/jobs/123",
+        "remote": True,
+    }
+    job.update(overrides)
+    return job
+
+def test_save_jobs_collapses_cross_board_duplicates(conn):
+    db.save_jobs(conn, [sighting("a", "1"), sighting("b", "2"), sighting("b", "3", title="Head of Product")])
+    assert conn.execute("SELECT COUNT(*) FROM canonical_jobs").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM job_sightings").fetchone()[0] == 3
+    db.save_job(conn, sighting("a", "1"))
+    assert conn.execute("SELECT COUNT(*) FROM job_sightings").fetchone()[0] == 3
+
+def test_board_hosted_postings_in_two_cities_stay_apart(conn):
+    board_hosted = {"apply_url": "https://a.example.com/companies/acme/jobs/1"}
+    db.save_jobs(conn, [sighting("a", "1", location_city="New York", **board_hosted),
+                        sighting("a", "2", location_city="London", **board_hosted)])
+    assert conn.execute("SELECT COUNT(DISTINCT canonical_id) FROM job_sightings").fetchone()[0] == 2
+
+def test_sighting_moving_to_a_new_canonical_id_keeps_its_status(conn):
+    db.save_jobs(conn, [sighting("a", "1")])
+    conn.execute("UPDATE canonical_jobs SET status = 'applied'")
+    conn.commit()
+    db.save_jobs(conn, [sighting("a", "1", apply_url="https://boards.greenhouse.io/acme/jobs/456")])
+    assert conn.execute("SELECT status, closed_at IS NOT NULL FROM canonical_jobs ORDER BY first_seen, closed_at").fetchall() \
+        == [("applied", 0), ("applied", 1)]
+
+def legacy_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "legacy.db")
+    monkeypatch.setattr(db, "DATABASE_NAME", path)
+    legacy = sqlite3.connect(path)
+    legacy.execute('''
+        CREATE TABLE jobs (id TEXT PRIMARY KEY, site_id TEXT, job_id TEXT, title TEXT, company_name TEXT,
+            apply_url TEXT, source_url TEXT, salary_min REAL, salary_max REAL, location_city TEXT,
+            location_state TEXT, location_country TEXT, remote BOOLEAN, hybrid BOOLEAN, last_seen DATE,
+            status TEXT DEFAULT '', UNIQUE(site_id, job_id))
+    ''')
+    return legacy
+
+def test_legacy_jobs_table_is_migrated(tmp_path, monkeypatch):
+    legacy = legacy_db(tmp_path, monkeypatch)
+    for i, (site_id, status) in enumerate([("a", ""), ("b", "applied")]):
+        job = sighting(site_id, str(i))
+        legacy.execute('''
+            INSERT INTO jobs (id, site_id, job_id, title, company_name, apply_url, source_url, remote, hybrid, last_seen, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 1, 0, '2025-01-0%d', ?)
+        ''' % (i + 1), (str(i), site_id, job["job_id"], job["title"], job["company_name"], job["apply_url"],
+                         job["source_url"], status))
+    legacy.commit()
+    legacy.close()
+
+    conn = db.create_db()
+    assert conn.execute("SELECT status, first_seen, last_seen FROM canonical_jobs").fetchall() == [
+        ("applied", "2025-01-01", "2025-01-02")
+    ]
+    assert conn.execute("SELECT COUNT(*) FROM job_sightings").fetchone()[0] == 2
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'jobs'").fetchone() is None
+    # The old rows are kept, not dropped.
+    assert conn.execute("SELECT COUNT(*) FROM jobs_legacy").fetchone()[0] == 2
+    conn.close()
+
+def test_legacy_jobs_without_a_job_id_are_migrated(tmp_path, monkeypatch):
+    legacy = legacy_db(tmp_path, monkeypatch)
+    legacy.execute("INSERT INTO jobs (id, site_id, title, company_name, apply_url, last_seen, status) "
+                   "VALUES ('x', 'a', 'VP of Product', 'Acme', 'https://acme.com/vp', '2025-01-01', 'applied')")
+    legacy.commit()
+    legacy.close()
+
+    conn = db.create_db()
+    assert conn.execute("SELECT status FROM canonical_jobs").fetchall() == [("applied",)]
+    # Its board type isn't known, so the sighting is closed until the board is scraped again.
+    assert conn.execute("SELECT site_key, job_id, closed_at IS NOT NULL FROM job_sightings").fetchall() == [("a", None, 1)]
+    assert conn.execute("SELECT COUNT(*) FROM jobs_legacy").fetchone()[0] == 1
+    conn.close()
+
+def test_reconcile_board_closes_missing_jobs(conn):
+    db.save_jobs(conn, [sighting("a", "1"), sighting("a", "2", title="Head of Product"),
+                        sighting("b", "9", title="Head of Product")])
+    closed = db.reconcile_board(conn, "a", ["1", "3"], today="2030-01-01")
+    assert closed == 1
+    assert conn.execute("SELECT job_id FROM job_sightings WHERE closed_at IS NOT NULL").fetchall() == [("2",)]
+    # still listed on board b, so the canonical job stays open
+    assert conn.execute("SELECT COUNT(*) FROM canonical_jobs WHERE closed_at IS NOT NULL").fetchone()[0] == 0
+
+    db.reconcile_board(conn, "b", ["10"], today="2030-01-01")
+    assert conn.execute("SELECT title FROM canonical_jobs WHERE closed_at IS NOT NULL").fetchall() == [("Head of Product",)]
+    assert conn.execute("SELECT last_seen FROM job_sightings WHERE job_id = '1'").fetchone() == ("2030-01-01",)
+
+def test_boards_of_different_types_sharing_an_id_are_kept_apart(conn):
+    db.save_jobs(conn, [sighting("celesta", "1")], "getro:celesta")
+    db.save_jobs(conn, [sighting("celesta", "1", title="Head of Product")], "consider:celesta")
+    assert db.reconcile_board(conn, "getro:celesta", ["2"], today="2030-01-01") == 1
+    assert conn.execute("SELECT site_key, closed_at FROM job_sightings ORDER BY site_key").fetchall() == [
+        ("consider:celesta", None), ("getro:celesta", "2030-01-01")]
+    assert conn.execute("SELECT title FROM canonical_jobs WHERE closed_at IS NULL").fetchall() == [("Head of Product",)]
+
+def test_sightings_keyed_by_bare_site_id_are_rekeyed(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DATABASE_NAME", str(tmp_path / "jobs.db"))
+    conn = db.create_db()
+    db.save_jobs(conn, [sighting("a", "1"), sighting("b", "2", title="Head of Product")])
+    for key in ("getro:a", "getro:b", "greenhouse:b"):
+        db.record_board_result(conn, key, 1.0, job_ids=["1"])
+    # Sightings as stored before they were keyed by site_key.
+    conn.execute("ALTER TABLE job_sightings RENAME COLUMN site_key TO site_id")
+    conn.commit()
+    conn.close()
+
+    conn = db.create_db()
+    assert conn.execute("SELECT site_key, closed_at IS NULL FROM job_sightings ORDER BY site_key").fetchall() == [
+        ("b", 0), ("getro:a", 1)]
+    # b is both a getro and a greenhouse board, so its job is closed until one of them lists it again.
+    assert conn.execute("SELECT title FROM canonical_jobs WHERE closed_at IS NULL").fetchall() == [("VP of Product",)]
+    assert db.get_stats(conn)["by_site"] == [{"site_key": "getro:a", "sightings": 1, "open_sightings": 1}]
+    db.save_jobs(conn, [sighting("b", "2", title="Head of Product")], "greenhouse:b")
+    assert db.get_stats(conn)["open_jobs"] == 2
+    conn.close()
+
+def test_seeing_a_closed_job_again_reopens_it(conn):
+    db.save_jobs(conn, [sighting("a", "1")])
+    db.reconcile_board(conn, "a", ["2"], today="2000-01-01")
+    db.save_jobs(conn, [sighting("a", "1")])
+    assert conn.execute("SELECT COUNT(*) FROM canonical_jobs WHERE closed_at IS NULL").fetchone()[0] == 1
+
+def test_listed_again_reopens_the_job_without_saving_it(conn):
+    db.save_jobs(conn, [sighting("a", "1")])
+    db.reconcile_board(conn, "a", ["2"], today="2000-01-01")
+    # Listed again but no longer matching the filters, so only reconcile sees it.
+    db.reconcile_board(conn, "a", ["1"], today="2000-01-02")
+    assert conn.execute("SELECT closed_at FROM canonical_jobs").fetchall() == [(None,)]
+
+def test_archived_job_seen_again_keeps_its_status(conn):
+    db.save_jobs(conn, [sighting("a", "1"), sighting("b", "2")])
+    conn.execute("UPDATE canonical_jobs SET status = 'rejected'")
+    conn.commit()
+    db.reconcile_board(conn, "a", ["x"], today="2000-01-01")
+    db.reconcile_board(conn, "b", ["x"], today="2000-01-01")
+    assert db.archive_closed_jobs(conn, older_than_days=30) == 1
+
+    db.save_jobs(conn, [sighting("a", "1")])
+    assert conn.execute("SELECT status, closed_at FROM canonical_jobs").fetchall() == [("rejected", None)]
+    assert conn.execute("SELECT site_key, closed_at IS NULL FROM job_sightings ORDER BY site_key").fetchall() == [
+        ("a", 1), ("b", 0)]
+    assert conn.execute("SELECT COUNT(*) FROM canonical_jobs_archive").fetchone()[0] == 0
+
+def test_archive_moves_long_closed_jobs_to_cold_tables(conn):
+    db.save_jobs(conn, [sighting("a", "1"), sighting("a", "2", title="Head of Product")])
+    db.reconcile_board(conn, "a", ["2"], today="2000-01-01")
+    assert db.archive_closed_jobs(conn, older_than_days=30) == 1
+    assert conn.execute("SELECT COUNT(*) FROM canonical_jobs").fetchone()[0] == 1
+    assert conn.execute("SELECT job_id FROM job_sightings_archive").fetchall() == [("1",)]
+    assert conn.execute("SELECT title FROM canonical_jobs_archive").fetchall() == [("VP of Product",)]
+    assert db.archive_closed_jobs(conn, older_than_days=30) == 0
+
+def test_fts_query_uses_prefix_terms():
+    assert db.fts_query("Head of prod") == '"Head"* "of"* "prod"*'
+    assert db.fts_query('  "* ') is None
+
+def test_search_jobs_ranks_and_paginates(conn):
+    db.save_jobs(conn, [
+        sighting("a", "1", title="VP of Product", company_name="Acme", location_city="New York"),
+        sighting("a", "2", title="Head of Product", company_name="Productive Labs"),
+        sighting("a", "3", title="Engineering Manager", company_name="Globex"),
+        sighting("a", "4", title="Engineer", company_name="Product Co"),
+    ])
+    total, rows = db.search_jobs(conn, "prod")
+    assert total == 3
+    # title matches outrank company-only matches
+    assert {r["title"] for r in rows[:2]} == {"VP of Product", "Head of Product"}
+    assert rows[-1]["title"] == "Engineer"
+    total, rows = db.search_jobs(conn, "prod", limit=1, offset=2)
+    assert total == 3 and [r["title"] for r in rows] == ["Engineer"]
+    assert [r["title"] for r in db.search_jobs(conn, "new yor")[1]] == ["VP of Product"]
+
+def test_search_skips_closed_and_archived_jobs(conn):
+    db.save_jobs(conn, [sighting("a", "1"), sighting("a", "2", title="Head of Product")])
+    db.reconcile_board(conn, "a", ["2"], today="2000-01-01")
+    assert db.search_jobs(conn, "vp")[0] == 0
+    assert db.search_jobs(conn, "vp", include_closed=True)[0] == 1
+    db.archive_closed_jobs(conn)
+    assert db.search_jobs(conn, "vp", include_closed=True)[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM jobs_fts").fetchone()[0] == 1
+
+def test_change_counter_bumps_once_per_write(conn):
+    assert db.get_change_state(conn)[0] == 0
+    db.save_jobs(conn, [sighting("a", "1"), sighting("a", "2", title="Head of Product")])
+    counter, changed_at = db.get_change_state(conn)
+    assert counter == 1 and changed_at is not None
+    db.reconcile_board(conn, "a", ["1", "2"])
+    assert db.get_change_state(conn)[0] == 2
+    db.save_jobs(conn, [])
+    assert db.get_change_state(conn)[0] == 2
+
+def statuses(conn):
+    return dict(conn.execute("SELECT title, status FROM canonical_jobs").fetchall())
+
+def test_update_statuses_by_canonical_and_board_ids(conn):
+    db.save_jobs(conn, [sighting("a", "1"), sighting("a", "2", title="Head of Product"),
+                        sighting("a", "3", title="CPO")])
+    canonical_id = conn.execute("SELECT canonical_id FROM job_sightings WHERE job_id = '1'").fetchone()[0]
+    updated = db.update_statuses(conn, [
+        {"job_id": canonical_id, "status": "applied"},
+        {"job_id": "2", "site_key": "a", "status": "not_interested"},
+        {"job_id": "missing", "site_key": "a", "status": "applied"},
+    ])
+    assert updated == 2
+    assert statuses(conn) == {"VP of Product": "applied", "Head of Product": "not_interested", "CPO": ""}
+
+def test_update_status_where_filters(conn):
+    db.save_jobs(conn, [sighting("a", "1"), sighting("a", "2", title="Head of Product"),
+                        sighting("b", "3", title="CPO", company_name="Globex")])
+    assert db.update_status_where(conn, "not_interested", company_name="acme") == 2
+    assert db.update_status_where(conn, "applied", site_key="b", title_contains="cp") == 1
+    assert statuses(conn) == {"VP of Product": "not_interested", "Head of Product": "not_interested", "CPO": "applied"}
+    with pytest.raises(ValueError):
+        db.update_status_where(conn, "applied")
+    with pytest.raises(ValueError):
+        db.update_status_where(conn, "applied", salary=1)
+
+def stats_snapshot(conn):
+    return {table: sorted(conn.execute(f"SELECT * FROM {table} WHERE jobs > 0" if table != "stats_site"
+                                       else "SELECT * FROM stats_site WHERE sightings > 0").fetchall())
+            for table in db.STATS_TABLES}
+
+def test_stats_tables_follow_saves_status_changes_and_archiving(conn):
+    db.save_jobs(conn, [sighting("a", "1"), sighting("b", "2"), sighting("a", "3", title="CPO", company_name="Globex")])
+    db.update_statuses(conn, [{"job_id": "3", "site_key": "a", "status": "applied"}])
+    db.reconcile_board(conn, "b", ["9"], today="2000-01-01")
+    db.reconcile_board(conn, "a", ["1"], today="2000-01-01")
+
+    stats = db.get_stats(conn, since="2000-01-01")
+    assert (stats["jobs"], stats["open_jobs"], stats["new_since"]) == (2, 1, 2)
+    assert stats["by_status"] == {"": {"jobs": 1, "open_jobs": 1}, "applied": {"jobs": 1, "open_jobs": 0}}
+    assert stats["by_company"] == [{"company_name": "Acme", "jobs": 1, "open_jobs": 1}]
+    assert stats["by_site"] == [{"site_key": "a", "sightings": 2, "open_sightings": 1}]
+
+    db.archive_closed_jobs(conn, older_than_days=30)
+    incremental = stats_snapshot(conn)
+    db.rebuild_stats(conn)
+    assert stats_snapshot(conn) == incremental
+    assert db.get_stats(conn)["jobs"] == 1
+
+def test_save_jobs_accepts_job_records(conn):
+    db.save_jobs(conn, [Job(**sighting("a", "1", salary_min=150000, salary_max=200000))])
+    assert conn.execute("SELECT title, salary_min, salary_max, remote FROM canonical_jobs").fetchall() == [
+        ("VP of Product", 150000, 200000, 1)
+    ]
+
+def test_search_jobs_filters_by_salary(conn):
+    db.save_jobs(conn, [
+        Job(**sighting("a", "1", salary_min=150000, salary_max=200000)),
+        Job(**sighting("a", "2", title="Head of Product", salary_max=140000)),
+        Job(**sighting("a", "3", title="CPO")),
+    ])
+    total, rows = db.search_jobs(conn, "", min_salary=145000)
+    assert total == 1 and rows[0]["title"] == "VP of Product"
+    total, rows = db.search_jobs(conn, "product", max_salary=145000)
+    assert [row["title"] for row in rows] == ["Head of Product"]
+    _, rows = db.search_jobs(conn, None, min_salary=0)
+    assert [row["title"] for row in rows] == ["VP of Product", "Head of Product"]
+    assert db.search_jobs(conn, "") == (0, [])
+    plan = conn.execute("EXPLAIN QUERY PLAN SELECT id FROM canonical_jobs c WHERE COALESCE(c.salary_max, c.salary_min) >= 1").fetchall()
+    assert "idx_canonical_jobs_salary" in plan[0][3]
+
+def test_save_scrape_metrics(conn):
+    metrics = ScrapeMetrics("greenhouse:a", run_id="run")
+    metrics.stages["fetch"] = 1.5
+    metrics.add_request(2048)
+    metrics.add_error("HTTP 503")
+    metrics.finish("ok")
+    db.save_scrape_metrics(conn, metrics)
+    row = conn.execute("SELECT site_key, status, fetch_seconds, requests, bytes, errors FROM scrape_metrics").fetchone()
+    assert row == ("greenhouse:a", "ok", 1.5, 1, 2048, '{"HTTP 503": 1}')
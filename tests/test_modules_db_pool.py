@@ -0,0 +1,60 @@
+import sqlite3
+import threading
+import pytest
+from modules.db_pool import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    path = str(tmp_path / "pool.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.commit()
+    conn.close()
+    pool = ConnectionPool(path)
+    yield pool
+    pool.close()
+
+def test_reader_is_reused_per_thread(pool):
+    assert pool.reader() is pool.reader()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(pool.reader()))
+    thread.start()
+    thread.join()
+    assert other[0] is not pool.reader()
+
+def test_readers_cannot_write(pool):
+    with pytest.raises(sqlite3.OperationalError):
+        pool.reader().execute("INSERT INTO items (name) VALUES ('x')")
+
+def test_write_commits_and_is_visible_to_readers(pool):
+    with pool.write() as conn:
+        conn.execute("INSERT INTO items (name) VALUES ('a')")
+    assert pool.reader().execute("SELECT name FROM items").fetchall()[0]["name"] == "a"
+
+def test_write_rolls_back_on_error(pool):
+    with pytest.raises(ValueError):
+        with pool.write() as conn:
+            conn.execute("INSERT INTO items (name) VALUES ('b')")
+            raise ValueError
+    assert pool.reader().execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0
+
+def test_borrowed_connections_are_reused_across_threads(pool):
+    with pool.borrow() as conn:
+        first = conn
+        result = []
+        thread = threading.Thread(target=lambda: result.append(conn.execute("SELECT 1").fetchone()[0]))
+        thread.start()
+        thread.join()
+        assert result == [1]
+    with pool.borrow() as conn:
+        assert conn is first
+
+def test_write_latency_is_tracked(pool):
+    with pool.write() as conn:
+        conn.execute("INSERT INTO items (name) VALUES ('c')")
+    with pytest.raises(ValueError):
+        with pool.write():
+            raise ValueError
+    assert pool.writes == 2
+    assert pool.write_seconds > 0
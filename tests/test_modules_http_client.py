@@ -0,0 +1,33 @@
+import pytest
+
+from modules import http_client
+from modules.ratelimit import RateLimiter
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.content = b""
+        self.headers = {"Retry-After": "0"}
+
+
+class FakeSession:
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+
+    def request(self, method, url, **kwargs):
+        return FakeResponse(self.statuses.pop(0))
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = RateLimiter(host_limits={"a.example.com": (4, 4)}, sleep=lambda seconds: None)
+    monkeypatch.setattr(http_client, "limiter", limiter)
+    monkeypatch.setattr(http_client.time, "sleep", lambda seconds: None)
+    return limiter
+
+@pytest.mark.parametrize("status, throttled", [(429, True), (503, True), (500, False), (502, False)])
+def test_only_429_and_503_slow_the_host_down(limiter, status, throttled):
+    response = http_client.get("https://a.example.com/jobs", session=FakeSession(status, 200))
+    assert response.status_code == 200
+    assert (limiter.bucket("https://a.example.com/").rate < 4) == throttled
@@ -0,0 +1,37 @@
+import pytest
+from modules.base import JobSite
+from modules.job import JOB_FIELDS, Job, as_job
+
+
+@pytest.fixture
+def job():
+    return Job(site_id="a", job_id="1", title="Software Engineer", company_name="Acme",
+               location_city="New York", remote=True, salary_min=150000)
+
+def test_job_has_no_instance_dict(job):
+    assert not hasattr(job, "__dict__")
+    with pytest.raises(AttributeError):
+        job.salary = 1
+
+def test_job_supports_dict_access(job):
+    assert job["title"] == "Software Engineer"
+    assert job.get("hybrid") is False
+    assert job.get("missing", "default") == "default"
+    assert "apply_url" in job and "missing" not in job
+    with pytest.raises(KeyError):
+        job["missing"]
+    job["apply_url"] = "https://example.com/apply"
+    assert job.apply_url == "https://example.com/apply"
+
+def test_job_round_trips_through_dict(job):
+    data = job.to_dict()
+    assert tuple(data) == JOB_FIELDS
+    assert list(data.values()) == list(job.values())
+    assert Job.from_dict(dict(data, unknown="ignored")) == job
+    assert as_job(data) == job
+    assert as_job(job) is job
+
+def test_filters_accept_job_records(job):
+    site = JobSite(id="a", name="A", url="https://a.example.com",
+                   app_config={"location_terms": ["New York"], "remote": True, "positive_terms": ["engineer"]})
+    assert site.should_save_job(job) is True
@@ -0,0 +1,52 @@
+import io
+import json
+import logging
+
+import pytest
+from modules import log
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield root
+    log.stop_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+def test_setup_logging_writes_through_the_queue(root_logger):
+    stream = io.StringIO()
+    log.setup_logging("info", stream=stream)
+    logger = logging.getLogger("modules.test")
+    logger.debug("hidden")
+    logger.info("Saved %d jobs", 3, extra={"site": "greenhouse:a"})
+    log.stop_logging()
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1
+    assert lines[0].endswith("INFO modules.test: Saved 3 jobs site=greenhouse:a")
+
+def test_json_format(root_logger):
+    stream = io.StringIO()
+    log.setup_logging("debug", fmt="json", stream=stream)
+    logging.getLogger("search").warning("Run %s failed", "r1", extra={"sites": 2})
+    log.stop_logging()
+    entry = json.loads(stream.getvalue())
+    assert (entry["level"], entry["logger"], entry["message"], entry["sites"]) == ("WARNING", "search", "Run r1 failed", 2)
+
+def test_sampled_logs_one_in_every_n(caplog):
+    sampled = log.Sampled(logging.getLogger("modules.sampled"), every=10)
+    with caplog.at_level(logging.DEBUG, logger="modules.sampled"):
+        for i in range(25):
+            sampled.debug("job %d", i)
+    assert [record.getMessage() for record in caplog.records] == ["job 0", "job 10", "job 20"]
+    assert all(record.sampled == 10 for record in caplog.records)
+
+def test_sampled_skips_disabled_levels_without_counting(caplog):
+    sampled = log.Sampled(logging.getLogger("modules.sampled"), every=2)
+    with caplog.at_level(logging.INFO, logger="modules.sampled"):
+        sampled.debug("dropped")
+        sampled.info("first")
+        sampled.info("second")
+        sampled.info("third")
+    assert [record.getMessage() for record in caplog.records] == ["first", "third"]
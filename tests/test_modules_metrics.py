@@ -0,0 +1,44 @@
+import json
+import time
+
+from modules import metrics
+from modules.metrics import ScrapeMetrics
+
+
+def test_scrape_books_remaining_time_as_parse():
+    m = ScrapeMetrics("greenhouse:a")
+    transform = m.timed("transform", lambda data: time.sleep(0.02) or data)
+
+    def scrape():
+        with metrics.stage("fetch"):
+            time.sleep(0.02)
+        metrics.record_request(100)
+        metrics.record_error("HTTP 429")
+        time.sleep(0.02)
+        return transform([1, 2])
+
+    assert m.scrape(scrape) == [1, 2]
+    assert m.stages["fetch"] >= 0.02 and m.stages["transform"] >= 0.02
+    assert 0.015 <= m.stages["parse"] < 0.04
+    assert (m.requests, m.bytes, dict(m.errors)) == (1, 100, {"HTTP 429": 1})
+
+def test_helpers_do_nothing_outside_a_scrape():
+    metrics.record_request(10)
+    metrics.record_error(ValueError())
+    with metrics.stage("fetch"):
+        pass
+    assert metrics.current() is None
+
+def test_metrics_round_trip_and_emit(tmp_path):
+    m = ScrapeMetrics("getro:b", run_id="run")
+    m.add_error(ValueError("bad"))
+    m.jobs = 3
+    m.finish("ok")
+    assert ScrapeMetrics.from_dict(m.to_dict()).to_dict() == m.to_dict()
+
+    path = tmp_path / "data" / "metrics.jsonl"
+    metrics.emit(m, str(path))
+    metrics.emit(m, str(path))
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0])["errors"] == {"ValueError": 1}
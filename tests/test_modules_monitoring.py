@@ -0,0 +1,92 @@
+import datetime
+import sqlite3
+import time
+
+import pytest
+import modules.db as db
+from modules import monitoring, workqueue
+from modules.metrics import ScrapeMetrics
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DATABASE_NAME", str(tmp_path / "jobs.db"))
+    conn = db.create_db()
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def queue(tmp_path):
+    conn = workqueue.create_queue(str(tmp_path / "queue.db"))
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def site_configs():
+    return [
+        {"id": "a", "name": "A", "type": "greenhouse", "url": "https://a.example.com"},
+        {"id": "b", "name": "B", "type": "getro", "url": "https://b.example.com"},
+        {"id": "c", "name": "C", "type": "consider", "url": "https://c.example.com"},
+    ]
+
+def scrape(key, status, jobs, duration, save, errors=()):
+    metrics = ScrapeMetrics(key, run_id="run")
+    metrics.jobs = jobs
+    metrics.duration = duration
+    metrics.stages["save"] = save
+    for error in errors:
+        metrics.add_error(error)
+    metrics.finish(status)
+    return metrics
+
+def test_run_status_reports_in_flight_and_stalled_sites(conn, queue, site_configs):
+    run_id = db.start_run(conn, site_configs)
+    db.mark_site_started(conn, run_id, "greenhouse:a")
+    db.mark_site_started(conn, run_id, "getro:b")
+    long_ago = (datetime.datetime.now() - datetime.timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S")
+    conn.execute("UPDATE run_sites SET started_at = ? WHERE site_key = 'greenhouse:a'", (long_ago,))
+    conn.commit()
+    workqueue.enqueue(queue, "run-2", site_configs[1:])
+    workqueue.claim(queue, "w1")
+
+    status = monitoring.run_status(conn, queue)
+    assert [site["site_key"] for site in status["in_flight"]] == ["greenhouse:a", "getro:b"]
+    assert [site["stalled"] for site in status["in_flight"]] == [True, False]
+    assert [site["worker_id"] for site in status["leased"]] == ["w1"]
+    assert status["queue"] == {"leased": 1, "pending": 1}
+    # the local getro scrape plus the getro site leased to w1
+    assert status["browsers_in_use"] == 2
+    assert status["runs"][0]["sites"] == {"running": 2, "pending": 1}
+
+def test_throughput_and_errors_come_from_scrape_metrics(conn):
+    db.save_scrape_metrics(conn, scrape("greenhouse:a", "ok", 30, 10.0, 0.5, ["HTTP 429", "HTTP 429"]))
+    db.save_scrape_metrics(conn, scrape("getro:b", "failed", 0, 5.0, 0.0, ["TimeoutException"]))
+    old = scrape("consider:c", "ok", 100, 1.0, 2.0)
+    old.started_at = time.time() - 2 * monitoring.RATE_WINDOW_SECONDS
+    db.save_scrape_metrics(conn, old)
+
+    rates = monitoring.throughput(conn)
+    assert (rates["sites"], rates["jobs"], rates["failed"]) == (2, 30, 1)
+    assert rates["jobs_per_second"] == pytest.approx(2.0)
+    assert rates["failure_rate"] == 0.5
+    assert (rates["save_seconds_avg"], rates["save_seconds_max"]) == (0.25, 0.5)
+    assert monitoring.error_counts(conn) == {"HTTP 429": 2, "TimeoutException": 1}
+
+def test_prometheus_text(conn):
+    db.save_scrape_metrics(conn, scrape("greenhouse:a", "ok", 30, 10.0, 0.5, ['HTTP "429"']))
+    text = monitoring.prometheus_text(monitoring.run_status(conn),
+                                      extra=[("app_writes_total", "counter", "Writes.", [({}, 3)])])
+    lines = text.splitlines()
+    assert "# TYPE headhunter_jobs_per_second gauge" in lines
+    assert 'headhunter_jobs_per_second{window="3600s"} 3.0' in lines
+    assert 'headhunter_scrapes_total{status="ok"} 1.0' in lines
+    assert 'headhunter_scrape_errors_total{error="HTTP \\"429\\""} 1.0' in lines
+    assert 'headhunter_sites_in_flight{mode="worker"} 0.0' in lines
+    assert "app_writes_total 3.0" in lines
+    assert text.endswith("\n")
+
+def test_run_status_tolerates_missing_queue_table(conn, tmp_path):
+    empty = sqlite3.connect(str(tmp_path / "empty.db"))
+    status = monitoring.run_status(conn, empty)
+    assert status["leased"] == [] and status["queue"] == {}
+    empty.close()
@@ -0,0 +1,108 @@
+import json
+
+import pytest
+from modules import nfx
+from modules.nfx_store import create_store
+
+
+def firm(slug):
+    return {"id": slug, "name": slug.title(), "slug": slug}
+
+# Two investor lists; "seed" has three pages of scored investors.
+PAGES = {
+    ("seed", None): ([firm("a")], ["b"], "c1"),
+    ("seed", "c1"): ([], ["c", "a"], "c2"),
+    ("seed", "c2"): ([], ["d"], None),
+    ("growth", None): ([firm("d")], ["e"], None),
+}
+
+class FakeApi:
+    def __init__(self, fail_lists=(), fail_firms=(), pages=PAGES):
+        self.pages = pages
+        self.fail_lists = set(fail_lists)
+        self.fail_firms = set(fail_firms)
+        self.calls = []
+
+    def __call__(self, operation, variables, query):
+        self.calls.append((operation, variables.get("slug"), variables.get("after")))
+        if operation == "FirmForFirmPageQuery":
+            if variables["slug"] in self.fail_firms:
+                raise nfx.NfxError("boom")
+            return {"firm": {"linkedin_url": None, "twitter_url": None, "crunchbase_url": None,
+                             "url": f"https://{variables['slug']}.vc"}}
+        key = (variables["slug"], variables["after"])
+        if key in self.fail_lists:
+            raise nfx.NfxError("list failed")
+        firms, investors, cursor = self.pages[key]
+        return {"list": {
+            "firms": firms,
+            "scored_investors": {
+                "pageInfo": {"hasNextPage": cursor is not None, "endCursor": cursor},
+                "edges": [{"node": {"firm": firm(slug)}} for slug in investors],
+            },
+        }}
+
+@pytest.fixture
+def store(tmp_path):
+    conn = create_store(str(tmp_path / "nfx.db"))
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def paths(tmp_path):
+    return {"output_file": str(tmp_path / "firms.json"), "progress_file": str(tmp_path / "progress.json")}
+
+def slugs(path):
+    with open(path) as f:
+        return [json.loads(line)["slug"] for line in f]
+
+def test_fetch_all_follows_pagination_and_dedups(monkeypatch, store, paths):
+    api = FakeApi()
+    monkeypatch.setattr(nfx, "graphql", api)
+    assert nfx.fetch_all(store, ["seed", "growth"], max_workers=2, **paths) == 5
+    assert sorted(slugs(paths["output_file"])) == ["a", "b", "c", "d", "e"]
+    firm_calls = [call for call in api.calls if call[0] == "FirmForFirmPageQuery"]
+    assert len(firm_calls) == 5
+
+    # A second run pages every list again but only fetches firms listed since.
+    api = FakeApi(pages={**PAGES, ("growth", None): ([firm("d")], ["e", "f"], None)})
+    monkeypatch.setattr(nfx, "graphql", api)
+    assert nfx.fetch_all(store, ["seed", "growth"], **paths) == 1
+    assert [call[1] for call in api.calls if call[0] == "FirmForFirmPageQuery"] == ["f"]
+    assert nfx.load_progress(paths["progress_file"])["lists"] == {}
+
+def test_failed_list_resumes_from_its_last_cursor(monkeypatch, store, paths):
+    monkeypatch.setattr(nfx, "graphql", FakeApi(fail_lists={("seed", "c2")}))
+    assert nfx.fetch_all(store, ["seed", "growth"], **paths) == 5  # growth still ran
+    assert nfx.load_progress(paths["progress_file"])["lists"]["seed"] == {"after": "c2", "done": False}
+
+    api = FakeApi()
+    monkeypatch.setattr(nfx, "graphql", api)
+    assert nfx.fetch_all(store, ["seed", "growth"], **paths) == 0  # the last page only lists d, found via growth
+    # growth finished in the interrupted pass, so only the rest of seed is paged.
+    assert [call[1:] for call in api.calls if call[0] == "vclInvestors"] == [("seed", "c2")]
+    assert nfx.load_progress(paths["progress_file"])["lists"] == {}
+    assert sorted(slugs(paths["output_file"])) == ["a", "b", "c", "d", "e"]
+
+def test_failed_firms_are_retried_next_run(monkeypatch, store, paths):
+    monkeypatch.setattr(nfx, "graphql", FakeApi(fail_firms={"b"}))
+    assert nfx.fetch_all(store, ["seed"], **paths) == 3
+    assert list(nfx.load_progress(paths["progress_file"])["failed"]) == ["b"]
+
+    monkeypatch.setattr(nfx, "graphql", FakeApi())
+    assert nfx.fetch_all(store, ["seed"], **paths) == 1
+    assert nfx.load_progress(paths["progress_file"])["failed"] == {}
+    assert sorted(slugs(paths["output_file"])) == ["a", "b", "c", "d"]
+
+def test_refresh_refetches_known_firms_and_replaces_stale_links(monkeypatch, store, paths):
+    monkeypatch.setattr(nfx, "graphql", FakeApi())
+    nfx.fetch_all(store, ["growth"], **paths)
+    store.execute("UPDATE nfx_firms SET url = 'https://stale.example' WHERE slug = 'e'")
+    store.commit()
+
+    api = FakeApi()
+    monkeypatch.setattr(nfx, "graphql", api)
+    assert nfx.fetch_all(store, ["growth"], refresh=True, **paths) == 2
+    with open(paths["output_file"]) as f:
+        urls = {firm["slug"]: firm["url"] for firm in map(json.loads, f)}
+    assert urls == {"d": "https://d.vc", "e": "https://e.vc"}
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+from modules import nfx_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    conn = nfx_store.create_store(str(tmp_path / "nfx.db"))
+    yield conn
+    conn.close()
+
+def firm(slug, url, **fields):
+    return dict({"id": slug, "name": slug.title(), "slug": slug, "linkedin": None, "twitter": None,
+                 "crunchbase": None, "url": url}, **fields)
+
+def test_upsert_replaces_links_and_tracks_changes(store):
+    nfx_store.upsert_firms(store, [firm("a", "https://a.vc"), firm("b", "https://b.vc")])
+    store.execute("UPDATE nfx_firms SET changed_at = 'before', updated_at = 'before'")
+    nfx_store.upsert_firms(store, [firm("a", "https://a.vc"), firm("b", "https://new-b.vc")])
+
+    rows = {row[0]: row[1:] for row in store.execute("SELECT slug, url, changed_at, updated_at FROM nfx_firms")}
+    assert rows["a"][0] == "https://a.vc" and rows["a"][1] == "before"
+    assert rows["b"][0] == "https://new-b.vc" and rows["b"][1] != "before"
+    assert rows["a"][2] != "before"
+    assert nfx_store.known_slugs(store) == {"a", "b"}
+
+def test_store_is_seeded_from_and_exported_to_jsonl(tmp_path):
+    seed = tmp_path / "firms.json"
+    # Duplicate slugs in the old append-only file: the later line wins.
+    seed.write_text("\n".join(json.dumps(record) for record in [
+        firm("b", "https://old-b.vc"), firm("a", "https://a.vc"), firm("b", "https://b.vc"),
+    ]) + "\n")
+    conn = nfx_store.create_store(str(tmp_path / "nfx.db"), seed_file=str(seed))
+    assert nfx_store.export_jsonl(conn, str(seed)) == 2
+    conn.close()
+
+    exported = [json.loads(line) for line in seed.read_text().splitlines()]
+    assert exported == [firm("a", "https://a.vc"), firm("b", "https://b.vc")]
+
+    # An existing store is not seeded again.
+    seed.write_text(json.dumps(firm("c", "https://c.vc")) + "\n")
+    conn = nfx_store.create_store(str(tmp_path / "nfx.db"), seed_file=str(seed))
+    assert nfx_store.known_slugs(conn) == {"a", "b"}
+    conn.close()
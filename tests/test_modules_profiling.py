@@ -0,0 +1,56 @@
+import pstats
+from argparse import ArgumentParser
+
+from modules import profiling
+from modules.profiling import RunProfiler
+
+
+def busy_transform(n):
+    return [str(i) * 10 for i in range(n)]
+
+def test_profile_writes_per_block_files_and_summary(tmp_path):
+    profiler = RunProfiler(str(tmp_path), top=5)
+    with profiler.profile("greenhouse:a"):
+        busy_transform(20000)
+    with profiler.profile("getro:b"):
+        busy_transform(100)
+
+    assert (tmp_path / "greenhouse_a.prof").exists()
+    stats = pstats.Stats(str(tmp_path / "greenhouse_a.prof"))
+    assert any(func[2] == "busy_transform" for func in stats.stats)
+
+    report = (tmp_path / "greenhouse_a.txt").read_text()
+    assert "peak traced memory" in report
+    assert "busy_transform" in report
+    assert "allocation sites" in report and "test_modules_profiling.py" in report
+
+    summary = open(profiler.summary()).read()
+    assert summary.index("greenhouse:a") < summary.index("getro:b")
+    assert "busy_transform" in summary
+
+def test_profile_without_memory_still_writes_stats_on_error(tmp_path):
+    profiler = RunProfiler(str(tmp_path), memory=False)
+    try:
+        with profiler.profile("run"):
+            busy_transform(10)
+            raise ValueError("scrape failed")
+    except ValueError:
+        pass
+    assert "allocation sites" not in (tmp_path / "run.txt").read_text()
+    assert profiler.blocks[0][2] is None
+
+def test_blocks_sharing_a_name_get_their_own_files(tmp_path):
+    profiler = RunProfiler(str(tmp_path), memory=False)
+    for name in ("acme.com", "acme.com", "acme.com"):
+        with profiler.profile(name):
+            busy_transform(10)
+    assert sorted(path.name for path in tmp_path.glob("*.prof")) == ["acme.com-2.prof", "acme.com-3.prof", "acme.com.prof"]
+
+def test_profiler_from_args():
+    parser = ArgumentParser()
+    profiling.add_profile_arguments(parser, "site")
+    assert profiling.profiler_from_args(parser.parse_args([])) is None
+    args = parser.parse_args(["--profile", "--profile-top", "3", "--no-profile-memory"])
+    profiler = profiling.profiler_from_args(args)
+    assert args.profile == "site"
+    assert (profiler.top, profiler.memory) == (3, False)
@@ -0,0 +1,66 @@
+import pytest
+from modules.ratelimit import RateLimiter, TokenBucket, host_for, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def test_bucket_allows_burst_without_waiting(clock):
+    bucket = TokenBucket(rate=1, capacity=3, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.slept == []
+
+def test_bucket_waits_once_burst_is_spent(clock):
+    bucket = TokenBucket(rate=2, capacity=1, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.slept == [pytest.approx(0.5)]
+
+def test_throttle_blocks_and_halves_rate(clock):
+    bucket = TokenBucket(rate=4, capacity=4, clock=clock, sleep=clock.sleep)
+    bucket.throttle(10)
+    assert bucket.rate == 2
+    bucket.acquire()
+    assert clock.slept == [pytest.approx(10)]
+
+def test_recover_is_capped_at_configured_rate(clock):
+    bucket = TokenBucket(rate=4, capacity=4, clock=clock, sleep=clock.sleep)
+    bucket.throttle(0)
+    for _ in range(20):
+        bucket.recover()
+    assert bucket.rate == 4
+
+def test_limiter_keys_buckets_by_host(clock):
+    limiter = RateLimiter(host_limits={"a.example.com": (1, 1)}, clock=clock, sleep=clock.sleep)
+    assert limiter.bucket("https://a.example.com/x") is limiter.bucket("http://A.example.com/y")
+    assert limiter.bucket("https://b.example.com/") is not limiter.bucket("https://a.example.com/")
+    assert limiter.bucket("https://a.example.com/").max_rate == 1
+
+def test_host_for_without_scheme():
+    assert host_for("Example.com/jobs") == "example.com"
+
+def test_parse_retry_after_seconds():
+    assert parse_retry_after("120") == 120
+
+def test_parse_retry_after_http_date():
+    delay = parse_retry_after("Wed, 21 Oct 2015 07:28:30 GMT", now=1445412480)
+    assert delay == pytest.approx(30)
+
+def test_parse_retry_after_invalid():
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
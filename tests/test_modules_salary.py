@@ -0,0 +1,34 @@
+import pytest
+from modules.salary import Salary, parse_salary, salary_range
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("$150k - $200k", Salary(150000, 200000, "USD")),
+    ("120,000-140,000 USD/yr", Salary(120000, 140000, "USD")),
+    ("150-200k", Salary(150000, 200000, None)),
+    ("£60/hour", Salary(124800, 124800, "GBP")),
+    ("$45 - $60 per hour", Salary(93600, 124800, "USD")),
+    ("€8,000 - €9,000 / month", Salary(96000, 108000, "EUR")),
+    ("Up to €1.2M", Salary(None, 1200000, "EUR")),
+    ("CA$90K", Salary(90000, 90000, "CAD")),
+    ("$120k base + 10% bonus", Salary(120000, 120000, "USD")),
+    ("$50 - $60/h", Salary(104000, 124800, "USD")),
+    ("$55/hr", Salary(114400, 114400, "USD")),
+    ("$40 per hr", Salary(83200, 83200, "USD")),
+    ("5+ years, $130,000 - $150,000", Salary(130000, 150000, "USD")),
+])
+def test_parse_salary(text, expected):
+    assert parse_salary(text) == expected
+
+def test_parse_salary_without_amount():
+    assert parse_salary("Competitive") is None
+    assert parse_salary("") is None
+    # A bare small number is not an annual salary.
+    assert parse_salary("Top 500 company") is None
+    assert parse_salary("20% equity") is None
+
+def test_salary_range_from_api_fields():
+    assert salary_range(150000, "200000") == Salary(150000, 200000, None)
+    assert salary_range(40, 60, {"value": "HOUR"}, {"value": "usd"}) == Salary(83200, 124800, "USD")
+    assert salary_range("40", "60", "hourly") == Salary(83200, 124800, None)
+    assert salary_range(None, None) is None
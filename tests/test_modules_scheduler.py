@@ -0,0 +1,57 @@
+import datetime
+import pytest
+from modules import scheduler
+
+
+NOW = datetime.datetime(2025, 6, 1, 12, 0, 0)
+
+def ago(**kwargs):
+    return (NOW - datetime.timedelta(**kwargs)).strftime("%Y-%m-%d %H:%M:%S")
+
+def history(**overrides):
+    row = {
+        "last_scraped": ago(hours=2),
+        "last_changed": ago(days=1),
+        "jobs_matched": 0,
+        "avg_duration": 10.0,
+        "failure_rate": 0.0,
+    }
+    row.update(overrides)
+    return row
+
+def config(site_id):
+    return {"id": site_id, "name": site_id, "type": "greenhouse", "url": "https://example.com"}
+
+def test_classify_tiers():
+    assert scheduler.classify(None, NOW) == "new"
+    assert scheduler.classify(history(jobs_matched=3), NOW) == "high"
+    assert scheduler.classify(history(), NOW) == "normal"
+    assert scheduler.classify(history(last_changed=ago(days=30)), NOW) == "dormant"
+    assert scheduler.classify(history(failure_rate=0.8, jobs_matched=3), NOW) == "failing"
+
+def test_high_yield_boards_are_due_hourly():
+    budgets = scheduler.DEFAULT_BUDGETS
+    assert scheduler.is_due(history(jobs_matched=1), NOW, budgets) is True
+    assert scheduler.is_due(history(jobs_matched=1, last_scraped=ago(minutes=30)), NOW, budgets) is False
+
+def test_dormant_boards_wait_a_week():
+    budgets = scheduler.DEFAULT_BUDGETS
+    dormant = history(last_changed=ago(days=30), last_scraped=ago(days=3))
+    assert scheduler.is_due(dormant, NOW, budgets) is False
+    dormant["last_scraped"] = ago(days=8)
+    assert scheduler.is_due(dormant, NOW, budgets) is True
+
+def test_plan_skips_fresh_boards_and_orders_by_priority():
+    configs = [config("fresh"), config("normal"), config("new"), config("high")]
+    board_history = {
+        "greenhouse:fresh": history(last_scraped=ago(minutes=5)),
+        "greenhouse:normal": history(last_scraped=ago(days=2)),
+        "greenhouse:high": history(last_scraped=ago(days=2), jobs_matched=5),
+    }
+    planned = scheduler.plan(configs, board_history, now=NOW)
+    assert [c["id"] for c in planned] == ["new", "high", "normal"]
+
+def test_plan_accepts_budget_overrides():
+    board_history = {"greenhouse:a": history(last_scraped=ago(hours=2))}
+    assert scheduler.plan([config("a")], board_history, budgets={"normal": 1}, now=NOW)
+    assert not scheduler.plan([config("a")], board_history, budgets={"normal": 48}, now=NOW)
@@ -0,0 +1,21 @@
+import os
+import subprocess
+import sys
+
+import modules.scrapers as scrapers
+from modules.base import JobSite
+
+
+def test_registry_imports_no_scraper_dependencies():
+    code = ("import sys, modules.scrapers; "
+            "print(sorted(m for m in ('selenium', 'bs4', 'requests') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout.strip() == "[]"
+
+def test_scraper_classes_load_on_first_use(monkeypatch):
+    monkeypatch.setitem(scrapers.SCRAPER_CLASSES, "test", "modules.base:JobSite")
+    monkeypatch.setattr(scrapers, "_loaded", {})
+    assert scrapers.get_scraper_class("test") is JobSite
+    assert scrapers._loaded == {"test": JobSite}
+    assert scrapers.get_scraper_class("unknown") is None
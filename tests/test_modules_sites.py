@@ -0,0 +1,82 @@
+import datetime
+import json
+
+import pytest
+from modules import db, sites
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DATABASE_NAME", str(tmp_path / "jobs.db"))
+    conn = db.create_db()
+    yield conn
+    conn.close()
+
+def site(site_type, site_id, url=None, **extra):
+    return dict({"id": site_id, "name": site_id.title(), "type": site_type,
+                 "url": url or f"https://{site_id}.example.com/jobs"}, **extra)
+
+def test_select_sites_by_type_host_and_last_scrape(conn):
+    sites.upsert_sites(conn, [site("greenhouse", "a"), site("greenhouse", "b"), site("getro", "c", "https://www.c.vc/jobs")])
+    db.record_board_result(conn, "greenhouse:a", 2.0, job_ids=["1"])
+
+    now = datetime.datetime.now()
+    assert [s["id"] for s in sites.select_sites(conn, ["greenhouse"])] == ["a", "b"]
+    assert [s["id"] for s in sites.select_sites(conn, ["greenhouse"], not_scraped_within=24, now=now)] == ["b"]
+    later = now + datetime.timedelta(hours=25)
+    assert [s["id"] for s in sites.select_sites(conn, ["greenhouse"], not_scraped_within=24, now=later)] == ["a", "b"]
+    assert sites.select_sites(conn, host="c.vc") == [site("getro", "c", "https://www.c.vc/jobs")]
+
+    assert sites.set_enabled(conn, ["greenhouse:b"], enabled=False) == 1
+    assert [s["id"] for s in sites.select_sites(conn, ["greenhouse"])] == ["a"]
+    assert sites.count_sites(conn) == 2
+    # Re-importing a site keeps it disabled.
+    sites.upsert_sites(conn, [site("greenhouse", "b", name="New name")])
+    assert sites.select_sites(conn, enabled=False) == [site("greenhouse", "b", name="New name")]
+
+def test_registry_picks_up_earlier_scrapes(conn):
+    db.record_board_result(conn, "getro:a", 1.0, job_ids=["1"])
+    sites.upsert_sites(conn, [site("getro", "a")])
+    assert sites.select_sites(conn, not_scraped_within=1) == []
+
+def test_json_files_round_trip_and_only_changed_files_are_synced(conn, tmp_path, monkeypatch):
+    path = str(tmp_path / "getro_sites.json")
+    monkeypatch.setattr(sites, "SITE_FILES", {"getro": path})
+    configs = [site("getro", "b"), site("getro", "a", board_id=7)]
+    with open(path, "w") as f:
+        json.dump(configs, f, indent=4)
+    original = open(path).read()
+
+    assert sites.sync_files(conn) == 2
+    assert sites.sync_files(conn) == 0
+    assert sites.select_sites(conn) == configs
+
+    assert sites.export_json(conn, path, "getro") == 2
+    assert open(path).read() == original
+
+    with open(path, "w") as f:
+        json.dump(configs + [site("getro", "c")], f, indent=4)
+    assert sites.sync_files(conn) == 3
+    assert sites.count_sites(conn, ["getro"]) == 3
+
+def test_sites_removed_from_their_file_leave_the_registry(conn, tmp_path, monkeypatch):
+    path = str(tmp_path / "getro_sites.json")
+    monkeypatch.setattr(sites, "SITE_FILES", {"getro": path})
+    sites.upsert_sites(conn, [site("greenhouse", "g")])
+    with open(path, "w") as f:
+        json.dump([site("getro", "a"), site("getro", "b")], f, indent=4)
+    sites.sync_files(conn)
+    db.record_board_result(conn, "getro:b", 1.0, job_ids=["1"])
+
+    with open(path, "w") as f:
+        json.dump([site("getro", "a")], f)
+    sites.sync_files(conn)
+    assert [s["id"] for s in sites.select_sites(conn, enabled=None)] == ["g", "a"]
+    assert sites.export_json(conn, path, "getro") == 1
+    assert "getro:b" in db.get_board_history(conn)
+
+    # Added back, the site keeps its scrape history.
+    with open(path, "w") as f:
+        json.dump([site("getro", "a"), site("getro", "b")], f)
+    sites.sync_files(conn)
+    assert [s["id"] for s in sites.select_sites(conn, ["getro"], not_scraped_within=1)] == ["a"]
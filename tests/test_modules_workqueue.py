@@ -0,0 +1,66 @@
+import pytest
+from modules import workqueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    conn = workqueue.create_queue(str(tmp_path / "queue.db"))
+    yield conn
+    conn.close()
+
+@pytest.fixture
+def site_configs():
+    return [
+        {"id": "a", "name": "A", "type": "greenhouse", "url": "https://a.example.com"},
+        {"id": "b", "name": "B", "type": "consider", "url": "https://b.example.com"},
+    ]
+
+def test_enqueue_is_idempotent_per_run(queue, site_configs):
+    assert workqueue.enqueue(queue, "run-1", site_configs) == 2
+    assert workqueue.enqueue(queue, "run-1", site_configs) == 0
+    assert workqueue.queue_depth(queue) == {"pending": 2}
+
+def test_claim_hands_out_each_site_once(queue, site_configs):
+    workqueue.enqueue(queue, "run-1", site_configs)
+    first = workqueue.claim(queue, "w1")
+    second = workqueue.claim(queue, "w2")
+    assert {first["site_key"], second["site_key"]} == {"greenhouse:a", "consider:b"}
+    assert first["site_config"]["url"] == "https://a.example.com"
+    assert workqueue.claim(queue, "w3") is None
+
+def test_expired_lease_can_be_reclaimed(queue, site_configs):
+    workqueue.enqueue(queue, "run-1", site_configs[:1])
+    item = workqueue.claim(queue, "w1", lease_seconds=-1)
+    retaken = workqueue.claim(queue, "w2")
+    assert retaken["id"] == item["id"]
+    assert retaken["attempts"] == 2
+    # the original worker lost its lease and cannot write back
+    assert workqueue.heartbeat(queue, item["id"], "w1") is False
+    assert workqueue.complete(queue, item["id"], "w1", {"jobs": []}) is False
+
+def test_failed_items_are_retried_until_max_attempts(queue, site_configs):
+    workqueue.enqueue(queue, "run-1", site_configs[:1])
+    for _ in range(workqueue.MAX_ATTEMPTS):
+        item = workqueue.claim(queue, "w1")
+        workqueue.fail(queue, item["id"], "w1", "boom")
+    assert workqueue.claim(queue, "w1") is None
+    finished = workqueue.fetch_finished(queue, "run-1")
+    assert [i["status"] for i in finished] == ["failed"]
+    assert workqueue.run_outstanding(queue, "run-1") == 0
+
+def test_completed_results_are_collected_once(queue, site_configs):
+    workqueue.enqueue(queue, "run-1", site_configs[:1])
+    item = workqueue.claim(queue, "w1")
+    assert workqueue.heartbeat(queue, item["id"], "w1") is True
+    assert workqueue.complete(queue, item["id"], "w1", {"jobs": [{"job_id": "1"}]}) is True
+    finished = workqueue.fetch_finished(queue)
+    assert finished[0]["result"] == {"jobs": [{"job_id": "1"}]}
+    workqueue.mark_collected(queue, [finished[0]["id"]])
+    assert workqueue.fetch_finished(queue) == []
+
+def test_queue_shared_between_hosts_leaves_wal(tmp_path):
+    path = str(tmp_path / "shared.db")
+    workqueue.create_queue(path, journal_mode="WAL").close()
+    conn = workqueue.create_queue(path, journal_mode="DELETE")
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    conn.close()
@@ -0,0 +1,59 @@
+import json
+from collections import Counter
+
+import nfx_to_urls
+from nfx_to_urls import hostname, is_skipped, iter_urls, registrable_domain, save_urls_to_csv, url_of
+
+
+def test_hostname_and_registrable_domain():
+    assert hostname("https://WWW.Example.com:8080/jobs") == "example.com"
+    assert hostname("example.com/about") == "example.com"
+    assert hostname("http://") is None
+    assert registrable_domain("jobs.example.com") == "example.com"
+    assert registrable_domain("careers.example.co.uk") == "example.co.uk"
+    assert registrable_domain("example.io") == "example.io"
+
+def test_skip_domains_match_hosts_not_substrings():
+    assert is_skipped("linkedin.com") and is_skipped("uk.linkedin.com")
+    assert not is_skipped("notlinkedin.com")
+    assert not is_skipped("medium.company")
+
+def test_url_of_matches_a_full_parse():
+    records = [{"url": "https://a.vc"}, {"url": None, "website": "w.com"}, {"url": "", "company_url": "c.com"},
+               {"name": '"url": "x.com"', "url": "y.com"}, {"url": 'q"uote.com'}, {"links": {"url": "n.com"}},
+               {"id": 1}]
+    for record in records:
+        for line in (json.dumps(record), json.dumps(record, separators=(",", ":"))):
+            assert url_of(line) == (record.get("url") or record.get("website") or record.get("company_url"))
+
+def test_iter_urls_streams_and_dedups_by_registrable_domain():
+    records = [
+        {"url": "https://www.acme.vc"},
+        {"url": "https://blog.acme.vc/team"},
+        {"url": "https://medium.com/@acme"},
+        {"website": "beta.co.uk"},
+        {"url": None},
+        {"url": "null"},
+    ]
+    lines = [json.dumps(record) + "\n" for record in records] + ["not json\n", "\n"]
+    stats = Counter()
+    assert list(iter_urls(iter(lines), stats=stats)) == ["https://www.acme.vc", "https://blog.acme.vc/team", "beta.co.uk"]
+    assert (stats["lines"], stats["skipped"], stats["invalid"]) == (8, 1, 1)
+
+    stats = Counter()
+    assert list(iter_urls(iter(lines), unique_domains=True, stats=stats)) == ["https://www.acme.vc", "beta.co.uk"]
+    assert stats["duplicates"] == 1
+
+def test_save_urls_to_csv_streams_an_iterator(tmp_path):
+    output = str(tmp_path / "urls.csv")
+    assert save_urls_to_csv(iter(["a.com", "b.com"]), output) == 2
+    assert open(output).read().splitlines() == ["urls", "a.com", "b.com"]
+    # Nothing to write leaves an existing file alone.
+    assert save_urls_to_csv(iter([]), output) == 0
+    assert open(output).read().splitlines() == ["urls", "a.com", "b.com"]
+
+def test_extract_urls_from_nfx_data(tmp_path):
+    path = tmp_path / "nfx.json"
+    path.write_text(json.dumps({"url": "https://a.vc"}) + "\n" + json.dumps({"url": "https://twitter.com/a"}) + "\n")
+    assert nfx_to_urls.extract_urls_from_nfx_data(str(path)) == ["https://a.vc"]
+    assert nfx_to_urls.extract_urls_from_nfx_data(str(tmp_path / "missing.json")) == []
@@ -0,0 +1,61 @@
+import json
+
+import update_configs_from_json as update
+from modules import db
+from modules.sites import sync_files
+
+
+def career_entry(*pages):
+    return {"original_url": "https://x.vc", "domain": "x.vc",
+            "career_pages": {url: {"powered_by": system, "api_id": api_id} for url, system, api_id in pages}}
+
+def test_only_new_career_pages_are_processed():
+    data = [career_entry(("https://jobs.acme.vc/", "getro", ""), ("https://boards.greenhouse.io/beta", "greenhouse", ""))]
+    state = update.load_state()
+    sites = update.extract_sites_by_system(data, state["pages"])
+    assert [site["id"] for site in sites["getro"]] == ["acme"]
+    assert [site["id"] for site in sites["greenhouse"]] == ["beta"]
+
+    data.append(career_entry(("https://careers.gamma.com/", "consider", "")))
+    sites = update.extract_sites_by_system(data, state["pages"])
+    assert {system: [site["id"] for site in found] for system, found in sites.items()} == {"consider": ["gamma"]}
+
+    # Known ids are not returned again even from pages never seen before.
+    data.append(career_entry(("https://other.acme.vc/jobs", "getro", "")))
+    assert not update.extract_sites_by_system(data, state["pages"], known_ids={"getro": {"acme"}})
+
+def test_pages_without_a_site_id_are_tried_again():
+    seen = update.load_state()["pages"]
+    data = [career_entry(("careers", "getro", ""))]
+    assert not update.extract_sites_by_system(data, seen)
+    assert not seen["getro"]
+
+def test_append_sites_keeps_the_json_dump_layout(tmp_path):
+    path = tmp_path / "sites.json"
+    site = update.create_site_config("a", "A", "getro", "https://a.vc")
+    path.write_text("[]")
+    update.append_sites(str(path), [site])
+    update.append_sites(str(path), [dict(site, id="b"), dict(site, id="c")])
+    assert path.read_text() == json.dumps([site, dict(site, id="b"), dict(site, id="c")], indent=4)
+
+    # Anything else is rewritten in full.
+    path.write_text('[{"id": "a"}]')
+    update.append_sites(str(path), [{"id": "b"}])
+    assert json.loads(path.read_text()) == [{"id": "a"}, {"id": "b"}]
+
+def test_update_config_file_adds_sites_to_the_registry_and_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DATABASE_NAME", str(tmp_path / "jobs.db"))
+    monkeypatch.setitem(update.SITE_FILES, "getro", str(tmp_path / "getro_sites.json"))
+    site = update.create_site_config("a", "A", "getro", "https://a.vc")
+    with open(update.SITE_FILES["getro"], "w") as f:
+        json.dump([site], f, indent=4)
+    conn = db.create_db()
+    sync_files(conn, ["getro"])
+
+    assert update.update_config_file(conn, "getro", [site, dict(site, id="b")]) == 1
+    assert update.site_ids(conn, "getro") == {"a", "b"}
+    with open(update.SITE_FILES["getro"]) as f:
+        assert [config["id"] for config in json.load(f)] == ["a", "b"]
+    # The append was recorded, so the file is not imported again.
+    assert sync_files(conn, ["getro"]) == 0
+    conn.close()
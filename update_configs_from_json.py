@@ -9,18 +9,39 @@ and updates the configuration files for each supported job board system:
 - greenhouse_sites.json
 - ventureloop_sites.json
 
+New sites are added to the site registry (modules/sites.py), which is also used
+to skip sites that are already configured, and appended to the end of the
+configuration files instead of rewriting them. Career pages that were already
+processed are remembered (by content hash) in a state file, so each run only
+handles newly discovered pages.
+
 Usage:
     python update_configs_from_json.py
     python update_configs_from_json.py -i career_links.json
     python update_configs_from_json.py --dry-run
+    python update_configs_from_json.py --rebuild   # Reprocess every career page
 """
 
+import hashlib
 import json
+import logging
 import os
 import argparse
+import textwrap
 from urllib.parse import urlparse
 from collections import defaultdict
 
+from modules.db import create_db
+from modules.log import add_log_arguments, setup_logging
+from modules.sites import SITE_FILES, record_file, site_ids, sync_files, upsert_sites
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_SYSTEMS = tuple(SITE_FILES)
+
+# Hashes of processed career pages per system.
+STATE_FILE = "data/config-state.json"
+
 def extract_site_id_from_url(url, powered_by):
     """Extract site ID from domain name (not subdomain)."""
     parsed = urlparse(url)
@@ -92,7 +113,7 @@ def create_site_config(site_id, name, powered_by, url, api_id=None):
 def load_career_links(input_file):
     """Load and parse career_links.json file."""
     if not os.path.exists(input_file):
-        print(f"Error: Input file '{input_file}' not found")
+        logger.error("Input file '%s' not found", input_file)
         return []
     
     try:
@@ -100,34 +121,76 @@ def load_career_links(input_file):
             data = json.load(f)
         return data
     except Exception as e:
-        print(f"Error loading {input_file}: {e}")
+        logger.error("Error loading %s: %s", input_file, e)
         return []
 
-def extract_sites_by_system(career_data):
-    """Extract and organize sites by job board system."""
+def page_key(career_url, powered_by, api_id):
+    """Short content hash identifying a discovered career page."""
+    return hashlib.sha1(f"{career_url}\0{powered_by}\0{api_id}".encode("utf-8")).hexdigest()[:16]
+
+def load_state(state_file=None):
+    """
+    Loads the state left by the previous run, or an empty state without a file:
+    {"pages": {system: set of page keys}}
+    """
+    state = {"pages": defaultdict(set)}
+    if not state_file or not os.path.exists(state_file):
+        return state
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception as e:
+        logger.warning("Ignoring unreadable state file %s: %s", state_file, e)
+        return state
+    for system, keys in data.get("pages", {}).items():
+        state["pages"][system] = set(keys)
+    return state
+
+def save_state(state, state_file):
+    """Writes the state file atomically."""
+    os.makedirs(os.path.dirname(state_file) or ".", exist_ok=True)
+    data = {"pages": {system: sorted(keys) for system, keys in state["pages"].items()}}
+    with open(state_file + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(state_file + ".tmp", state_file)
+
+def extract_sites_by_system(career_data, seen=None, known_ids=None, systems=SUPPORTED_SYSTEMS):
+    """
+    Extract and organize sites by job board system.
+    Career pages whose key is already in `seen[system]` are skipped. A page's key is
+    added to it once the page yields a site, so pages without a recognisable site id
+    are tried again next run. Sites whose id is in `known_ids[system]` are not
+    returned again.
+    """
     sites_by_system = defaultdict(list)
-    processed = defaultdict(set)  # Track processed site IDs per system
+    seen = seen if seen is not None else defaultdict(set)
+    # Track processed site IDs per system
+    processed = defaultdict(set, {system: set(ids) for system, ids in (known_ids or {}).items()})
     
     for entry in career_data:
-        career_pages = entry.get("career_pages", {})
+        career_pages = entry.get("career_pages")
+        if not career_pages:
+            continue
         
         for career_url, info in career_pages.items():
-            powered_by = info.get("powered_by", "").lower()
-            api_id = info.get("api_id", "")
+            powered_by = (info.get("powered_by") or "").lower()
+            api_id = info.get("api_id") or ""
             
-            if not powered_by:
+            # Only process supported systems
+            if powered_by not in systems:
                 continue
             
-            # Only process supported systems
-            if powered_by not in ["consider", "getro", "greenhouse", "ventureloop"]:
+            key = page_key(career_url, powered_by, api_id)
+            if key in seen[powered_by]:
                 continue
             
             # Extract site ID
             site_id = api_id if api_id else extract_site_id_from_url(career_url, powered_by)
             
             if not site_id:
-                print(f"  Warning: Could not extract site ID from {career_url} ({powered_by})")
+                logger.warning("Could not extract site ID from %s (%s)", career_url, powered_by)
                 continue
+            seen[powered_by].add(key)
             
             # Skip if already processed
             if site_id in processed[powered_by]:
@@ -151,40 +214,60 @@ def load_existing_config(filename):
             with open(filename, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception as e:
-            print(f"  Warning: Error loading {filename}: {e}")
+            logger.warning("Error loading %s: %s", filename, e)
             return []
     return []
 
-def update_config_file(filename, new_sites, dry_run=False):
-    """Update a configuration file with new sites."""
+def append_sites(filename, sites):
+    """
+    Appends sites to the JSON array in `filename` in place, in the same layout as
+    json.dump(..., indent=4). Falls back to rewriting the file when it does not end
+    the way that layout does.
+    """
+    entries = ",\n".join(textwrap.indent(json.dumps(site, indent=4), "    ") for site in sites).encode("utf-8")
+    if os.path.exists(filename):
+        with open(filename, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            f.seek(max(0, end - 4096))
+            tail = f.read()
+            body = tail.rstrip()
+            before = body[:-1].rstrip()
+            if body.endswith(b"]") and (before.endswith(b"}") or before == b"["):
+                f.seek(end - len(tail) + len(before))
+                f.truncate()
+                f.write((b",\n" if before.endswith(b"}") else b"\n") + entries + b"\n]" + tail[len(body):])
+                return
     existing_sites = load_existing_config(filename)
-    existing_ids = {site["id"] for site in existing_sites}
+    with open(filename + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(existing_sites + list(sites), f, indent=4)
+    os.replace(filename + ".tmp", filename)
+
+def update_config_file(conn, system, new_sites, dry_run=False):
+    """
+    Adds new sites of a system to the site registry and its configuration file.
+    Errors writing the file are raised before the registry is touched.
+    """
+    filename = SITE_FILES[system]
+    existing_ids = site_ids(conn, system)
     
-    added_count = 0
+    added = []
     for site in new_sites:
         if site["id"] not in existing_ids:
-            if not dry_run:
-                existing_sites.append(site)
-            print(f"    + Adding: {site['id']} ({site['name']})")
-            added_count += 1
-        else:
-            # Site already exists
-            pass
-    
-    if added_count > 0:
-        if not dry_run:
-            try:
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(existing_sites, f, indent=4)
-                print(f"  Updated {filename}: Added {added_count} new sites")
-            except Exception as e:
-                print(f"  Error writing to {filename}: {e}")
-        else:
-            print(f"  [DRY RUN] Would add {added_count} new sites to {filename}")
+            logger.info("  + Adding: %s (%s)", site['id'], site['name'])
+            added.append(site)
+            existing_ids.add(site["id"])
+    
+    if not added:
+        logger.info("No new sites to add to %s", filename)
+    elif dry_run:
+        logger.info("[DRY RUN] Would add %d new sites to %s", len(added), filename)
     else:
-        print(f"  No new sites to add to {filename}")
+        append_sites(filename, added)
+        upsert_sites(conn, added)
+        record_file(conn, filename)
+        logger.info("Updated %s: Added %d new sites", filename, len(added))
     
-    return added_count
+    return len(added)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -207,66 +290,71 @@ def main():
     parser.add_argument(
         '--systems',
         nargs='+',
-        choices=['consider', 'getro', 'greenhouse', 'ventureloop'],
+        choices=list(SUPPORTED_SYSTEMS),
         help='Only update specific systems (default: all)'
     )
     
+    parser.add_argument(
+        '--state',
+        default=STATE_FILE,
+        help='File remembering processed career pages'
+    )
+    
+    parser.add_argument(
+        '--rebuild',
+        action='store_true',
+        help='Ignore the state file and process every career page again'
+    )
+    
+    add_log_arguments(parser)
     args = parser.parse_args()
+    setup_logging(args.log_level, args.log_format)
     
     # Load career links data
-    print(f"Loading career links from: {args.input}")
+    logger.info("Loading career links from: %s", args.input)
     career_data = load_career_links(args.input)
     
     if not career_data:
-        print("No data found to process")
+        logger.warning("No data found to process")
         return
     
-    print(f"Found {len(career_data)} entries in career links file")
+    logger.info("Found %d entries in career links file", len(career_data))
     
-    # Extract sites by system
-    sites_by_system = extract_sites_by_system(career_data)
+    state = load_state(None if args.rebuild else args.state)
+    systems_to_update = args.systems or SUPPORTED_SYSTEMS
+    conn = create_db()
+    # Pick up hand edits to the config files before checking which sites are known
+    sync_files(conn, systems_to_update)
+    known_ids = {system: site_ids(conn, system) for system in systems_to_update}
+    previous_pages = {system: set(state["pages"][system]) for system in systems_to_update}
     
-    # Summary of found sites
-    print("\nSites found by system:")
-    for system, sites in sites_by_system.items():
-        print(f"  {system}: {len(sites)} sites")
+    # Extract sites by system, skipping pages handled by earlier runs
+    sites_by_system = extract_sites_by_system(career_data, state["pages"], known_ids, systems_to_update)
+    for system in systems_to_update:
+        logger.info("%s: %d new career pages, %d new sites", system,
+                    len(state["pages"][system] - previous_pages[system]), len(sites_by_system[system]))
     
     if args.dry_run:
-        print("\n[DRY RUN MODE - No files will be modified]")
+        logger.info("[DRY RUN MODE - No files will be modified]")
     
     # Update configuration files
-    config_files = {
-        "consider": "consider_sites.json",
-        "getro": "getro_sites.json",
-        "greenhouse": "greenhouse_sites.json",
-        "ventureloop": "ventureloop_sites.json"
-    }
-    
-    systems_to_update = args.systems if args.systems else config_files.keys()
     total_added = 0
-    
-    print("\nUpdating configuration files:")
     for system in systems_to_update:
-        if system not in sites_by_system:
-            print(f"\n{system.capitalize()}:")
-            print(f"  No new sites found")
-            continue
-        
-        print(f"\n{system.capitalize()}:")
-        filename = config_files[system]
-        new_sites = sites_by_system[system]
-        added = update_config_file(filename, new_sites, dry_run=args.dry_run)
-        total_added += added
+        try:
+            total_added += update_config_file(conn, system, sites_by_system[system], dry_run=args.dry_run)
+        except Exception as e:
+            logger.error("Error writing to %s: %s", SITE_FILES[system], e)
+            # Retry these pages next run
+            state["pages"][system] = previous_pages[system]
+    conn.close()
+    
+    if not args.dry_run:
+        save_state(state, args.state)
     
     # Final summary
-    print("\n" + "="*60)
-    print("SUMMARY")
-    print("="*60)
-    print(f"Total new sites added: {total_added}")
+    logger.info("Total new sites added: %d", total_added)
     if args.dry_run:
-        print("[DRY RUN - No files were actually modified]")
-    else:
-        print("Configuration files have been updated")
+        logger.info("[DRY RUN - No files were actually modified]")
     
     # Show next steps
     if total_added > 0 and not args.dry_run:
@@ -275,4 +363,4 @@ def main():
         print("  2. Run the job scraper: python search.py")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
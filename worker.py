@@ -0,0 +1,105 @@
+"""
+Scrape worker for distributed runs.
+
+Claims sites from the work queue filled by `python search.py --enqueue`, runs the
+matching scraper and writes the matching jobs back to the queue. The coordinator
+(`search.py --enqueue` / `--collect`) is the only process that writes to the jobs
+database, so workers can run on other hosts as long as they can reach the queue
+file (set QUEUE_DATABASE_NAME to point at it). A separate queue file uses SQLite's
+rollback journal rather than WAL, which does not work across machines; the shared
+filesystem must still support file locking.
+
+Usage:
+    python worker.py
+    python worker.py --wait         # keep polling for new work instead of exiting when the queue is empty
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
+
+from modules.log import add_log_arguments, setup_logging
+from modules.metrics import ScrapeMetrics
+from modules.workqueue import LEASE_SECONDS, claim, complete, create_queue, fail, heartbeat
+from search import run_scraper
+
+logger = logging.getLogger(__name__)
+
+
+def keep_alive(item_id, worker_id, stop, lease_seconds):
+    """Extends the lease on an item until `stop` is set. Runs in its own thread with its own connection."""
+    conn = create_queue()
+    try:
+        while not stop.wait(lease_seconds / 3):
+            if not heartbeat(conn, item_id, worker_id, lease_seconds):
+                logger.warning("Lost lease on queue item %s", item_id)
+                break
+    finally:
+        conn.close()
+
+def process_item(conn, item, worker_id, lease_seconds):
+    stop = threading.Event()
+    pulse = threading.Thread(target=keep_alive, args=(item["id"], worker_id, stop, lease_seconds), daemon=True)
+    pulse.start()
+    started = time.monotonic()
+    metrics = ScrapeMetrics(item["site_key"], item["run_id"])
+    try:
+        result = run_scraper(item["site_config"], metrics)
+    except Exception as e:
+        logger.error("Error scraping %s: %s", item["site_key"], e)
+        fail(conn, item["id"], worker_id, f"{e.__class__.__name__}: {e}")
+        return
+    finally:
+        stop.set()
+        pulse.join()
+
+    if result is None:
+        fail(conn, item["id"], worker_id, "scrape failed")
+        return
+
+    jobs, matching = result
+    metrics.finish("ok")
+    written = complete(conn, item["id"], worker_id, {
+        "job_ids": [job.get("job_id") for job in jobs],
+        "jobs": [job.to_dict() for job in matching],
+        "duration": time.monotonic() - started,
+        "metrics": metrics.to_dict(),
+    })
+    if written:
+        logger.info("Finished %s: %d jobs, %d matching", item["site_key"], len(jobs), len(matching))
+    else:
+        logger.warning("Lease on %s expired before completion; result discarded", item["site_key"])
+
+def main(wait=False, poll_seconds=10, lease_seconds=LEASE_SECONDS):
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    conn = create_queue()
+    logger.info("Worker %s started", worker_id)
+    processed = 0
+    try:
+        while True:
+            item = claim(conn, worker_id, lease_seconds)
+            if item is None:
+                if not wait:
+                    break
+                time.sleep(poll_seconds)
+                continue
+            logger.info("Claimed %s (run %s, attempt %s)", item["site_key"], item["run_id"], item["attempts"])
+            process_item(conn, item, worker_id, lease_seconds)
+            processed += 1
+    finally:
+        conn.close()
+    logger.info("Worker %s done. Processed %d sites.", worker_id, processed)
+
+if __name__ == "__main__":
+    parser = ArgumentParser(formatter_class=ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--wait", action="store_true", help="Keep polling for work when the queue is empty")
+    parser.add_argument("--poll", type=int, default=10, help="Seconds between polls when waiting")
+    parser.add_argument("--lease", type=int, default=LEASE_SECONDS, help="Lease length in seconds")
+    add_log_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(args.log_level, args.log_format)
+
+    main(wait=args.wait, poll_seconds=args.poll, lease_seconds=args.lease)